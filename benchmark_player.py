@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Headless benchmark suite for the GIF player.
+
+Generates a synthetic GIF corpus, then measures set_gif switch latency, paintEvent cost
+per frame (with and without flip), folder scan time and peak RSS under the offscreen
+Qt platform. Results are written as JSON; --baseline compares against an earlier run
+and exits with status 1 when a metric regresses.
+
+Usage:
+    python benchmark_player.py --output bench.json
+    python benchmark_player.py --output bench.json --baseline bench_baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication, QSystemTrayIcon
+
+# 合成语料：(名称, 宽, 高, 帧数, 帧延时ms, 是否透明)
+CORPUS = [
+    ('small_opaque', 200, 200, 12, 100, False),
+    ('small_transparent', 200, 200, 12, 40, True),
+    ('medium_transparent', 640, 480, 24, 40, True),
+    ('large_fast', 1280, 720, 30, 20, True),
+]
+QUICK_CORPUS = CORPUS[:2]
+SCAN_SIZES = (1_000, 10_000, 100_000)
+QUICK_SCAN_SIZES = (1_000,)
+DEFAULT_TOLERANCE = 0.10
+
+
+def generate_gif(path, width, height, frames, delay, transparent):
+    """用 Pillow 生成一个移动色块的合成 GIF"""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        sys.exit("Pillow is required to generate the benchmark corpus: pip install Pillow")
+    images = []
+    block = max(8, min(width, height) // 4)
+    for i in range(frames):
+        background = (0, 0, 0, 0) if transparent else (255, 255, 255, 255)
+        image = Image.new('RGBA', (width, height), background)
+        draw = ImageDraw.Draw(image)
+        x = (width - block) * i // max(1, frames - 1)
+        draw.ellipse((x, height // 2 - block // 2, x + block, height // 2 + block // 2),
+                     fill=(255, 64 + i * 4 % 192, 32, 255))
+        images.append(image)
+    extra = {'transparency': 0, 'disposal': 2} if transparent else {}
+    images[0].save(path, save_all=True, append_images=images[1:], duration=delay, loop=0, **extra)
+
+
+def generate_corpus(folder, corpus):
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for name, width, height, frames, delay, transparent in corpus:
+        path = os.path.join(folder, f'{name}.gif')
+        generate_gif(path, width, height, frames, delay, transparent)
+        paths.append(path)
+    return paths
+
+
+def spin(ms):
+    """运行事件循环 ms 毫秒，让后台预取、计时器等得以执行"""
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec_()
+
+
+def summarize(samples_ms):
+    samples = sorted(samples_ms)
+    return {
+        'mean_ms': statistics.fmean(samples),
+        'p50_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'max_ms': samples[-1],
+    }
+
+
+def make_player(work_dir, corpus_dir):
+    """在临时目录中创建一个以合成语料为GIF文件夹的播放器"""
+    from transparent_gif_player import TransparentGifPlayer
+    config_path = os.path.join(work_dir, 'user_config.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({'gif_folder': corpus_dir, 'auto_switch': False}, f)
+    # offscreen 平台没有系统托盘，创建播放器（托盘在首帧后创建）期间视为可用，之后恢复
+    tray_available = QSystemTrayIcon.__dict__['isSystemTrayAvailable']
+    QSystemTrayIcon.isSystemTrayAvailable = staticmethod(lambda: True)
+    try:
+        player = TransparentGifPlayer(corpus_dir, config_path=config_path)
+        player.show()
+        spin(200)
+        player._finish_startup()
+    finally:
+        QSystemTrayIcon.isSystemTrayAvailable = tray_available
+    return player
+
+
+def reset_caches(player, work_dir):
+    """冷切换前清空所有缓存：预取结果、原始字节、已缩放帧，并换用一个新的空磁盘帧缓存目录
+
+    共享帧表无需清空：只有一个窗口，set_gif 先归还上一个GIF的帧再取新的帧。
+    """
+    from frame_disk_cache import FrameDiskCache
+    from gif_source import invalidate_sources
+    player._prefetcher.clear()
+    invalidate_sources()
+    player._frame_cache.clear()
+    if player._disk_cache is not None:
+        cache_dir = tempfile.mkdtemp(prefix='frames_', dir=work_dir)
+        player._disk_cache = FrameDiskCache(cache_dir, player._disk_cache.max_bytes)
+        player._prefetcher.disk_cache = player._disk_cache
+
+
+def bench_switch(player, paths, rounds, work_dir):
+    """set_gif 切换延迟：所有缓存都未命中（冷）与预取命中（热）两种情况"""
+    cold, warm = [], []
+    for _ in range(rounds):
+        for i, path in enumerate(paths):
+            reset_caches(player, work_dir)
+            player.gif_index = i
+            start = time.perf_counter()
+            player.set_gif(path)
+            cold.append((time.perf_counter() - start) * 1000.0)
+        for i, path in enumerate(paths):
+            player.gif_index = (i - 1) % len(paths)
+            player._prefetcher.prefetch_around(player.gif_list, i)
+            spin(300)  # 等待后台预取完成
+            player.gif_index = i
+            start = time.perf_counter()
+            player.set_gif(path)
+            warm.append((time.perf_counter() - start) * 1000.0)
+    return {'cold': summarize(cold), 'warm': summarize(warm)}
+
+
+def bench_paint(player, paths):
+    """paintEvent 每帧耗时：首轮（缓存未命中）与后续轮（缓存命中），分别测翻转与不翻转"""
+    results = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        player.set_gif(path)
+        spin(50)
+        movie = player.movie
+        movie.setPaused(True)
+        frame_count = max(1, movie.frameCount())
+        per_gif = {}
+        for flipped in (False, True):
+            player._flipped = flipped
+            player._frame_cache.clear()
+            first, repeat = [], []
+            for loop in range(3):
+                for frame in range(frame_count):
+                    movie.jumpToFrame(frame)
+                    start = time.perf_counter()
+                    player.repaint()
+                    elapsed = (time.perf_counter() - start) * 1000.0
+                    (first if loop == 0 else repeat).append(elapsed)
+            per_gif['flipped' if flipped else 'normal'] = {
+                'first_loop': summarize(first), 'cached': summarize(repeat)}
+        player._flipped = False
+        results[name] = per_gif
+    return results
+
+
+def bench_scan(work_dir, sizes):
+    """后台扫描线程的扫描耗时，以及从持久化索引加载的耗时"""
+    from folder_scanner import FolderScanner
+    from library_index import LibraryIndex
+    results = {}
+    for size in sizes:
+        folder = os.path.join(work_dir, f'scan_{size}')
+        os.makedirs(folder, exist_ok=True)
+        for i in range(size):
+            open(os.path.join(folder, f'{i:07d}.gif'), 'wb').close()
+        index_path = os.path.join(work_dir, f'index_{size}.sqlite3')
+        scanner = FolderScanner(folder, 0, index_path=index_path)
+        start = time.perf_counter()
+        scanner.run()  # 在当前线程中直接执行，只计扫描本身
+        scan_ms = (time.perf_counter() - start) * 1000.0
+        index = LibraryIndex(index_path)
+        start = time.perf_counter()
+        _, paths = index.load_folder(folder)
+        load_ms = (time.perf_counter() - start) * 1000.0
+        index.close()
+        assert len(paths) == size
+        results[str(size)] = {'scan_ms': scan_ms, 'index_load_ms': load_ms}
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def peak_rss_mb():
+    """进程峰值常驻内存（MB），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def flatten(results, prefix=''):
+    """把嵌套结果展开为 {'a.b.c': 数值}，便于与基线逐项比较"""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline, tolerance):
+    """逐项比较（所有指标都是越小越好），返回超出容差的回归项"""
+    regressions = []
+    base = flatten(baseline.get('metrics', {}))
+    for name, value in flatten(current['metrics']).items():
+        old = base.get(name)
+        if old is None or old <= 0:
+            continue
+        change = (value - old) / old
+        if change > tolerance:
+            regressions.append({'metric': name, 'baseline': old, 'current': value, 'change': change})
+    return regressions
+
+
+def run(args):
+    app = QApplication.instance() or QApplication(sys.argv)
+    work_dir = tempfile.mkdtemp(prefix='gif_bench_')
+    try:
+        corpus_dir = os.path.join(work_dir, 'corpus')
+        paths = generate_corpus(corpus_dir, QUICK_CORPUS if args.quick else CORPUS)
+        player = make_player(work_dir, corpus_dir)
+        metrics = {
+            'switch': bench_switch(player, paths, 1 if args.quick else 3, work_dir),
+            'paint': bench_paint(player, paths),
+            'scan': bench_scan(work_dir, QUICK_SCAN_SIZES if args.quick else args.scan_sizes),
+        }
+        rss = peak_rss_mb()
+        if rss is not None:
+            metrics['peak_rss_mb'] = rss
+        player.close()
+        app.processEvents()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'metrics': metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless benchmark suite for the GIF player')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against a previous results file')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed relative slowdown before a metric counts as a regression')
+    parser.add_argument('--scan-sizes', type=lambda s: tuple(int(x) for x in s.split(',')),
+                        default=SCAN_SIZES, help='comma separated folder sizes for the scan benchmark')
+    parser.add_argument('--quick', action='store_true', help='small corpus and scan sizes (smoke run)')
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(f"✗ {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} (+{r['change']:.0%})")
+        if regressions:
+            return 1
+        print("✓ No regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
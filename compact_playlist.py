@@ -0,0 +1,165 @@
+import bisect
+import os
+import random
+from array import array
+from collections import deque
+
+SEPARATOR = '\0'  # 文件名中不会出现的分隔符
+HISTORY_LIMIT = 1024  # 随机播放可后退的步数
+
+
+class CompactPlaylist:
+    """递归模式的紧凑播放列表：目录路径只存一次，文件名按目录拼成一个字符串，条目只占两个整数
+
+    条目按目录分组追加（同一目录的文件名须有序且一次性加入），可像列表一样用下标和 len() 访问，
+    按下标取路径为 O(1)；find() 先按目录定位再在目录内二分查找。不会为每个条目保留完整路径字符串。
+    """
+
+    def __init__(self):
+        self._dirs = []  # 目录路径，按加入顺序
+        self._dir_ids = {}  # 目录路径 -> 编号
+        self._dir_names = []  # 每个目录的文件名，用 SEPARATOR 连接
+        self._dir_first = array('I')  # 每个目录第一个条目的下标
+        self._dir_count = array('I')  # 每个目录的条目数
+        self._entry_dir = array('I')  # 每个条目所属目录的编号
+        self._entry_offset = array('I')  # 每个条目的文件名在目录字符串中的起始位置
+
+    def add_directory(self, directory, names):
+        """追加一个目录中的全部GIF（names 为已排序的文件名）"""
+        if not names:
+            return
+        if directory in self._dir_ids:
+            raise ValueError(f'directory already added: {directory}')
+        dir_id = len(self._dirs)
+        self._dir_ids[directory] = dir_id
+        self._dirs.append(directory)
+        self._dir_names.append(SEPARATOR.join(names))
+        self._dir_first.append(len(self._entry_dir))
+        self._dir_count.append(len(names))
+        offset = 0
+        for name in names:
+            self._entry_dir.append(dir_id)
+            self._entry_offset.append(offset)
+            offset += len(name) + 1
+
+    def _name(self, index):
+        blob = self._dir_names[self._entry_dir[index]]
+        start = self._entry_offset[index]
+        end = blob.find(SEPARATOR, start)
+        return blob[start:] if end < 0 else blob[start:end]
+
+    def __len__(self):
+        return len(self._entry_dir)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._entry_dir)
+        if not 0 <= index < len(self._entry_dir):
+            raise IndexError('playlist index out of range')
+        return os.path.join(self._dirs[self._entry_dir[index]], self._name(index))
+
+    def __iter__(self):
+        for index in range(len(self._entry_dir)):
+            yield self[index]
+
+    def find(self, path):
+        """路径的下标，不在列表中时返回 -1"""
+        directory, name = os.path.split(path)
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            return -1
+        lo = self._dir_first[dir_id]
+        hi = lo + self._dir_count[dir_id]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._dir_first[dir_id] + self._dir_count[dir_id] and self._name(lo) == name:
+            return lo
+        return -1
+
+    @property
+    def directory_count(self):
+        return len(self._dirs)
+
+    @property
+    def nbytes(self):
+        """条目数组和名称字符串占用的大致字节数"""
+        arrays = (self._dir_first, self._dir_count, self._entry_dir, self._entry_offset)
+        return (sum(a.itemsize * len(a) for a in arrays)
+                + sum(len(d) + len(n) for d, n in zip(self._dirs, self._dir_names)))
+
+
+def playlist_index(playlist, path):
+    """路径在播放列表中的下标（普通列表须有序），不在列表中时返回 -1"""
+    if isinstance(playlist, CompactPlaylist):
+        return playlist.find(path)
+    i = bisect.bisect_left(playlist, path)
+    return i if i < len(playlist) and playlist[i] == path else -1
+
+
+class ShuffleOrder:
+    """不重复的随机播放顺序：惰性 Fisher-Yates 洗牌，每步 O(1)，内存只随已播放的数量增长
+
+    一轮播完所有条目后开始新的一轮，新一轮的第一个不会与上一轮最后一个相同。
+    prev() 可沿最近 HISTORY_LIMIT 步后退，后退后再 next() 会按原顺序前进。
+    """
+
+    def __init__(self, size, rng=None):
+        self.size = size
+        self._rng = rng or random.Random()
+        self._swaps = {}  # 被交换过的位置 -> 该位置上的值，未出现的位置 i 的值就是 i
+        self._drawn = 0  # 本轮已抽取的数量
+        self._history = deque(maxlen=HISTORY_LIMIT)
+        self._pos = -1  # 当前位置在 _history 中的下标
+
+    def grow(self, size):
+        """播放列表末尾追加了条目：新条目并入本轮尚未播放的部分，已播放的顺序和历史不变"""
+        if size < self.size:
+            raise ValueError('ShuffleOrder can only grow')
+        self.size = size
+
+    def _draw(self):
+        if self._drawn >= self.size:
+            # 新的一轮：把上一轮最后一个放到最后，第一次只在其余位置中抽取
+            last = self._history[-1] if self._history else None
+            self._swaps.clear()
+            self._drawn = 0
+            if last is not None and self.size > 1:
+                self._swaps[last] = self.size - 1
+                self._swaps[self.size - 1] = last
+                return self._take(self._rng.randrange(0, self.size - 1))
+        return self._take(self._rng.randrange(self._drawn, self.size))
+
+    def _take(self, j):
+        k = self._drawn
+        value = self._swaps.get(j, j)
+        self._swaps[j] = self._swaps.get(k, k)
+        self._swaps.pop(k, None)  # 位置 k 之后不会再被访问
+        self._drawn += 1
+        return value
+
+    def peek(self):
+        """下一个将要播放的下标（不前进），用于预取"""
+        if self.size == 0:
+            return None
+        if self._pos + 1 >= len(self._history):
+            if len(self._history) == self._history.maxlen:
+                self._pos -= 1  # 最早的一步被挤出历史
+            self._history.append(self._draw())
+        return self._history[self._pos + 1]
+
+    def next(self):
+        value = self.peek()
+        if value is not None:
+            self._pos += 1
+        return value
+
+    def prev(self):
+        """后退一步，没有更早的历史时返回 None"""
+        if self._pos <= 0:
+            return None
+        self._pos -= 1
+        return self._history[self._pos]
@@ -0,0 +1,75 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class ConfigStore(QObject):
+    """用户配置的防抖、原子、后台持久化
+
+    update() 只记录变化（值为 None 表示删除该项）并重启防抖计时器，静默 delay_ms 后在后台线程写入：先写临时文件再原子替换，
+    写到一半崩溃也不会截断原文件。退出时调用 flush() 同步写出尚未保存的变化。
+    """
+
+    def __init__(self, path, delay_ms=500, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._data = {}
+        self._dirty = False
+        self._executor = ThreadPoolExecutor(max_workers=1)  # 单线程，保证按顺序写入
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._write_async)
+
+    def load(self):
+        """读取配置文件；文件不存在或损坏时返回空字典"""
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"读取配置文件失败: {e}")
+            return {}
+        if isinstance(data, dict):
+            self._data = dict(data)
+            return data
+        return {}
+
+    def update(self, values):
+        """合并一组配置项，稍后在后台写入；值为 None 的配置项从文件中删除"""
+        changed = False
+        for key, value in values.items():
+            if value is None:
+                changed |= self._data.pop(key, None) is not None
+            elif self._data.get(key) != value:
+                self._data[key] = value
+                changed = True
+        if changed:
+            self._dirty = True
+            self._timer.start()
+
+    def _write_async(self):
+        if not self._dirty or not self.path:
+            return
+        self._dirty = False
+        self._executor.submit(self._write, dict(self._data))
+
+    def _write(self, data):
+        tmp_path = f'{self.path}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存配置文件失败: {e}")
+
+    def flush(self):
+        """立即写出尚未保存的变化并等待写入完成（退出时调用）"""
+        self._timer.stop()
+        self._write_async()
+        self._executor.submit(lambda: None).result()  # 等待之前提交的写入全部完成
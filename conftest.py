@@ -0,0 +1,31 @@
+"""
+Shared pytest setup: one QApplication for the whole test session
+"""
+
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QCoreApplication, QEvent
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture(scope='session', autouse=True)
+def qapp():
+    """整个测试会话共用一个 QApplication（QPixmap、窗口和事件循环都需要它，一个进程只能创建一个）"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    yield app
+
+
+@pytest.fixture(autouse=True)
+def close_windows(qapp):
+    """每个测试结束后关闭并销毁它留下的窗口，窗口延迟执行的启动步骤不会在之后的测试中触发"""
+    yield
+    for widget in qapp.topLevelWidgets():
+        widget.close()
+        widget.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
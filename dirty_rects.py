@@ -0,0 +1,152 @@
+import math
+
+from PyQt5.QtCore import QRect
+
+# 相邻帧之间跳过的帧数超过总帧数的这一比例时直接整窗重绘
+MAX_UNION_FRACTION = 0.5
+
+
+def _image_bytes(image):
+    return image.constBits().asstring(image.sizeInBytes())
+
+
+def changed_rect(before, after):
+    """两帧之间变化像素的包围矩形（帧坐标），没有变化时返回空 QRect；尺寸或格式不同时返回整帧
+
+    先对整行组成的前缀/后缀做二分查找得到上下边界，再逐行用前缀/后缀切片比较（二分查找）收窄左右边界。
+    """
+    width, height = after.width(), after.height()
+    full = QRect(0, 0, width, height)
+    if before.size() != after.size() or before.format() != after.format() or after.depth() != 32:
+        return full
+    bpl = after.bytesPerLine()
+    if before.bytesPerLine() != bpl:
+        return full
+    a, b = _image_bytes(before), _image_bytes(after)
+    if a == b:
+        return QRect()
+
+    # 上边界：前 k 行完全相同的最大 k
+    lo, hi = 0, height
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid * bpl] == b[:mid * bpl]:
+            lo = mid
+        else:
+            hi = mid - 1
+    top = lo
+    # 下边界：后 k 行完全相同的最大 k
+    size = height * bpl
+    lo, hi = 0, height - top
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[size - mid * bpl:] == b[size - mid * bpl:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    bottom = height - lo  # 不含
+
+    row_bytes = width * 4
+    left, right = width, 0  # right 不含
+    for row in range(top, bottom):
+        start = row * bpl
+        ra, rb = a[start:start + row_bytes], b[start:start + row_bytes]
+        if left > 0 and ra[:left * 4] != rb[:left * 4]:
+            # 前 k 个像素相同的最大 k（< left）
+            lo, hi = 0, left - 1
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if ra[:mid * 4] == rb[:mid * 4]:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            left = lo
+        if right < width and ra[right * 4:] != rb[right * 4:]:
+            # 从 right 起之后全部相同的最小起点（> right）
+            lo, hi = right + 1, width
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if ra[mid * 4:] == rb[mid * 4:]:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            right = lo
+        if left == 0 and right == width:
+            break
+    return QRect(left, top, right - left, bottom - top)
+
+
+def frame_dirty_rect(decoded, index):
+    """DecodedGif 第 index 帧相对上一帧（第 0 帧相对最后一帧）的变化区域，算一次后缓存在 decoded 上"""
+    if decoded.dirty_rects is None:
+        decoded.dirty_rects = [None] * len(decoded.frames)
+    rect = decoded.dirty_rects[index]
+    if rect is None:
+        rect = changed_rect(decoded.frames[index - 1], decoded.frames[index])
+        decoded.dirty_rects[index] = rect
+    return rect
+
+
+def dirty_between(decoded, start, end):
+    """从第 start 帧向前播放到第 end 帧时所有变化区域的并集，跳过的帧太多时返回 None（整帧重绘）"""
+    count = len(decoded.frames)
+    steps = (end - start) % count
+    if steps > max(1, int(count * MAX_UNION_FRACTION)):
+        return None
+    rect = QRect()
+    for i in range(1, steps + 1):
+        rect = rect.united(frame_dirty_rect(decoded, (start + i) % count))
+    return rect
+
+
+def map_to_widget(rect, frame_w, frame_h, target, flipped):
+    """把帧坐标中的矩形按绘制时的缩放、居中和水平翻转映射到窗口坐标（向外取整并留出平滑缩放的余量）"""
+    sx = target.width() / frame_w
+    sy = target.height() / frame_h
+    x = frame_w - rect.x() - rect.width() if flipped else rect.x()
+    margin = int(math.ceil(max(sx, sy))) + 1
+    left = int(math.floor(target.x() + x * sx)) - margin
+    top = int(math.floor(target.y() + rect.y() * sy)) - margin
+    right = int(math.ceil(target.x() + (x + rect.width()) * sx)) + margin
+    bottom = int(math.ceil(target.y() + (rect.y() + rect.height()) * sy)) + margin
+    return QRect(left, top, right - left, bottom - top)
+
+
+class DirtyTracker:
+    """跟踪一个动画上次显示的帧，算出新帧相对它的变化区域（帧坐标）
+
+    预解码的动画使用缓存在 DecodedGif 上的逐帧变化区域；QMovie 边播边解码，与上一帧图像比较，
+    结果按帧号缓存（QMovie 按顺序循环播放，同一帧号的前一帧总是相同的）。
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._movie = None
+        self._frame = None
+        self._image = None
+        self._movie_rects = {}
+
+    def frame_changed(self, movie, frame_number):
+        """返回新帧的变化区域，需要整帧重绘时返回 None"""
+        if movie is not self._movie:
+            self.reset()
+            self._movie = movie
+        previous, self._frame = self._frame, frame_number
+        decoded = getattr(movie, 'decoded', None)
+        if decoded is not None:
+            if previous is None or not 0 <= frame_number < len(decoded.frames):
+                return None
+            return dirty_between(decoded, previous, frame_number)
+        image, self._image = self._image, movie.currentImage()
+        if previous is None or image is None:
+            return None
+        if frame_number != previous + 1 and frame_number != 0:
+            return None
+        key = (previous, frame_number)
+        rect = self._movie_rects.get(key)
+        if rect is None:
+            rect = changed_rect(image, self._image)
+            self._movie_rects[key] = rect
+        return rect
@@ -0,0 +1,204 @@
+import os
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from gif_optimize import OPTIMIZED_DIRNAME
+from library_index import LibraryIndex
+
+FIRST_BATCH = 1  # 找到第一个就立刻回传，尽快开始播放
+MAX_BATCH = 8192
+UNCHANGED = -1  # scan_finished 的 total 取此值表示文件夹自上次索引后没有变化
+
+
+class FolderScanner(QThread):
+    """在工作线程中用 os.scandir 扫描文件夹中的 GIF，分批回传结果
+
+    batch_found(generation, paths) 按批次发出（批次逐渐增大，减少主线程合并次数），
+    scan_finished(generation, total) 在扫描结束或被取消时发出。
+    指定 index_path 时扫描结果会写入持久化索引；指定 known_mtime 时为重新校验模式：
+    文件夹 mtime 未变则直接以 UNCHANGED 结束，否则扫描完成后通过 listing_changed 一次性回传完整列表。
+    refresh=True 时（文件夹监视触发）不比较 mtime，只列出文件名并与索引（没有索引时与 known_paths）比较，
+    只为新增的文件取 stat、增量更新索引，通过 listing_diff(generation, 新增路径, 删除路径) 回传（均已排序），
+    没有变化时以 UNCHANGED 结束。
+    recursive=True 时递归扫描整个目录树（不使用索引），通过 tree_batch(generation, [(目录, 有序文件名), ...]) 回传。
+    """
+
+    batch_found = pyqtSignal(int, list)
+    tree_batch = pyqtSignal(int, list)
+    listing_changed = pyqtSignal(int, list)
+    listing_diff = pyqtSignal(int, list, list)
+    scan_finished = pyqtSignal(int, int)
+
+    def __init__(self, folder, generation, index_path=None, known_mtime=None, refresh=False, recursive=False,
+                 known_paths=None, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.generation = generation
+        self.index_path = index_path
+        self.known_mtime = known_mtime
+        self.refresh = refresh
+        self.recursive = recursive
+        self.known_paths = known_paths
+
+    def run(self):
+        if self.recursive:
+            self._scan_tree()
+            return
+        try:
+            folder_mtime = os.stat(self.folder).st_mtime
+        except OSError as e:
+            print(f"DEBUG: Failed to stat {self.folder}: {e}")
+            self.scan_finished.emit(self.generation, 0)
+            return
+        if self.known_mtime is not None and folder_mtime == self.known_mtime:
+            self.scan_finished.emit(self.generation, UNCHANGED)
+            return
+        if self.refresh:
+            self._scan_changes(folder_mtime)
+            return
+
+        revalidating = self.known_mtime is not None
+        entries = []  # (路径, 大小, mtime)，写入索引用
+        batch, batch_size, total = [], FIRST_BATCH, 0
+        completed = False
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if self.isInterruptionRequested():
+                        return
+                    if not entry.name.lower().endswith('.gif'):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        if self.index_path:
+                            st = entry.stat()
+                            entries.append((entry.path, st.st_size, st.st_mtime))
+                    except OSError:
+                        continue
+                    total += 1
+                    batch.append(entry.path)
+                    if not revalidating and len(batch) >= batch_size:
+                        self.batch_found.emit(self.generation, batch)
+                        batch = []
+                        batch_size = min(MAX_BATCH, max(256, batch_size * 2))
+            completed = True
+        except OSError as e:
+            print(f"DEBUG: Failed to scan {self.folder}: {e}")
+        finally:
+            if not self.isInterruptionRequested():
+                if revalidating:
+                    if completed:
+                        self.listing_changed.emit(self.generation, batch)
+                elif batch:
+                    self.batch_found.emit(self.generation, batch)
+                if completed and self.index_path:
+                    self._save_index(folder_mtime, entries)
+            self.scan_finished.emit(self.generation, total)
+
+    def _scan_changes(self, folder_mtime):
+        """文件夹监视触发的增量扫描：不为已知的文件取 stat，也不重写整个文件夹的索引"""
+        index = None
+        known = self.known_paths or ()
+        if self.index_path:
+            try:
+                index = LibraryIndex(self.index_path)
+                cached = index.load_folder(self.folder)
+                if cached is not None:
+                    known = cached[1]
+            except Exception as e:
+                print(f"DEBUG: Failed to read library index: {e}")
+        try:
+            current = set()
+            try:
+                with os.scandir(self.folder) as it:
+                    for entry in it:
+                        if self.isInterruptionRequested():
+                            self.scan_finished.emit(self.generation, UNCHANGED)
+                            return
+                        try:
+                            if entry.name.lower().endswith('.gif') and entry.is_file():
+                                current.add(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"DEBUG: Failed to scan {self.folder}: {e}")
+                self.scan_finished.emit(self.generation, UNCHANGED)
+                return
+            known = set(known)
+            added = sorted(current - known)
+            removed = sorted(known - current)
+            if not added and not removed:
+                self.scan_finished.emit(self.generation, UNCHANGED)
+                return
+            entries = []
+            for path in added:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # 刚出现又被删除
+                entries.append((path, st.st_size, st.st_mtime))
+            added = [path for path, _, _ in entries]
+            if index is not None:
+                try:
+                    index.update_folder(self.folder, folder_mtime, entries, removed)
+                except Exception as e:
+                    print(f"DEBUG: Failed to update library index: {e}")
+            if not self.isInterruptionRequested():
+                self.listing_diff.emit(self.generation, added, removed)
+            self.scan_finished.emit(self.generation, len(current))
+        finally:
+            if index is not None:
+                index.close()
+
+    def _scan_tree(self):
+        """深度优先递归扫描，子目录和文件名各自排序，每个目录的GIF作为一组、分批回传"""
+        stack = [self.folder]
+        batch, batch_count, batch_size, total = [], 0, FIRST_BATCH, 0
+        try:
+            while stack:
+                if self.isInterruptionRequested():
+                    return
+                directory = stack.pop()
+                names, subdirs = [], []
+                try:
+                    with os.scandir(directory) as it:
+                        for entry in it:
+                            try:
+                                # 不跟随符号链接目录，避免循环
+                                if entry.is_dir(follow_symlinks=False):
+                                    if entry.name != OPTIMIZED_DIRNAME:  # gif_optimize 的并排缓存
+                                        subdirs.append(entry.name)
+                                elif entry.name.lower().endswith('.gif') and entry.is_file():
+                                    names.append(entry.name)
+                            except OSError:
+                                continue
+                except OSError as e:
+                    print(f"DEBUG: Failed to scan {directory}: {e}")
+                    continue
+                subdirs.sort(reverse=True)
+                stack.extend(os.path.join(directory, name) for name in subdirs)
+                if not names:
+                    continue
+                names.sort()
+                batch.append((directory, names))
+                batch_count += len(names)
+                total += len(names)
+                if batch_count >= batch_size:
+                    self.tree_batch.emit(self.generation, batch)
+                    batch, batch_count = [], 0
+                    batch_size = min(MAX_BATCH, max(256, batch_size * 2))
+        finally:
+            if not self.isInterruptionRequested() and batch:
+                self.tree_batch.emit(self.generation, batch)
+            self.scan_finished.emit(self.generation, total)
+
+    def _save_index(self, folder_mtime, entries):
+        try:
+            index = LibraryIndex(self.index_path)
+            try:
+                index.save_folder(self.folder, folder_mtime, entries)
+            finally:
+                index.close()
+        except Exception as e:
+            print(f"DEBUG: Failed to update library index: {e}")
@@ -0,0 +1,62 @@
+import os
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+
+class FolderWatcher(QObject):
+    """监视当前GIF文件夹的变化，合并短时间内的多次事件（防抖）后再通知
+
+    folder_changed(folder) 表示文件夹内容有变化，folder_removed(folder) 表示文件夹已不存在。
+    """
+
+    folder_changed = pyqtSignal(str)
+    folder_removed = pyqtSignal(str)
+
+    def __init__(self, debounce_ms=500, parent=None):
+        super().__init__(parent)
+        self._folder = None
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self._emit_change)
+
+    @property
+    def folder(self):
+        return self._folder
+
+    def watch(self, folder):
+        """开始监视 folder（同时只监视一个文件夹）"""
+        if folder == self._folder:
+            return
+        self.unwatch()
+        if self._watcher.addPath(folder):
+            self._folder = folder
+        else:
+            print(f"DEBUG: Failed to watch folder {folder}")
+
+    def unwatch(self):
+        self._debounce.stop()
+        if self._folder is not None:
+            self._watcher.removePath(self._folder)
+            self._folder = None
+
+    def retrigger(self):
+        """稍后再检查一次（例如正在扫描时收到了变化）"""
+        if self._folder is not None:
+            self._debounce.start()
+
+    def _on_directory_changed(self, path):
+        if path == self._folder:
+            self._debounce.start()
+
+    def _emit_change(self):
+        folder = self._folder
+        if folder is None:
+            return
+        if not os.path.isdir(folder):
+            self.unwatch()
+            self.folder_removed.emit(folder)
+        else:
+            self.folder_changed.emit(folder)
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QPixmap, QRegion, QTransform
+
+MASK_CELL = 8  # 点击区域的网格大小（逻辑像素），变化区域向外取整到整格
+MASK_ALPHA_THRESHOLD = 16  # alpha 不低于此值的像素算作可点击（窗口遮罩同时裁剪绘制，阈值过高会切掉半透明边缘）
+
+
+def render_frame(frame, width, height, flipped=False, dpr=1.0, transform_mode=Qt.SmoothTransformation):
+    """把一帧（QImage 或 QPixmap）缩放到目标大小并按需水平翻转，返回可直接绘制的预乘 QPixmap"""
+    image = frame.toImage() if isinstance(frame, QPixmap) else frame
+    if image.format() != QImage.Format_ARGB32_Premultiplied:
+        image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    # 按设备像素比缩放，保证高分屏下清晰
+    px_w = max(1, int(round(width * dpr)))
+    px_h = max(1, int(round(height * dpr)))
+    if (image.width(), image.height()) != (px_w, px_h):
+        image = image.scaled(px_w, px_h, Qt.IgnoreAspectRatio, transform_mode)
+    if flipped:
+        image = image.transformed(QTransform().scale(-1, 1))
+    pixmap = QPixmap.fromImage(image)
+    pixmap.setDevicePixelRatio(dpr)
+    return pixmap
+
+
+def fit_rect(frame_w, frame_h, widget_w, widget_h):
+    """保持比例把帧缩放到窗口内并居中，返回绘制区域"""
+    scale = min(widget_w / frame_w, widget_h / frame_h)
+    new_w = int(frame_w * scale)
+    new_h = int(frame_h * scale)
+    return QRect((widget_w - new_w) // 2, (widget_h - new_h) // 2, new_w, new_h)
+
+
+def _opaque_runs(row, cell):
+    """一行 0/1 字节中为 1 的区间，端点向外取整到 cell 的整数倍，间隔不足一格的区间合并"""
+    runs = []
+    start = row.find(1)
+    while start >= 0:
+        end = row.find(0, start)
+        if end < 0:
+            end = len(row)
+        left = start // cell * cell
+        right = min(len(row), -(-end // cell) * cell)
+        if runs and left <= runs[-1][1]:
+            runs[-1][1] = right
+        else:
+            runs.append([left, right])
+        start = row.find(1, right)
+    return runs
+
+
+def alpha_mask_region(frame, cell=MASK_CELL, threshold=MASK_ALPHA_THRESHOLD, dpr=1.0):
+    """按 alpha 计算帧的可点击区域（逻辑像素坐标，原点为帧左上角），化简为按网格对齐的少量矩形
+
+    alpha 阈值化（bytes.translate）和按行带合并（大整数按位或）都在 C 里整行完成；
+    同一行带内只要有一个像素不透明，它所在的整格就算可点击，上下相同的行带合并为一个矩形。
+    """
+    image = frame.toImage() if isinstance(frame, QPixmap) else frame
+    alpha = image.convertToFormat(QImage.Format_Alpha8)
+    width, height = alpha.width(), alpha.height()
+    bpl = alpha.bytesPerLine()
+    data = alpha.constBits().asstring(alpha.sizeInBytes())
+    table = bytes(0 if a < threshold else 1 for a in range(256))
+    band = max(1, int(round(cell * dpr)))  # 网格按设备像素计
+    rects = []  # [left, top, right, bottom]，设备像素
+    previous_runs, open_rects = None, []
+    for top in range(0, height, band):
+        bottom = min(height, top + band)
+        bits = 0
+        for y in range(top, bottom):
+            bits |= int.from_bytes(data[y * bpl:y * bpl + width].translate(table), 'big')
+        runs = _opaque_runs(bits.to_bytes(width, 'big'), band)
+        if runs == previous_runs:
+            for rect in open_rects:
+                rect[3] = bottom  # 与上一行带相同，向下延长
+            continue
+        open_rects = [[left, top, right, bottom] for left, right in runs]
+        rects.extend(open_rects)
+        previous_runs = runs
+    region = QRegion()
+    for left, top, right, bottom in rects:
+        x0, y0 = int(left / dpr), int(top / dpr)
+        x1, y1 = -int(-right // dpr), -int(-bottom // dpr)
+        region = region.united(QRect(x0, y0, x1 - x0, y1 - y0))
+    return region
+
+
+class FrameCache:
+    """按 LRU 字节预算缓存已缩放/翻转、可直接绘制的帧
+
+    键为 (gif路径, 帧号, 目标尺寸, 翻转状态, 设备像素比, 缩放方式)，GIF 播放一轮后绘制只剩贴图；
+    自适应画质在平滑/快速缩放之间切换后不会继续使用另一种方式缩放的帧。
+    点击穿透用的 alpha 遮罩与对应的帧存在同一条目中，随帧一起淘汰。
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> [pixmap, nbytes, mask]
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(gif_path, frame_number, width, height, flipped, dpr, transform_mode=Qt.SmoothTransformation):
+        return (gif_path, frame_number, width, height, bool(flipped), float(dpr), int(transform_mode))
+
+    def get(self, key):
+        """命中时返回缓存的 QPixmap 并移到最近使用，未命中返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def get_mask(self, key):
+        """已缓存帧的 alpha 遮罩（QRegion），帧未缓存或尚未计算遮罩时返回 None"""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[2]
+
+    def put_mask(self, key, mask):
+        """为已缓存的帧记下 alpha 遮罩（帧不在缓存中时不保存）"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[2] = mask
+
+    def put(self, key, pixmap):
+        """放入一帧，超出字节预算时淘汰最久未使用的帧"""
+        nbytes = pixmap.width() * pixmap.height() * 4
+        if nbytes > self.max_bytes:
+            return  # 单帧超出预算，不缓存
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = [pixmap, nbytes, None]
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def clear(self):
+        """清空缓存（窗口尺寸变化时调用）"""
+        self._entries.clear()
+        self._bytes = 0
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,143 @@
+import ctypes
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from PyQt5 import sip
+from PyQt5.QtGui import QImage
+
+from gif_decoder import DecodedGif
+from gif_source import source_stat
+
+CACHE_DIRNAME = 'frame_cache'
+CACHE_SUFFIX = '.frames'
+_MAGIC = b'GIFF'
+_VERSION = 1
+# 魔数, 版本, 保留, 宽, 高, 帧数, 循环次数, 每行字节数
+_HEADER = struct.Struct('<4sHHIIIiI')
+_ALIGN = 64  # 帧数据起始位置按 64 字节对齐
+
+
+def cache_dir_for_config(config_path):
+    """帧缓存目录放在 user_config.json 旁边；没有配置文件时不使用磁盘缓存"""
+    if not config_path:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), CACHE_DIRNAME)
+
+
+class FrameDiskCache:
+    """已解码帧的持久化磁盘缓存：每个 GIF 一个可 mmap 的文件，帧以预乘 ARGB32 原始数据存放
+
+    文件头记录尺寸、帧数和每帧延时，键为 (路径, 大小, mtime, 解码尺寸档位)。读取时直接把映射的
+    页面交给 QImage，不解压也不复制；总大小超出 max_bytes 时按最近使用时间淘汰。可在多个线程中使用。
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _file_for(self, path, max_side):
+        try:
+            st = source_stat(path)  # 压缩包成员随压缩包的大小和 mtime 失效
+        except OSError:
+            return None
+        key = f'{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{max_side}'
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + CACHE_SUFFIX)
+
+    def load(self, path, max_side=None):
+        """命中时返回帧直接映射自缓存文件的 DecodedGif，否则返回 None"""
+        start = time.perf_counter()
+        cache_file = self._file_for(path, max_side)
+        if cache_file is None or not os.path.isfile(cache_file):
+            return None
+        try:
+            with open(cache_file, 'rb') as f:
+                # ACCESS_COPY 为私有映射：只读使用时与页缓存共享，且可取得内存地址交给 QImage
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            magic, version, _, width, height, count, loop_count, bpl = _HEADER.unpack_from(mapping, 0)
+            if magic != _MAGIC or version != _VERSION:
+                mapping.close()
+                return None
+            delays = list(struct.unpack_from(f'<{count}I', mapping, _HEADER.size))
+            offset = self._frames_offset(count)
+            frame_bytes = bpl * height
+            if offset + frame_bytes * count > len(mapping):
+                mapping.close()
+                return None
+            base = ctypes.addressof(ctypes.c_char.from_buffer(mapping))
+            frames = [QImage(sip.voidptr(base + offset + i * frame_bytes), width, height, bpl,
+                             QImage.Format_ARGB32_Premultiplied) for i in range(count)]
+            os.utime(cache_file)  # 记录最近使用时间，供 LRU 淘汰
+        except (OSError, ValueError, struct.error) as e:
+            print(f"DEBUG: Failed to load frame cache for {path}: {e}")
+            return None
+        decoded = DecodedGif(path, frames, delays, loop_count, max_side)
+        decoded.mapping = mapping
+        decoded.decode_ms = (time.perf_counter() - start) * 1000.0
+        return decoded
+
+    def store(self, decoded):
+        """把解码结果写入缓存（先写临时文件再原子替换），写入后按总大小淘汰旧文件"""
+        frames = decoded.frames
+        if not frames or decoded.mapping is not None:
+            return
+        width, height = frames[0].width(), frames[0].height()
+        if any(frame.width() != width or frame.height() != height for frame in frames):
+            return
+        cache_file = self._file_for(decoded.path, decoded.max_side)
+        if cache_file is None:
+            return
+        bpl = frames[0].bytesPerLine()
+        count = len(frames)
+        tmp_file = f'{cache_file}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, 0, width, height, count, decoded.loop_count, bpl))
+                f.write(struct.pack(f'<{count}I', *decoded.delays))
+                f.write(b'\0' * (self._frames_offset(count) - f.tell()))
+                for frame in frames:
+                    if frame.format() != QImage.Format_ARGB32_Premultiplied:
+                        frame = frame.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+                    f.write(frame.constBits().asstring(bpl * height))
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"DEBUG: Failed to store frame cache for {decoded.path}: {e}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self):
+        """总大小超出上限时删除最久未使用的缓存文件"""
+        with self._lock:
+            entries = []
+            try:
+                with os.scandir(self.cache_dir) as it:
+                    for entry in it:
+                        if entry.name.endswith(CACHE_SUFFIX):
+                            st = entry.stat()
+                            entries.append((st.st_mtime, st.st_size, entry.path))
+            except OSError:
+                return
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass  # Windows 下仍被映射的文件无法删除，下次再试
+
+    @staticmethod
+    def _frames_offset(count):
+        header = _HEADER.size + 4 * count
+        return (header + _ALIGN - 1) // _ALIGN * _ALIGN
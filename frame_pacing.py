@@ -0,0 +1,131 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+# 自适应模式下逐级降低的帧率上限（0 表示不限制）
+ADAPTIVE_LEVELS = (0, 30, 20, 15, 10)
+# 从第几级开始改用快速缩放
+FAST_SCALING_LEVEL = 2
+
+PROBE_INTERVAL = 100  # 事件循环延迟探测间隔（毫秒）
+EVALUATE_EVERY = 10  # 每多少次探测评估一次负载
+LAG_HIGH_MS = 25.0
+LAG_LOW_MS = 5.0
+PAINT_HIGH_MS = 8.0
+PAINT_LOW_MS = 3.0
+CALM_WINDOWS_TO_RECOVER = 5
+
+
+class FramePacer(QObject):
+    """帧率限制与自适应画质
+
+    max_fps 限制每秒重绘次数，过短的帧合并为一次重绘；adaptive 模式下测量事件循环延迟和
+    绘制耗时，机器繁忙时逐级降低帧率并从平滑缩放切换为快速缩放，空闲后再逐级恢复。
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, max_fps=0, adaptive=False, parent=None):
+        super().__init__(parent)
+        self.max_fps = max_fps
+        self.adaptive = adaptive
+        self.level = 0
+        self.merged_frames = 0
+        self._last_paint = 0.0
+        self._lags = []
+        self._paint_costs = []
+        self._calm_windows = 0
+        self._probe_expected = 0.0
+        self._probe = QTimer(self)
+        self._probe.setTimerType(Qt.PreciseTimer)
+        self._probe.timeout.connect(self._on_probe)
+        self._update_probe()
+
+    def configure(self, max_fps, adaptive):
+        self.max_fps = max_fps
+        self.adaptive = adaptive
+        self.level = 0
+        self._calm_windows = 0
+        self._update_probe()
+        self.changed.emit()
+
+    @property
+    def effective_fps(self):
+        """当前生效的帧率上限，0 表示不限制"""
+        limits = [fps for fps in (self.max_fps, ADAPTIVE_LEVELS[self.level] if self.adaptive else 0) if fps]
+        return min(limits) if limits else 0
+
+    @property
+    def min_interval_ms(self):
+        fps = self.effective_fps
+        return 1000.0 / fps if fps else 0.0
+
+    @property
+    def transform_mode(self):
+        if self.adaptive and self.level >= FAST_SCALING_LEVEL:
+            return Qt.FastTransformation
+        return Qt.SmoothTransformation
+
+    def describe(self):
+        """用于菜单显示的当前模式"""
+        fps = self.effective_fps
+        fps_text = f'{fps} FPS' if fps else '不限制'
+        if not self.adaptive:
+            return fps_text
+        quality = '快速缩放' if self.transform_mode == Qt.FastTransformation else '平滑缩放'
+        return f'自适应：{fps_text}，{quality}'
+
+    def allow_paint(self):
+        """距上次重绘已超过最小间隔则允许重绘，否则计为一次合并帧"""
+        now = time.perf_counter()
+        interval = self.min_interval_ms / 1000.0
+        if now - self._last_paint >= interval:
+            self._last_paint = now
+            return True
+        self.merged_frames += 1
+        return False
+
+    def remaining_ms(self):
+        """距下一次允许重绘还需等待的毫秒数"""
+        elapsed = (time.perf_counter() - self._last_paint) * 1000.0
+        return max(0, int(self.min_interval_ms - elapsed) + 1)
+
+    def record_paint(self, cost_ms):
+        if self.adaptive:
+            self._paint_costs.append(cost_ms)
+
+    def _update_probe(self):
+        if self.adaptive:
+            self._probe_expected = time.perf_counter() + PROBE_INTERVAL / 1000.0
+            self._probe.start(PROBE_INTERVAL)
+        else:
+            self._probe.stop()
+            self._lags.clear()
+            self._paint_costs.clear()
+
+    def _on_probe(self):
+        now = time.perf_counter()
+        self._lags.append(max(0.0, (now - self._probe_expected) * 1000.0))
+        self._probe_expected = now + PROBE_INTERVAL / 1000.0
+        if len(self._lags) >= EVALUATE_EVERY:
+            self._evaluate()
+
+    def _evaluate(self):
+        lag = sum(self._lags) / len(self._lags)
+        paint = sum(self._paint_costs) / len(self._paint_costs) if self._paint_costs else 0.0
+        self._lags.clear()
+        self._paint_costs.clear()
+        level = self.level
+        if lag > LAG_HIGH_MS or paint > PAINT_HIGH_MS:
+            self._calm_windows = 0
+            level = min(level + 1, len(ADAPTIVE_LEVELS) - 1)
+        elif lag < LAG_LOW_MS and paint < PAINT_LOW_MS:
+            self._calm_windows += 1
+            if self._calm_windows >= CALM_WINDOWS_TO_RECOVER:
+                self._calm_windows = 0
+                level = max(level - 1, 0)
+        else:
+            self._calm_windows = 0
+        if level != self.level:
+            self.level = level
+            self.changed.emit()
@@ -0,0 +1,344 @@
+import math
+import time
+from collections import deque
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QMovie
+
+GRID_MS = 10  # 截止时间对齐的网格（GIF 帧延时以 10ms 为单位，对齐后各动画的帧落在同一批唤醒上）
+DEFAULT_SLACK_MS = 2  # 截止时间在此范围内的帧提前到同一次唤醒中处理
+MAX_LAG_MS = 100  # 唤醒迟到超过此值时不再追赶，下一帧从当前时间重新计时
+SLACK_SAMPLES = 240  # 用于统计计时器误差的最近唤醒次数
+
+
+def _now_ms():
+    return time.monotonic() * 1000.0
+
+
+class FrameScheduler(QObject):
+    """所有动画共用的主时钟：只用一个粗精度单次计时器，在最早的截止时间唤醒一次，
+    处理所有已到期（或在各自容差内即将到期）的帧和计时器
+
+    截止时间对齐到 GRID_MS 网格，并从上一个截止时间（而不是回调被执行的时刻）接着计算，
+    多个窗口、多个动画的帧自然落在同一次唤醒中，提前或推迟处理的误差也不会累积。
+    wakeups_per_second() 与 stats() 报告实际的唤醒频率和计时器误差（实际唤醒与预定时间相差多少）。
+    只能在 GUI 线程中使用。
+    """
+
+    def __init__(self, slack_ms=DEFAULT_SLACK_MS, window_seconds=5.0, parent=None):
+        super().__init__(parent)
+        self.slack_ms = slack_ms
+        self._window_seconds = window_seconds
+        self._epoch = _now_ms()
+        self._entries = {}  # client -> [截止时间, 容差, 回调]
+        self._armed_at = None  # 计时器预定的唤醒时间
+        self._firing = None  # 正在执行回调的 (client, 截止时间)
+        self._ticking = False  # 唤醒处理中，回调里的安排在处理结束后统一重新定时
+        self._wakeups = deque()  # (唤醒时间, 处理的回调数)
+        self._slacks = deque(maxlen=SLACK_SAMPLES)  # 每次唤醒与预定时间相差的毫秒数
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.CoarseTimer)
+        self._timer.timeout.connect(self._tick)
+
+    def schedule(self, client, delay_ms, callback, slack_ms=None):
+        """在 delay_ms 后调用 callback()，替换 client 之前安排的回调
+
+        在 client 自己的回调中再次安排时从本次的截止时间起算。slack_ms 为可提前处理的容差（默认 self.slack_ms）。
+        """
+        now = _now_ms()
+        base = now
+        firing = self._firing
+        if firing is not None and firing[0] is client and now - firing[1] <= MAX_LAG_MS:
+            base = firing[1]
+        self._entries[client] = [self._align(base + delay_ms), self.slack_ms if slack_ms is None else slack_ms,
+                                 callback]
+        self._arm()
+
+    def cancel(self, client):
+        """取消 client 安排的回调；计时器正是为它定的时则改定到下一个截止时间，没有回调时停止计时器"""
+        entry = self._entries.pop(client, None)
+        if entry is None or entry[0] != self._armed_at:
+            return
+        self._timer.stop()
+        self._armed_at = None
+        self._arm()
+
+    def is_scheduled(self, client):
+        return client in self._entries
+
+    def remaining_ms(self, client):
+        """距 client 的截止时间还有多少毫秒，没有安排时返回 -1"""
+        entry = self._entries.get(client)
+        if entry is None:
+            return -1
+        return max(0, int(math.ceil(entry[0] - _now_ms())))
+
+    def _align(self, t):
+        """向后对齐到网格（浮点误差内已在网格上的不再后移）"""
+        return self._epoch + math.ceil((t - self._epoch) / GRID_MS - 1e-6) * GRID_MS
+
+    def _arm(self):
+        if self._ticking or not self._entries:
+            return
+        target = min(entry[0] for entry in self._entries.values())
+        if self._armed_at is not None and self._armed_at <= target:
+            return  # 已经会在更早的时候唤醒，届时再重新安排
+        self._armed_at = target
+        self._timer.start(max(0, int(math.ceil(target - _now_ms()))))
+
+    def _tick(self):
+        now = _now_ms()
+        horizon = now
+        if self._armed_at is not None:
+            self._slacks.append(abs(now - self._armed_at))
+            # 粗精度计时器可能提前最多 5% 触发，此时照常处理为之定时的帧，不留下一次空唤醒
+            horizon = max(now, self._armed_at)
+        self._armed_at = None
+        due = sorted(((entry[0], client, entry) for client, entry in self._entries.items()
+                      if entry[0] - entry[1] <= horizon), key=lambda item: item[0])
+        self._ticking = True
+        try:
+            handled = self._run_due(due)
+        finally:
+            self._ticking = False
+        self._wakeups.append((now, handled))
+        self._trim(now)
+        self._arm()
+
+    def _run_due(self, due):
+        handled = 0
+        for deadline, client, entry in due:
+            if self._entries.get(client) is not entry:
+                continue  # 已在前面的回调中被取消或重新安排
+            del self._entries[client]
+            if isinstance(client, sip.simplewrapper) and sip.isdeleted(client):
+                continue  # 所属窗口已关闭，动画随之销毁
+            self._firing = (client, deadline)
+            try:
+                entry[2]()
+            finally:
+                self._firing = None
+            handled += 1
+        return handled
+
+    def _trim(self, now):
+        while self._wakeups and now - self._wakeups[0][0] > self._window_seconds * 1000.0:
+            self._wakeups.popleft()
+
+    def _span_seconds(self, now):
+        """统计窗口的实际长度：主时钟创建不足一个窗口时按已运行的时间计"""
+        return max(1e-3, min(self._window_seconds, (now - self._epoch) / 1000.0))
+
+    def wakeups_per_second(self):
+        now = _now_ms()
+        self._trim(now)
+        return len(self._wakeups) / self._span_seconds(now)
+
+    def stats(self):
+        """最近的唤醒频率、每次唤醒处理的回调数和计时器误差（毫秒）"""
+        now = _now_ms()
+        self._trim(now)
+        wakeups = len(self._wakeups)
+        slacks = sorted(self._slacks)
+        return {
+            'wakeups_per_second': wakeups / self._span_seconds(now),
+            'callbacks_per_wakeup': sum(n for _, n in self._wakeups) / wakeups if wakeups else 0.0,
+            'timer_slack_ms_mean': sum(slacks) / len(slacks) if slacks else 0.0,
+            'timer_slack_ms_p95': slacks[min(len(slacks) - 1, int(len(slacks) * 0.95))] if slacks else 0.0,
+            'timer_slack_ms_max': slacks[-1] if slacks else 0.0,
+            'scheduled': len(self._entries),
+        }
+
+
+_master_clock = None
+
+
+def master_clock():
+    """进程内共用的主时钟（第一次使用时在 GUI 线程中创建）"""
+    global _master_clock
+    if _master_clock is None:
+        _master_clock = FrameScheduler()
+    return _master_clock
+
+
+class ScheduledTimer(QObject):
+    """QTimer 的替代（播放器用到的子集），到期时由主时钟在同一次唤醒中与动画帧一起处理
+
+    容差取 slack_ms 与间隔的 5% 中较小的一个（与 Qt 粗精度计时器的规则相同）。
+    """
+
+    timeout = pyqtSignal()
+
+    def __init__(self, parent=None, slack_ms=None, clock=None):
+        super().__init__(parent)
+        self._clock = clock if clock is not None else master_clock()
+        self._slack_ms = slack_ms
+        self._interval = 0
+        self._single_shot = False
+
+    def setSingleShot(self, single_shot):
+        self._single_shot = single_shot
+
+    def isSingleShot(self):
+        return self._single_shot
+
+    def setInterval(self, msec):
+        self._interval = msec
+        if self.isActive():
+            self.start()
+
+    def interval(self):
+        return self._interval
+
+    def start(self, msec=None):
+        if msec is not None:
+            self._interval = msec
+        self._schedule()
+
+    def stop(self):
+        self._clock.cancel(self)
+
+    def isActive(self):
+        return self._clock.is_scheduled(self)
+
+    def remainingTime(self):
+        return self._clock.remaining_ms(self)
+
+    def _schedule(self):
+        slack = None
+        if self._slack_ms is not None:
+            slack = min(self._slack_ms, self._interval // 20)
+        self._clock.schedule(self, self._interval, self._fire, slack)
+
+    def _fire(self):
+        if not self._single_shot:
+            self._schedule()  # 先安排下一次，timeout 的处理中仍可 stop()/start()
+        self.timeout.emit()
+
+
+class ClockedMovie(QMovie):
+    """由主时钟驱动的 QMovie：自身的计时器一直停着，每到帧的截止时间由主时钟前进一帧
+
+    state()/start()/stop()/setPaused() 与 QMovie 一致；只有一帧的静态图不安排唤醒。
+    play_from() 可以从中间某一帧开始的数据片段播放（见 gif_frames.seek_movie），此时 frameChanged 的参数是
+    片段内的帧号，currentFrameNumber()/frameCount() 仍按完整的动画计。
+    """
+
+    def __init__(self, parent=None, clock=None):
+        super().__init__(parent)
+        self._clock = clock if clock is not None else master_clock()
+        self._state = QMovie.NotRunning
+        self._stepped = False
+        self._base = 0  # 正在播放的片段从完整动画的第几帧开始
+        self._full_device = None  # 播放片段时保存完整数据的设备
+        self.frameChanged.connect(self._on_stepped)
+
+    def state(self):
+        return self._state
+
+    def currentFrameNumber(self):
+        return super().currentFrameNumber() + self._base
+
+    def frameCount(self):
+        return super().frameCount() + self._base
+
+    def start(self):
+        if self._state == QMovie.Paused:
+            self.setPaused(False)
+            return
+        if self._state == QMovie.Running:
+            return
+        if self._base:
+            self._restore_full_device()  # 从头播放完整数据，而不是上次定位用的片段
+        super().start()  # 读入并发出首帧
+        if super().state() == QMovie.NotRunning:
+            return  # 无法读取
+        super().setPaused(True)  # 停下 QMovie 自己的计时器，之后由主时钟逐帧推进
+        self._state = QMovie.Running
+        self._schedule()
+
+    def stop(self):
+        self._clock.cancel(self)
+        self._state = QMovie.NotRunning
+        super().stop()
+
+    def setPaused(self, paused):
+        if paused and self._state == QMovie.Running:
+            self._clock.cancel(self)
+            self._state = QMovie.Paused
+        elif not paused and self._state == QMovie.Paused:
+            self._state = QMovie.Running
+            self._schedule()
+
+    def play_from(self, device, base, steps):
+        """改为播放 device（从第 base 帧开始、可独立解码的片段；None 表示完整数据）并向前解码 steps 帧
+
+        片段播完后回到完整数据从第 0 帧继续循环；保持原来的运行/暂停状态，片段无法读取时返回 False。
+        """
+        state = self._state
+        self._clock.cancel(self)
+        super().stop()
+        if self._full_device is None:
+            self._full_device = self.device()
+        previous = self.device()
+        if device is None:
+            device = self._full_device
+            device.seek(0)
+        self.setDevice(device)
+        if previous is not self._full_device and previous is not device:
+            previous.deleteLater()
+        self._base = base if device is not self._full_device else 0
+        super().start()
+        ok = super().state() != QMovie.NotRunning
+        if not ok:
+            self._play_full()
+        else:
+            super().setPaused(True)
+            for _ in range(steps):
+                self.jumpToNextFrame()
+        self._state = QMovie.Paused if state == QMovie.Paused else QMovie.Running
+        if self._state == QMovie.Running:
+            self._schedule()
+        return ok
+
+    def _restore_full_device(self):
+        segment = self.device()
+        super().stop()
+        self._full_device.seek(0)
+        self.setDevice(self._full_device)
+        if segment is not self._full_device:
+            segment.deleteLater()
+        self._base = 0
+
+    def _play_full(self):
+        """片段播完（或无法读取）：回到完整数据的第 0 帧"""
+        self._restore_full_device()
+        super().start()
+        super().setPaused(True)
+
+    def _schedule(self):
+        if self.frameCount() == 1:
+            return
+        self._clock.schedule(self, max(1, self.nextFrameDelay()), self._advance)
+
+    def _on_stepped(self, frame_number):
+        self._stepped = True
+
+    def _advance(self):
+        if self._state != QMovie.Running:
+            return
+        if self._base and super().currentFrameNumber() >= super().frameCount() - 1:
+            self._play_full()
+            self._schedule()
+            return
+        self._stepped = False
+        self.jumpToNextFrame()
+        if not self._stepped:
+            # 循环次数已用完（暂停状态下 QMovie 不会自己结束）
+            self._state = QMovie.NotRunning
+            super().stop()
+            self.finished.emit()
+            return
+        self._schedule()
@@ -0,0 +1,213 @@
+import math
+import time
+
+from PyQt5.QtCore import QObject, QRect, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap, QMovie
+
+from frame_scheduler import master_clock
+from gif_source import buffer_for, read_source
+
+DEFAULT_DELAY = 100  # GIF 未声明帧延时时使用的默认值（毫秒）
+DECODE_SIZE_STEP = 1.25  # 解码尺寸按此比例分档，窗口尺寸跨档时才重新解码
+MIN_DECODE_SIDE = 32
+
+
+def decode_side_for(width, height, dpr=1.0):
+    """根据窗口尺寸（逻辑像素）计算解码时最长边的档位（设备像素，向上取整到档位）"""
+    side = max(MIN_DECODE_SIDE, int(math.ceil(max(width, height) * dpr)))
+    bucket = math.ceil(math.log(side) / math.log(DECODE_SIZE_STEP) - 1e-9)
+    return int(math.ceil(DECODE_SIZE_STEP ** bucket))
+
+
+def decode_covers(have_side, want_side):
+    """按档位 have_side 解码的帧能否用于档位 want_side（None 表示按原尺寸解码）"""
+    if have_side is None:
+        return True
+    return want_side is not None and have_side >= want_side
+
+
+def scaled_decode_size(source_size, max_side):
+    """保持比例把源尺寸缩小到最长边不超过 max_side，源尺寸更小时不放大；无需缩放时返回 None"""
+    if max_side is None or not source_size.isValid():
+        return None
+    w, h = source_size.width(), source_size.height()
+    if max(w, h) <= max_side:
+        return None
+    scale = max_side / max(w, h)
+    return QSize(max(1, round(w * scale)), max(1, round(h * scale)))
+
+
+class DecodedGif:
+    """预先解码好的一个 GIF：所有帧、每帧延时和循环次数"""
+
+    def __init__(self, path, frames, delays, loop_count=-1, max_side=None):
+        self.path = path
+        self.frames = frames
+        self.delays = delays
+        self.loop_count = loop_count
+        self.max_side = max_side  # 解码时的最长边档位，None 表示按原尺寸解码
+        self.mapping = None  # 帧直接映射自磁盘缓存文件时持有该映射，须与帧同生命周期
+        self.decode_ms = None  # 解码（或从磁盘缓存映射）耗时
+        self.dirty_rects = None  # 每帧相对上一帧的变化区域，按需计算（见 dirty_rects.frame_dirty_rect）
+
+    @property
+    def nbytes(self):
+        return sum(frame.sizeInBytes() for frame in self.frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+
+def decode_gif(path, data=None, max_bytes=None, max_side=None):
+    """完整解码一个 GIF，可在工作线程中调用
+
+    data 为已读入内存的文件内容（bytes，为 None 时经 gif_source 的原始字节缓存读取）；解码结果超出 max_bytes 时放弃并返回 None。
+    max_side 不为 None 时每帧在解码时即缩小到最长边不超过 max_side，内存随窗口大小而非源尺寸增长。
+    """
+    start = time.perf_counter()
+    if data is None:
+        data = read_source(path)
+    buffer = buffer_for(data)  # 不复制原始字节
+    reader = QImageReader(buffer, b'gif')
+    scaled_size = scaled_decode_size(reader.size(), max_side)
+    if scaled_size is not None:
+        reader.setScaledSize(scaled_size)
+    frames, delays, total = [], [], 0
+    while reader.canRead():
+        image = reader.read()
+        if image.isNull():
+            break
+        if image.format() != QImage.Format_ARGB32_Premultiplied:
+            image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        total += image.sizeInBytes()
+        if max_bytes is not None and total > max_bytes:
+            return None
+        frames.append(image)
+        delay = reader.nextImageDelay()
+        delays.append(delay if delay > 0 else DEFAULT_DELAY)
+    if not frames:
+        return None
+    decoded = DecodedGif(path, frames, delays, reader.loopCount(), max_side)
+    decoded.decode_ms = (time.perf_counter() - start) * 1000.0
+    return decoded
+
+
+class DecodedMovie(QObject):
+    """播放 DecodedGif 的轻量动画对象，接口与播放器用到的 QMovie 子集保持一致
+
+    不使用自己的计时器：帧的截止时间交给主时钟（frame_scheduler），与其他窗口的动画在同一次唤醒中前进。
+    """
+
+    frameChanged = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    def __init__(self, decoded, parent=None, clock=None):
+        super().__init__(parent)
+        self._decoded = decoded
+        self._frame = 0
+        self._loops_done = 0
+        self._state = QMovie.NotRunning
+        self._pixmap = None  # 当前帧的 QPixmap，按需转换
+        self._min_interval = 0  # 帧率上限对应的最小帧间隔（毫秒），过短的帧会合并
+        self._steps = 1  # 下一次到期时前进的帧数
+        self._clock = clock if clock is not None else master_clock()
+
+    @property
+    def decoded(self):
+        return self._decoded
+
+    def isValid(self):
+        return len(self._decoded) > 0
+
+    def state(self):
+        return self._state
+
+    def frameCount(self):
+        return len(self._decoded)
+
+    def currentFrameNumber(self):
+        return self._frame
+
+    def nextFrameDelay(self):
+        return self._decoded.delays[self._frame]
+
+    def frameRect(self):
+        image = self._decoded.frames[self._frame]
+        return QRect(0, 0, image.width(), image.height())
+
+    def currentImage(self):
+        return self._decoded.frames[self._frame]
+
+    def currentPixmap(self):
+        if self._pixmap is None:
+            self._pixmap = QPixmap.fromImage(self._decoded.frames[self._frame])
+        return self._pixmap
+
+    def setMinFrameInterval(self, ms):
+        """设置最小帧间隔，延时之和不足该间隔的连续帧合并为一帧显示"""
+        self._min_interval = ms
+
+    def _schedule(self):
+        """按当前帧延时向主时钟安排下一帧，必要时把后续过短的帧合并进来；只有一帧时不安排"""
+        delays = self._decoded.delays
+        count = len(delays)
+        if count < 2:
+            return
+        total = delays[self._frame]
+        steps = 1
+        while total < self._min_interval and steps < count:
+            total += delays[(self._frame + steps) % count]
+            steps += 1
+        self._steps = steps
+        self._clock.schedule(self, total, self._advance)
+
+    def start(self):
+        if not self.isValid():
+            return
+        self._frame = 0
+        self._loops_done = 0
+        self._pixmap = None
+        self._state = QMovie.Running
+        self.frameChanged.emit(self._frame)
+        self._schedule()
+
+    def stop(self):
+        self._clock.cancel(self)
+        self._state = QMovie.NotRunning
+
+    def setPaused(self, paused):
+        if paused and self._state == QMovie.Running:
+            self._clock.cancel(self)
+            self._state = QMovie.Paused
+        elif not paused and self._state == QMovie.Paused:
+            self._state = QMovie.Running
+            self._schedule()
+
+    def jumpToFrame(self, frame_number):
+        if not 0 <= frame_number < len(self._decoded):
+            return False
+        self._frame = frame_number
+        self._pixmap = None
+        self.frameChanged.emit(self._frame)
+        return True
+
+    def _advance(self):
+        if self._state != QMovie.Running:
+            return
+        for _ in range(self._steps):
+            next_frame = self._frame + 1
+            if next_frame >= len(self._decoded):
+                self._loops_done += 1
+                loop_count = self._decoded.loop_count
+                # 与 QMovie 一致：-1 无限循环，0 只播放一次，n 额外循环 n 次
+                if loop_count != -1 and self._loops_done > loop_count:
+                    self._state = QMovie.NotRunning
+                    self._pixmap = None
+                    self.frameChanged.emit(self._frame)
+                    self.finished.emit()
+                    return
+                next_frame = 0
+            self._frame = next_frame
+        self._pixmap = None
+        self.frameChanged.emit(self._frame)
+        self._schedule()
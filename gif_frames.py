@@ -0,0 +1,220 @@
+import bisect
+import os
+import struct
+
+from PyQt5.QtGui import QImage, QImageReader
+
+from frame_scheduler import ClockedMovie
+from gif_decoder import scaled_decode_size
+from gif_optimize import playable_path
+from gif_source import buffer_for, read_source, source_stat
+from zip_source import split_member
+
+# 帧的处置方式（Graphic Control Extension 中的 disposal method）
+DISPOSE_NONE = 0
+DISPOSE_KEEP = 1
+DISPOSE_BACKGROUND = 2
+DISPOSE_PREVIOUS = 3
+
+_KEY = 1
+_TRANSPARENT = 2
+_FULL = 4
+
+_HEADER = struct.Struct('<BIIHHi')  # 版本、文件头长度、帧数、宽、高、循环次数
+_FRAME = struct.Struct('<QIBB')  # 偏移、延时（毫秒）、处置方式、标志
+_VERSION = 1
+
+
+class GifFrameIndex:
+    """一个 GIF 的帧索引：每帧数据块的起始偏移、延时、处置方式，以及哪些帧是关键帧
+
+    关键帧之前的画面不影响它及之后各帧的解码结果（画出它之前画布完全透明，如第 0 帧和之前各帧都已按
+    “恢复背景”清除的帧；或覆盖整个画布且不透明的帧），所以可以把文件头接上从关键帧开始的数据，
+    只从关键帧解码到目标帧，不必从第 0 帧开始。
+    """
+
+    def __init__(self, header_end, width, height, loop_count, offsets, delays, disposals, flags):
+        self.header_end = header_end  # 文件头、逻辑屏幕描述符和全局调色板的总长度
+        self.width = width
+        self.height = height
+        self.loop_count = loop_count
+        self.offsets = offsets  # 每帧（含其前面的扩展块）的起始偏移
+        self.delays = delays
+        self.disposals = disposals
+        self.flags = flags
+        self.key_frames = [i for i, f in enumerate(flags) if f & _KEY]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def key_frame_for(self, frame_number):
+        """不晚于 frame_number 的最近关键帧"""
+        return self.key_frames[bisect.bisect_right(self.key_frames, frame_number) - 1]
+
+    def segment(self, data, key):
+        """从关键帧 key 开始的可独立解码的 GIF 数据：文件头加上从该帧起的全部数据块"""
+        if key == 0:
+            return data
+        return bytes(data[:self.header_end]) + data[self.offsets[key]:]
+
+    def to_bytes(self):
+        parts = [_HEADER.pack(_VERSION, self.header_end, len(self), self.width, self.height, self.loop_count)]
+        parts.extend(_FRAME.pack(*frame) for frame in zip(self.offsets, self.delays, self.disposals, self.flags))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        """还原 to_bytes() 的结果，格式不符时返回 None"""
+        if len(blob) < _HEADER.size:
+            return None
+        version, header_end, count, width, height, loop_count = _HEADER.unpack_from(blob)
+        if version != _VERSION or len(blob) != _HEADER.size + count * _FRAME.size:
+            return None
+        frames = list(_FRAME.iter_unpack(memoryview(blob)[_HEADER.size:]))
+        if not frames:
+            return None
+        offsets, delays, disposals, flags = (list(column) for column in zip(*frames))
+        return cls(header_end, width, height, loop_count, offsets, delays, disposals, flags)
+
+
+def _skip_sub_blocks(data, pos):
+    """跳过一串数据子块（以长度为 0 的子块结束），返回其后的位置"""
+    while True:
+        size = data[pos]
+        pos += 1 + size
+        if size == 0:
+            return pos
+
+
+def scan_gif(data):
+    """只遍历数据块结构（不解压图像数据）建立帧索引，格式错误时抛出 ValueError"""
+    if bytes(data[:3]) != b'GIF' or len(data) < 13:
+        raise ValueError('not a GIF file')
+    offsets, delays, disposals, flags = [], [], [], []
+    try:
+        width, height, packed = struct.unpack_from('<HHB', data, 6)
+        pos = 13
+        if packed & 0x80:
+            pos += 3 << ((packed & 0x07) + 1)
+        header_end = pos
+        loop_count = 0  # 没有 NETSCAPE 扩展时只播放一次
+        start = pos
+        delay, disposal, transparent = 0, DISPOSE_NONE, False
+        while True:
+            block = data[pos]
+            if block == 0x3B:  # 文件结束
+                break
+            if block == 0x21:
+                label = data[pos + 1]
+                if label == 0xF9 and data[pos + 2] >= 4:
+                    gce_packed, gce_delay = struct.unpack_from('<BH', data, pos + 3)
+                    disposal = (gce_packed >> 2) & 0x07
+                    transparent = bool(gce_packed & 0x01)
+                    delay = gce_delay * 10
+                elif label == 0xFF and bytes(data[pos + 3:pos + 14]) in (b'NETSCAPE2.0', b'ANIMEXTS1.0'):
+                    sub = pos + 14
+                    if data[sub] >= 3 and data[sub + 1] == 1:
+                        loops = struct.unpack_from('<H', data, sub + 2)[0]
+                        loop_count = -1 if loops == 0 else loops
+                pos = _skip_sub_blocks(data, pos + 2)
+            elif block == 0x2C:
+                left, top, w, h, image_packed = struct.unpack_from('<HHHHB', data, pos + 1)
+                pos += 10
+                if image_packed & 0x80:
+                    pos += 3 << ((image_packed & 0x07) + 1)
+                pos = _skip_sub_blocks(data, pos + 1)  # 先跳过 LZW 最小码长
+                frame_flags = 0
+                if transparent:
+                    frame_flags |= _TRANSPARENT
+                if left == 0 and top == 0 and w >= width and h >= height:
+                    frame_flags |= _FULL
+                offsets.append(start)
+                delays.append(delay)
+                disposals.append(disposal)
+                flags.append(frame_flags)
+                start = pos
+                delay, disposal, transparent = 0, DISPOSE_NONE, False
+            else:
+                break  # 无法识别的数据块，之后的内容解码器同样读不到
+    except (IndexError, struct.error):
+        pass  # 文件被截断：保留已经完整的帧
+    if not offsets:
+        raise ValueError('no frames')
+    empty = True  # 画出第 i 帧之前画布是否完全透明（与从这一帧开始解码时的初始画布相同）
+    for i, frame_flags in enumerate(flags):
+        disposal = disposals[i]
+        if empty or (frame_flags & _FULL and not frame_flags & _TRANSPARENT and disposal != DISPOSE_PREVIOUS):
+            flags[i] |= _KEY
+        if disposal == DISPOSE_BACKGROUND and frame_flags & _TRANSPARENT:
+            empty = empty or bool(frame_flags & _FULL)  # 这一帧的区域被清为透明
+        elif disposal != DISPOSE_PREVIOUS:
+            empty = False  # 恢复为之前的画布时保持不变
+    return GifFrameIndex(header_end, width, height, loop_count, offsets, delays, disposals, flags)
+
+
+def decode_frame(data, index, frame_number, max_side=None):
+    """只从最近的关键帧开始解码，返回第 frame_number 帧（整个画布），失败时返回空 QImage"""
+    if not 0 <= frame_number < len(index):
+        return QImage()
+    key = index.key_frame_for(frame_number)
+    buffer = buffer_for(index.segment(data, key))
+    reader = QImageReader(buffer, b'gif')
+    scaled_size = scaled_decode_size(reader.size(), max_side)
+    if scaled_size is not None:
+        reader.setScaledSize(scaled_size)
+    image = QImage()
+    for _ in range(frame_number - key + 1):
+        image = reader.read()
+        if image.isNull():
+            break
+    return image
+
+
+def _stamp(path):
+    """帧索引对应的文件版本：实际播放的数据（有优化副本时为副本）的大小和 mtime"""
+    st = source_stat(path) if split_member(path) else os.stat(playable_path(path))
+    return st.st_size, st.st_mtime
+
+
+def frame_index_for(path, library_index=None):
+    """取GIF的帧索引：库索引中有且文件未变时直接读取，否则扫描一次并存入库索引；无法读取或解析时返回 None"""
+    try:
+        size, mtime = _stamp(path)
+    except OSError:
+        return None
+    if library_index is not None:
+        try:
+            blob = library_index.load_frame_index(path, size, mtime)
+        except Exception as e:
+            print(f"读取帧索引失败: {e}")
+            blob = None
+        index = GifFrameIndex.from_bytes(blob) if blob is not None else None
+        if index is not None:
+            return index
+    try:
+        index = scan_gif(read_source(path))
+    except (OSError, ValueError) as e:
+        print(f"DEBUG: Cannot index frames of {path}: {e}")
+        return None
+    if library_index is not None:
+        try:
+            library_index.save_frame_index(path, size, mtime, index.to_bytes())
+        except Exception as e:
+            print(f"保存帧索引失败: {e}")
+    return index
+
+
+def seek_movie(movie, path, frame_number, library_index=None):
+    """把动画定位到第 frame_number 帧：预解码的动画直接跳转；QMovie 借助帧索引只从最近的关键帧开始解码"""
+    if not isinstance(movie, ClockedMovie):
+        return movie.jumpToFrame(frame_number)
+    index = frame_index_for(path, library_index)
+    if index is None or not 0 <= frame_number < len(index):
+        return False
+    key = index.key_frame_for(frame_number)
+    try:
+        device = buffer_for(index.segment(read_source(path), key), movie) if key else None
+    except OSError as e:
+        print(f"DEBUG: Cannot seek {path}: {e}")
+        return False
+    return movie.play_from(device, key, frame_number - key)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Batch GIF optimizer for the player's library.
+
+Walks a library with a process pool and, per GIF: drops duplicate consecutive frames
+(merging their delays), optionally downscales to the player's display size, reduces each
+frame's palette and lets Pillow crop frames to the changed regions. Optimized files are
+written either to a mirrored output tree or to a side-by-side `.optimized/` cache that the
+player picks up automatically. Reports bytes and decode time (measured with the player's
+own decoder) saved per file.
+
+Usage:
+    python gif_optimize.py gif --cache
+    python gif_optimize.py gif --output-dir gif_small --max-side 400 --colors 128 --jobs 4
+"""
+
+import io
+import json
+import os
+import shutil
+import sys
+import time
+
+OPTIMIZED_DIRNAME = '.optimized'  # 并排缓存目录，放在原GIF所在目录下
+DEFAULT_COLORS = 256
+DEFAULT_DELAY = 100  # 与 gif_decoder.DEFAULT_DELAY 一致
+ALPHA_THRESHOLD = 128  # GIF 只有全透明/不透明，alpha 低于此值的像素视为透明
+TIMING_REPEAT = 3
+UNCHANGED_MANIFEST = 'unchanged.json'  # --cache 模式下优化后没有变小的GIF，放在库根目录的并排缓存目录中
+
+
+def optimized_path_for(path):
+    """GIF 在并排缓存中的路径：<所在目录>/.optimized/<文件名>"""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, OPTIMIZED_DIRNAME, name)
+
+
+def playable_path(path):
+    """有不比原文件旧的优化副本时返回副本路径，否则返回原路径（播放器解码前调用）"""
+    candidate = optimized_path_for(path)
+    try:
+        if os.stat(candidate).st_mtime >= os.stat(path).st_mtime:
+            return candidate
+    except OSError:
+        pass
+    return path
+
+
+def find_gifs(root):
+    """递归列出 root 下的 GIF（跳过并排缓存目录），按路径排序"""
+    paths = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if d != OPTIMIZED_DIRNAME)
+        paths.extend(os.path.join(directory, name) for name in sorted(files) if name.lower().endswith('.gif'))
+    return paths
+
+
+def _load_frames(path, max_side):
+    """读取全部帧（合成后的 RGBA）、每帧延时和循环次数，必要时缩小到最长边不超过 max_side"""
+    from PIL import Image, ImageSequence
+    frames, durations = [], []
+    with Image.open(path) as image:
+        loop = image.info.get('loop')
+        size = image.size
+        if max_side and max(size) > max_side:
+            scale = max_side / max(size)
+            size = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+        for frame in ImageSequence.Iterator(image):
+            rgba = frame.convert('RGBA')
+            if rgba.size != size:
+                rgba = rgba.resize(size, Image.LANCZOS)
+            duration = frame.info.get('duration') or DEFAULT_DELAY
+            frames.append(rgba)
+            durations.append(duration)
+    return frames, durations, loop
+
+
+def _drop_duplicates(frames, durations):
+    """合并连续的相同帧，延时累加到保留的那一帧上"""
+    kept, kept_durations, previous = [], [], None
+    for frame, duration in zip(frames, durations):
+        data = frame.tobytes()
+        if data == previous:
+            kept_durations[-1] += duration
+            continue
+        kept.append(frame)
+        kept_durations.append(duration)
+        previous = data
+    return kept, kept_durations
+
+
+def _to_palette(frame, colors, transparent):
+    """把 RGBA 帧量化为调色板图像；透明 GIF 保留最后一个调色板项作为透明色"""
+    from PIL import Image
+    if not transparent:
+        return frame.convert('RGB').quantize(colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    paletted = frame.convert('RGB').quantize(colors - 1, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    palette = paletted.getpalette()[:(colors - 1) * 3]
+    palette += [0, 0, 0] * (colors - len(palette) // 3)
+    paletted.putpalette(palette)
+    mask = frame.getchannel('A').point(lambda a: 255 if a < ALPHA_THRESHOLD else 0)
+    paletted.paste(colors - 1, mask=mask)
+    return paletted
+
+
+def _disposals(frames):
+    """每帧的处置方式：下一帧有像素从不透明变为透明时须恢复为背景(2)，否则保留本帧(1)，下一帧只写变化区域"""
+    from PIL import ImageChops
+    alphas = [frame.getchannel('A').point(lambda a: 255 if a >= ALPHA_THRESHOLD else 0) for frame in frames]
+    disposals = []
+    for current, following in zip(alphas, alphas[1:]):
+        # 本帧不透明、下一帧透明的像素
+        vanished = ImageChops.subtract(current, following)
+        disposals.append(2 if vanished.getbbox() else 1)
+    disposals.append(2 if len(frames) > 1 and alphas[0] != alphas[-1] else 1)
+    return disposals
+
+
+def _decode_ms(path, data, max_side):
+    """用播放器的解码器完整解码一次的耗时（取多次中的最小值）"""
+    from gif_decoder import decode_gif
+    best = None
+    for _ in range(TIMING_REPEAT):
+        decoded = decode_gif(path, data=data, max_side=max_side)
+        if decoded is None:
+            return None
+        best = decoded.decode_ms if best is None else min(best, decoded.decode_ms)
+    return best
+
+
+def optimize_file(src, dst, max_side=None, colors=DEFAULT_COLORS, copy_unchanged=True):
+    """优化一个 GIF 并写到 dst，返回统计字典；可在子进程中调用
+
+    结果不比原文件小时，copy_unchanged 为 True 则 dst 为原文件的副本（镜像目录保持完整），否则不写 dst。
+    """
+    start = time.perf_counter()
+    with open(src, 'rb') as f:
+        src_data = f.read()
+    frames, durations, loop = _load_frames(src, max_side)
+    frame_count = len(frames)
+    frames, durations = _drop_duplicates(frames, durations)
+    transparent = any(frame.getchannel('A').getextrema()[0] < ALPHA_THRESHOLD for frame in frames)
+    paletted = [_to_palette(frame, colors, transparent) for frame in frames]
+
+    options = {'save_all': True, 'append_images': paletted[1:], 'duration': durations, 'optimize': True,
+               'disposal': _disposals(frames) if transparent else 1}
+    if transparent:
+        options['transparency'] = colors - 1
+    if loop is not None:
+        options['loop'] = loop
+    out = io.BytesIO()
+    paletted[0].save(out, format='GIF', **options)
+    out_data = out.getvalue()
+    # 确定要写出结果后才创建目标目录，没有变小的GIF在并排缓存模式下不留下空目录
+    kept = len(out_data) < len(src_data)
+    if kept or copy_unchanged:
+        os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    if kept:
+        tmp_path = f'{dst}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(out_data)
+        os.replace(tmp_path, dst)
+    else:
+        if copy_unchanged:
+            shutil.copy2(src, dst)
+        out_data = src_data
+    decode_before = _decode_ms(src, src_data, max_side)
+    return {
+        'path': src,
+        'output': dst,
+        'optimized': kept,
+        'frames_before': frame_count,
+        'frames_after': len(frames) if kept else frame_count,
+        'bytes_before': len(src_data),
+        'bytes_after': len(out_data),
+        'decode_ms_before': decode_before,
+        'decode_ms_after': _decode_ms(src, out_data, max_side) if kept else decode_before,
+        'elapsed_ms': (time.perf_counter() - start) * 1000.0,
+    }
+
+
+def _output_for(path, root, args):
+    if args.cache:
+        return optimized_path_for(path)
+    return os.path.join(args.output_dir, os.path.relpath(path, root))
+
+
+def _source_key(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _is_fresh(src, dst, unchanged=None):
+    """dst 不比 src 旧，或 src 上次优化后没有变小且之后未被修改（unchanged 中的大小和 mtime 一致）"""
+    try:
+        if unchanged is not None and unchanged.get(src) == _source_key(src):
+            return True
+        return os.stat(dst).st_mtime >= os.stat(src).st_mtime
+    except OSError:
+        return False
+
+
+def _manifest_path(root):
+    return os.path.join(root, OPTIMIZED_DIRNAME, UNCHANGED_MANIFEST)
+
+
+def _load_unchanged(root):
+    """读取没有变小的GIF清单：绝对路径 -> [大小, mtime_ns]"""
+    try:
+        with open(_manifest_path(root), 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {os.path.join(root, rel): key for rel, key in entries.items()}
+
+
+def _save_unchanged(root, unchanged):
+    """写出清单（相对路径为键）；清单为空时删除它，不留下空的缓存目录"""
+    path = _manifest_path(root)
+    if not unchanged:
+        try:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({os.path.relpath(src, root): key for src, key in sorted(unchanged.items())}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _format(result):
+    saved = result['bytes_before'] - result['bytes_after']
+    before, after = result['decode_ms_before'], result['decode_ms_after']
+    decode = f"{before:.1f} -> {after:.1f} ms" if before is not None and after is not None else 'n/a'
+    return (f"{result['path']}: {result['bytes_before']:,} -> {result['bytes_after']:,} bytes "
+            f"({saved / max(1, result['bytes_before']):.0%} saved), frames {result['frames_before']} -> "
+            f"{result['frames_after']}, decode {decode}")
+
+
+def main():
+    # 播放器只用到 playable_path，命令行和进程池相关的模块只在批处理时导入
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    parser = argparse.ArgumentParser(description='Optimize a GIF library for the player')
+    parser.add_argument('library', help='GIF folder to optimize (walked recursively)')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output-dir', help='write optimized copies to a mirrored tree here')
+    target.add_argument('--cache', action='store_true',
+                        help=f'write a side-by-side {OPTIMIZED_DIRNAME}/ cache that the player uses automatically')
+    parser.add_argument('--max-side', type=int, help="downscale so the longest side fits the player's display size")
+    parser.add_argument('--colors', type=int, default=DEFAULT_COLORS, help='palette size per frame (2-256)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--force', action='store_true', help='re-optimize files whose output is up to date')
+    parser.add_argument('--report', help='write per-file results as JSON to this file')
+    args = parser.parse_args()
+    if not 2 <= args.colors <= 256:
+        parser.error('--colors must be between 2 and 256')
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        sys.exit("Pillow is required: pip install Pillow")
+
+    root = os.path.abspath(args.library)
+    paths = find_gifs(root)
+    # 并排缓存模式不复制没有变小的GIF，改为记在清单中，下次只要原文件未修改就跳过
+    unchanged = {}
+    if args.cache:
+        present = set(paths)
+        unchanged = {src: key for src, key in _load_unchanged(root).items() if src in present}
+    todo = []
+    for path in paths:
+        dst = _output_for(path, root, args)
+        if args.force or not _is_fresh(path, dst, unchanged):
+            todo.append((path, dst))
+    print(f"Optimizing {len(todo)} GIF files with {args.jobs} processes")
+
+    results, failures = [], 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(optimize_file, src, dst, args.max_side, args.colors, not args.cache): src for src, dst in todo}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"✗ {futures[future]}: {e}")
+                continue
+            results.append(result)
+            print(_format(result))
+            if args.cache:
+                if result['optimized']:
+                    unchanged.pop(result['path'], None)
+                else:
+                    try:
+                        unchanged[result['path']] = _source_key(result['path'])
+                    except OSError:
+                        unchanged.pop(result['path'], None)
+    if args.cache:
+        _save_unchanged(root, unchanged)
+
+    before = sum(r['bytes_before'] for r in results)
+    after = sum(r['bytes_after'] for r in results)
+    timed = [r for r in results if r['decode_ms_before'] is not None and r['decode_ms_after'] is not None]
+    decode_saved = sum(r['decode_ms_before'] - r['decode_ms_after'] for r in timed)
+    print(f"Total: {before:,} -> {after:,} bytes ({(before - after) / max(1, before):.0%} saved), "
+          f"decode time saved {decode_saved:.1f} ms, {failures} failed")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from gif_decoder import decode_gif
+
+
+class _PrefetchSignals(QObject):
+    """工作线程回传结果用的信号（跨线程自动排队到 GUI 线程）"""
+    done = pyqtSignal(str, object)
+
+
+class _PrefetchTask(QRunnable):
+    """在工作线程中读取并解码一个 GIF"""
+
+    def __init__(self, path, max_bytes, max_side, disk_cache, signals):
+        super().__init__()
+        self._path = path
+        self._max_bytes = max_bytes
+        self._max_side = max_side
+        self._disk_cache = disk_cache
+        self._signals = signals
+
+    def run(self):
+        try:
+            decoded = None
+            if self._disk_cache is not None:
+                decoded = self._disk_cache.load(self._path, self._max_side)
+            if decoded is None:
+                decoded = decode_gif(self._path, max_bytes=self._max_bytes, max_side=self._max_side)
+                if decoded is not None and self._disk_cache is not None:
+                    self._disk_cache.store(decoded)
+        except Exception as e:
+            print(f"DEBUG: Prefetch failed for {self._path}: {e}")
+            decoded = None
+        self._signals.done.emit(self._path, decoded)
+
+
+class GifPrefetcher(QObject):
+    """在后台线程预读、预解码播放列表中当前位置前后的 GIF
+
+    depth 为前后各预取的数量；切换时命中则直接使用已解码的动画，并统计命中率。
+    max_side 为解码尺寸档位（见 gif_decoder.decode_side_for），档位变化时按新尺寸重新预取。
+    指定 disk_cache（FrameDiskCache）时优先从磁盘缓存映射帧，解码后的结果也会写入磁盘缓存。
+    """
+
+    decoded_ready = pyqtSignal(str)
+
+    def __init__(self, depth=1, max_bytes=256 * 1024 * 1024, max_side=None, disk_cache=None, parent=None):
+        super().__init__(parent)
+        self.disk_cache = disk_cache
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.max_side = max_side
+        self._last_window = None  # 最近一次 prefetch_around 的 (gif_list, index)
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}  # path -> DecodedGif
+        self._pending = set()
+        self._wanted = set()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)  # 网络盘上串行读取，避免互相抢带宽
+        self._signals = _PrefetchSignals()
+        self._signals.done.connect(self._on_done)
+
+    def get(self, path):
+        """取已预解码的 GIF，命中返回 DecodedGif，否则返回 None"""
+        decoded = self._cache.get(path)
+        if decoded is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return decoded
+
+    def peek(self, path):
+        """取已预解码的 GIF 但不计入命中率（预取完成后换下边播边解码的动画时使用）"""
+        return self._cache.get(path)
+
+    def prefetch_around(self, gif_list, index):
+        """预取 index 前后 depth 个 GIF，丢弃窗口外的缓存
+
+        也包括当前的GIF：切换时未命中、正用 QMovie 边播边解码时，解码完成后播放器换成这份共享的帧。
+        """
+        if not gif_list:
+            return
+        self._last_window = (gif_list, index)
+        n = len(gif_list)
+        # 按距离由近到远排列：当前、下一个、上一个、下下个……
+        offsets = [0]
+        for d in range(1, self.depth + 1):
+            offsets += [d, -d]
+        wanted = []
+        for offset in offsets:
+            path = gif_list[(index + offset) % n]
+            if path not in wanted:
+                wanted.append(path)
+        self._wanted = set(wanted)
+        for path in list(self._cache):
+            if path not in self._wanted:
+                del self._cache[path]
+        per_gif_budget = self.max_bytes // len(wanted)
+        for path in wanted:
+            if path in self._cache or path in self._pending:
+                continue
+            self._pending.add(path)
+            self._pool.start(_PrefetchTask(path, per_gif_budget, self.max_side, self.disk_cache, self._signals))
+
+    def set_max_side(self, max_side):
+        """解码尺寸档位变化：丢弃旧尺寸的缓存，按新尺寸重新预取"""
+        if max_side == self.max_side:
+            return
+        self.max_side = max_side
+        self._cache.clear()
+        if self._last_window is not None:
+            self.prefetch_around(*self._last_window)
+
+    def _on_done(self, path, decoded):
+        self._pending.discard(path)
+        if decoded is None or path not in self._wanted:
+            return
+        if decoded.max_side != self.max_side:
+            # 解码期间尺寸档位变了，按新尺寸再取一次
+            self._pending.add(path)
+            self._pool.start(_PrefetchTask(path, self.max_bytes // max(1, len(self._wanted)),
+                                           self.max_side, self.disk_cache, self._signals))
+            return
+        self._cache[path] = decoded
+        self.decoded_ready.emit(path)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self._cache.clear()
+        self._wanted = set()
+
+    def shutdown(self):
+        """等待正在进行的预取结束（退出时调用）"""
+        self._pool.clear()
+        self._pool.waitForDone()
@@ -0,0 +1,165 @@
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5 import sip
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
+from PyQt5.QtGui import QImageReader
+
+from frame_scheduler import ClockedMovie
+from gif_optimize import playable_path
+from zip_source import open_archive, split_member
+
+DEFAULT_CACHE_BYTES = 128 * 1024 * 1024
+MAX_CACHED_SOURCES = 256
+
+
+class SourceCache:
+    """GIF原始字节的有界 LRU 缓存：文件整个读入 bytes，压缩包成员为解压后的 bytes
+
+    不映射用户的GIF文件：映射会在 Windows 下锁住文件（无法删除/替换，文件夹监视随之失效），
+    在 POSIX 下文件被截断后访问映射会触发 SIGBUS。命中时不访问文件系统；文件夹内容变化或重新打开GIF库时由调用方 invalidate()。
+    淘汰只是丢掉引用，仍被 QBuffer 使用的缓冲区会保留到不再使用为止。可在多个线程中使用。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, max_entries=MAX_CACHED_SOURCES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """返回GIF的原始字节（bytes），读取失败时抛出 OSError"""
+        with self._lock:
+            data = self._entries.get(path)
+            if data is not None:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = self._load(path)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= len(old)
+            if len(data) <= self.max_bytes:
+                self._entries[path] = data
+                self._bytes += len(data)
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+        return data
+
+    @staticmethod
+    def _load(path):
+        member = split_member(path)
+        if member is not None:
+            import zipfile  # 压缩包成员才需要（open_archive 已导入，这里只取异常类型）
+            try:
+                return open_archive(member[0]).read(member[1])
+            except (KeyError, ValueError, zipfile.BadZipFile) as e:
+                raise OSError(f'cannot read {path}: {e}') from e
+        with open(playable_path(path), 'rb') as f:
+            return f.read()
+
+    def invalidate(self, prefix=None):
+        """丢弃路径以 prefix 开头的条目（为 None 时全部丢弃）"""
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for path in [p for p in self._entries if p.startswith(prefix)]:
+                self._bytes -= len(self._entries.pop(path))
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+source_cache = SourceCache()  # 主窗口、陪伴窗口和预取线程共用
+
+
+def read_source(path):
+    """GIF的原始字节（经 source_cache）：有优化副本时为副本，压缩包成员从压缩包中解压"""
+    return source_cache.get(path)
+
+
+def invalidate_sources(prefix=None):
+    source_cache.invalidate(prefix)
+
+
+def buffer_for(data, parent=None):
+    """把 bytes 包装成只读 QBuffer，不复制数据；QBuffer 存在期间一直引用 data"""
+    array = QByteArray.fromRawData(sip.voidptr(data, len(data)).asarray())
+    buffer = QBuffer(parent)
+    buffer.setData(array)
+    buffer.open(QIODevice.ReadOnly)
+    buffer.source_data = data  # 保证底层内存比 QBuffer 活得久
+    return buffer
+
+
+def _read_or_empty(path):
+    """读取失败（文件被删除、压缩包被修改）时返回空字节，得到无效的动画而不是让播放出错"""
+    try:
+        return read_source(path)
+    except OSError as e:
+        print(f"DEBUG: Cannot read {path}: {e}")
+        return b''
+
+
+def movie_for(path, parent=None):
+    """为GIF创建读取缓存字节、由主时钟驱动的 QMovie（缓冲区归 QMovie 所有），再次播放时不再读盘"""
+    movie = ClockedMovie(parent)
+    movie.setDevice(buffer_for(_read_or_empty(path), movie))
+    movie.setFormat(b'gif')
+    return movie
+
+
+def image_size(path):
+    """GIF的原始尺寸（只解析缓存字节中的文件头），读取失败时为无效尺寸"""
+    buffer = buffer_for(_read_or_empty(path))
+    return QImageReader(buffer, b'gif').size()
+
+
+def read_first_frame(path, scale_to=None):
+    """读取GIF首帧，scale_to(原始尺寸) 返回非 None 时在解码时缩小到该尺寸
+
+    不经过 source_cache：批量生成缩略图时不会挤掉正在播放的GIF的缓存。
+    """
+    member = split_member(path)
+    buffer = None
+    if member is None:
+        reader = QImageReader(playable_path(path))
+    else:
+        buffer = buffer_for(open_archive(member[0]).read(member[1]))
+        reader = QImageReader(buffer, b'gif')
+    size = reader.size()
+    scaled = scale_to(size) if scale_to is not None and size.isValid() else None
+    if scaled is not None:
+        reader.setScaledSize(scaled)
+    return reader.read()
+
+
+def source_stat(path):
+    """GIF来源文件的 os.stat：压缩包成员取压缩包本身的（用作缓存键）"""
+    member = split_member(path)
+    return os.stat(member[0] if member else path)
+
+
+def source_exists(path):
+    """GIF来源是否存在：压缩包成员要求压缩包存在且包含该成员"""
+    member = split_member(path)
+    if member is None:
+        return os.path.isfile(path)
+    import zipfile
+    try:
+        return open_archive(member[0]).contains(member[1])
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return False
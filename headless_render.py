@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Headless render/export mode for the GIF player.
+
+Runs the player's playback pipeline without a window or system tray: builds the playlist
+with the same rules as the player (folder listing, recursive tree, ZIP archive or single
+file, optional shuffle), decodes each GIF at the player's decode size, then scales, flips
+and composes every frame onto a window-sized transparent canvas exactly like the player's
+paintEvent. Frames can be written as a PNG sequence or as a raw ARGB32 (premultiplied)
+stream, or just discarded to measure throughput. Reports frames per second and the time
+spent decoding, composing and writing.
+
+Usage:
+    python headless_render.py gif --size 300x300 --report render.json
+    python headless_render.py stickers.zip --flip --raw frames.argb
+    python headless_render.py gif --config user_config.json --output-dir frames --limit 20
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QGuiApplication, QImage, QPainter
+
+from compact_playlist import CompactPlaylist, ShuffleOrder
+from folder_scanner import FolderScanner
+from frame_cache import FrameCache, fit_rect, render_frame
+from gif_decoder import decode_gif, decode_side_for
+from zip_source import is_archive, list_archive
+
+DEFAULT_SIZE = (200, 200)  # 与播放器的默认窗口大小一致
+
+
+def build_playlist(source, recursive=False):
+    """按播放器的规则建立播放列表：文件夹（可递归）、ZIP 压缩包或单个GIF"""
+    if is_archive(source):
+        return list_archive(source)
+    if os.path.isfile(source):
+        return [source]
+    # 在当前线程直接运行扫描器，与播放器得到完全相同的列表
+    scanner = FolderScanner(source, 0, recursive=recursive)
+    if recursive:
+        playlist = CompactPlaylist()
+        scanner.tree_batch.connect(lambda generation, groups: [playlist.add_directory(d, n) for d, n in groups])
+        scanner.run()
+        return playlist
+    paths = []
+    scanner.batch_found.connect(lambda generation, batch: paths.extend(batch))
+    scanner.run()
+    paths.sort()
+    return paths
+
+
+def play_order(count, shuffle=False, seed=None):
+    """播放顺序的下标：顺序播放或与播放器相同的不重复随机顺序"""
+    if not shuffle:
+        return range(count)
+    order = ShuffleOrder(count, random.Random(seed))
+    return [order.next() for _ in range(count)]
+
+
+class HeadlessRenderer:
+    """无窗口的播放管线：解码、按窗口尺寸缩放/翻转并合成到透明画布上，交给 sink(画布) 输出
+
+    缩放和翻转的结果与播放器一样放入 FrameCache，循环播放的后几轮只剩合成。
+    """
+
+    def __init__(self, width, height, flipped=False, dpr=1.0, transform_mode=Qt.SmoothTransformation,
+                 frame_cache=None):
+        self.width = width
+        self.height = height
+        self.flipped = flipped
+        self.dpr = dpr
+        self.transform_mode = transform_mode
+        self.decode_side = decode_side_for(width, height, dpr)
+        self.frame_cache = frame_cache if frame_cache is not None else FrameCache()
+        self.canvas = QImage(max(1, round(width * dpr)), max(1, round(height * dpr)),
+                             QImage.Format_ARGB32_Premultiplied)
+        self.canvas.setDevicePixelRatio(dpr)
+        self.stats = {'gifs': 0, 'failed': 0, 'frames': 0, 'decode_ms': 0.0, 'compose_ms': 0.0, 'write_ms': 0.0}
+
+    def compose(self, path, frame_number, frame):
+        """把一帧保持比例居中绘制到画布上（与播放器的 paintEvent 相同），返回画布"""
+        target = fit_rect(frame.width(), frame.height(), self.width, self.height)
+        key = FrameCache.make_key(path, frame_number, target.width(), target.height(), self.flipped, self.dpr,
+                                  self.transform_mode)
+        pixmap = self.frame_cache.get(key)
+        if pixmap is None:
+            pixmap = render_frame(frame, target.width(), target.height(), self.flipped, self.dpr,
+                                  self.transform_mode)
+            self.frame_cache.put(key, pixmap)
+        self.canvas.fill(Qt.transparent)
+        painter = QPainter(self.canvas)
+        painter.drawPixmap(target.topLeft(), pixmap)
+        painter.end()
+        return self.canvas
+
+    def render_gif(self, path, sink=None, loops=1):
+        """解码并输出一个GIF的全部帧（播放 loops 轮），读取或解码失败时计入 failed 并返回 False"""
+        start = time.perf_counter()
+        try:
+            decoded = decode_gif(path, max_side=self.decode_side)
+        except OSError as e:
+            print(f"DEBUG: Cannot read {path}: {e}", file=sys.stderr)
+            decoded = None
+        self.stats['decode_ms'] += (time.perf_counter() - start) * 1000.0
+        if decoded is None or not decoded.frames:
+            self.stats['failed'] += 1
+            return False
+        self.stats['gifs'] += 1
+        for _ in range(loops):
+            for frame_number, frame in enumerate(decoded.frames):
+                start = time.perf_counter()
+                canvas = self.compose(path, frame_number, frame)
+                composed = time.perf_counter()
+                if sink is not None:
+                    sink(canvas)
+                self.stats['compose_ms'] += (composed - start) * 1000.0
+                self.stats['write_ms'] += (time.perf_counter() - composed) * 1000.0
+                self.stats['frames'] += 1
+        return True
+
+
+def png_sink(directory):
+    """把每帧写成 directory/frame_000000.png"""
+    os.makedirs(directory, exist_ok=True)
+    counter = [0]
+
+    def write(canvas):
+        canvas.save(os.path.join(directory, f'frame_{counter[0]:06d}.png'), 'PNG')
+        counter[0] += 1
+    return write
+
+
+def raw_sink(stream):
+    """把每帧的预乘 ARGB32 像素（按行紧密排列，不含行尾填充）依次写入 stream"""
+    def write(canvas):
+        row_bytes = canvas.width() * 4
+        data = canvas.constBits().asstring(canvas.sizeInBytes())
+        bpl = canvas.bytesPerLine()
+        if bpl == row_bytes:
+            stream.write(data)
+        else:
+            stream.write(b''.join(data[y * bpl:y * bpl + row_bytes] for y in range(canvas.height())))
+    return write
+
+
+def _parse_size(text):
+    width, _, height = text.lower().partition('x')
+    return int(width), int(height)
+
+
+def _config_defaults(path):
+    """从播放器的 user_config.json 读取窗口大小、翻转、递归和随机播放设置"""
+    with open(path, 'r', encoding='utf-8') as f:
+        cfg = json.load(f)
+    defaults = {}
+    geometry = cfg.get('geometry')
+    if isinstance(geometry, list) and len(geometry) == 4:
+        defaults['size'] = (geometry[2], geometry[3])
+    for key in ('flipped', 'recursive', 'shuffle'):
+        if key in cfg:
+            defaults[key] = bool(cfg[key])
+    if cfg.get('gif_folder'):
+        defaults['source'] = cfg['gif_folder']
+    return defaults
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render a GIF playlist headlessly and report throughput')
+    parser.add_argument('source', nargs='?', help='GIF folder, ZIP archive or GIF file (default: gif_folder from --config)')
+    parser.add_argument('--config', help="take window size, flip, recursive, shuffle and folder from the player's config")
+    parser.add_argument('--size', type=_parse_size, help='window size in logical pixels, e.g. 300x300')
+    parser.add_argument('--dpr', type=float, default=1.0, help='device pixel ratio')
+    parser.add_argument('--flip', action='store_true', default=None, help='mirror horizontally')
+    parser.add_argument('--fast', action='store_true', help='fast (nearest) scaling like adaptive quality mode')
+    parser.add_argument('--recursive', action='store_true', default=None, help='include subfolders')
+    parser.add_argument('--shuffle', action='store_true', default=None, help='shuffled order (no repeats)')
+    parser.add_argument('--seed', type=int, help='random seed for --shuffle')
+    parser.add_argument('--limit', type=int, help='render at most this many GIFs')
+    parser.add_argument('--loops', type=int, default=1, help='play each GIF this many times')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--output-dir', help='write frames as a PNG sequence here')
+    output.add_argument('--raw', help="write frames as raw premultiplied ARGB32 to this file ('-' for stdout)")
+    parser.add_argument('--report', help='write the throughput report as JSON to this file')
+    args = parser.parse_args()
+
+    defaults = _config_defaults(args.config) if args.config else {}
+    source = args.source or defaults.get('source')
+    if not source:
+        parser.error('no source given and no gif_folder in --config')
+    width, height = args.size or defaults.get('size', DEFAULT_SIZE)
+    flipped = args.flip if args.flip is not None else defaults.get('flipped', False)
+    recursive = args.recursive if args.recursive is not None else defaults.get('recursive', False)
+    shuffle = args.shuffle if args.shuffle is not None else defaults.get('shuffle', False)
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)  # QPixmap 需要 GUI 应用对象
+    start = time.perf_counter()
+    playlist = build_playlist(source, recursive)
+    scan_ms = (time.perf_counter() - start) * 1000.0
+    order = list(play_order(len(playlist), shuffle, args.seed))
+    if args.limit is not None:
+        order = order[:args.limit]
+    log = sys.stderr if args.raw == '-' else sys.stdout
+    print(f"Rendering {len(order)} of {len(playlist)} GIF files at {width}x{height}"
+          f"{' (flipped)' if flipped else ''}", file=log)
+
+    renderer = HeadlessRenderer(width, height, flipped, args.dpr,
+                                Qt.FastTransformation if args.fast else Qt.SmoothTransformation)
+    stream = None
+    sink = None
+    if args.output_dir:
+        sink = png_sink(args.output_dir)
+    elif args.raw:
+        stream = sys.stdout.buffer if args.raw == '-' else open(args.raw, 'wb')
+        sink = raw_sink(stream)
+    start = time.perf_counter()
+    try:
+        for index in order:
+            renderer.render_gif(playlist[index], sink, args.loops)
+    finally:
+        if stream is not None and stream is not sys.stdout.buffer:
+            stream.close()
+    elapsed = time.perf_counter() - start
+
+    stats = renderer.stats
+    report = dict(stats, scan_ms=scan_ms, elapsed_ms=elapsed * 1000.0, width=width, height=height, dpr=args.dpr,
+                  flipped=flipped, fps=stats['frames'] / elapsed if elapsed > 0 else 0.0,
+                  frame_cache_hit_rate=renderer.frame_cache.hits / max(1, renderer.frame_cache.hits
+                                                                       + renderer.frame_cache.misses))
+    print(f"{stats['frames']} frames from {stats['gifs']} GIF files in {elapsed:.2f} s: {report['fps']:.1f} fps "
+          f"(decode {stats['decode_ms']:.0f} ms, compose {stats['compose_ms']:.0f} ms, "
+          f"write {stats['write_ms']:.0f} ms, {stats['failed']} failed)", file=log)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+
+INDEX_FILENAME = 'library_index.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    path  TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    path   TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_folder ON entries (folder, path);
+CREATE TABLE IF NOT EXISTS frame_index (
+    path  TEXT PRIMARY KEY,
+    size  INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    data  BLOB NOT NULL
+);
+"""
+
+
+def index_path_for_config(config_path):
+    """索引文件放在 user_config.json 旁边；没有配置文件时不使用索引"""
+    if not config_path:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), INDEX_FILENAME)
+
+
+class LibraryIndex:
+    """GIF 库的持久化索引（SQLite），记录每个文件夹的 mtime 及其中 GIF 的路径、大小和 mtime，
+    以及播放过的 GIF 的帧索引（见 gif_frames.GifFrameIndex）
+
+    每个线程应使用各自的 LibraryIndex 实例（sqlite3 连接不能跨线程共享）。
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, timeout=5)
+        self._conn.executescript(_SCHEMA)
+
+    def load_folder(self, folder):
+        """读取文件夹的索引，返回 (文件夹mtime, 有序路径列表)，未索引时返回 None"""
+        row = self._conn.execute("SELECT mtime FROM folders WHERE path = ?", (folder,)).fetchone()
+        if row is None:
+            return None
+        paths = [p for (p,) in self._conn.execute(
+            "SELECT path FROM entries WHERE folder = ? ORDER BY path", (folder,))]
+        return row[0], paths
+
+    def save_folder(self, folder, mtime, entries):
+        """用新的扫描结果替换文件夹的索引，entries 为 (路径, 大小, mtime) 列表"""
+        with self._conn:
+            self._conn.execute("DELETE FROM entries WHERE folder = ?", (folder,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (path, folder, size, mtime) VALUES (?, ?, ?, ?)",
+                ((path, folder, size, entry_mtime) for path, size, entry_mtime in entries))
+            self._conn.execute("INSERT OR REPLACE INTO folders (path, mtime) VALUES (?, ?)", (folder, mtime))
+
+    def update_folder(self, folder, mtime, added, removed):
+        """增量更新文件夹的索引：added 为新增的 (路径, 大小, mtime) 列表，removed 为被删除的路径"""
+        with self._conn:
+            self._conn.executemany("DELETE FROM entries WHERE path = ?", ((path,) for path in removed))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (path, folder, size, mtime) VALUES (?, ?, ?, ?)",
+                ((path, folder, size, entry_mtime) for path, size, entry_mtime in added))
+            self._conn.execute("INSERT OR REPLACE INTO folders (path, mtime) VALUES (?, ?)", (folder, mtime))
+
+    def forget_folder(self, folder):
+        """删除文件夹的索引及其中GIF的帧索引（文件夹不存在时调用）"""
+        prefix = os.path.join(folder, '')
+        with self._conn:
+            self._conn.execute("DELETE FROM entries WHERE folder = ?", (folder,))
+            self._conn.execute("DELETE FROM folders WHERE path = ?", (folder,))
+            self._conn.execute("DELETE FROM frame_index WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+
+    def load_frame_index(self, path, size, mtime):
+        """读取GIF的帧索引数据，没有或文件大小/mtime 已变化时返回 None"""
+        row = self._conn.execute("SELECT size, mtime, data FROM frame_index WHERE path = ?", (path,)).fetchone()
+        if row is None or row[0] != size or row[1] != mtime:
+            return None
+        return bytes(row[2])
+
+    def save_frame_index(self, path, size, mtime, data):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO frame_index (path, size, mtime, data) VALUES (?, ?, ?, ?)",
+                               (path, size, mtime, data))
+
+    def close(self):
+        self._conn.close()
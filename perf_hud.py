@@ -0,0 +1,146 @@
+import json
+import time
+from collections import deque
+
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QColor, QFont, QPen
+
+# 帧间隔直方图的分档上界（毫秒），最后一档为更大的值
+HISTOGRAM_BUCKETS = (8, 16, 33, 50, 100, 200)
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+class PerfStats:
+    """播放性能的滚动统计：实际/声明帧率、绘制耗时分位数、合并帧数、当前GIF的解码耗时和内存，
+    以及主时钟（clock，见 frame_scheduler）的唤醒频率和计时器误差"""
+
+    def __init__(self, window=240, clock=None):
+        self._paint_times = deque(maxlen=window)  # 每次绘制的时间戳（秒）
+        self._paint_costs = deque(maxlen=window)  # 每次绘制的耗时（毫秒）
+        self._declared_delays = deque(maxlen=window)  # 每帧声明的延时（毫秒）
+        self.merged_frames = 0
+        self.gif_path = None
+        self.decode_ms = None
+        self.memory_bytes = None
+        self.load_source = None  # 当前GIF的帧来自哪里：decode / prefetch / disk / shared
+        self.prefetch_hit_rate = None
+        self.startup = {}  # 冷启动各阶段耗时（毫秒），见 startup.StartupTimer
+        self.clock = clock
+
+    def record_paint(self, cost_ms):
+        self._paint_times.append(time.perf_counter())
+        self._paint_costs.append(cost_ms)
+
+    def record_frame(self, declared_delay):
+        if declared_delay and declared_delay > 0:
+            self._declared_delays.append(declared_delay)
+
+    def set_gif(self, path, decode_ms, memory_bytes, source=None, prefetch_hit_rate=None):
+        """切换GIF时记录其解码耗时、内存占用和帧的来源，并清空上一个GIF的帧统计"""
+        self.gif_path = path
+        self.decode_ms = decode_ms
+        self.memory_bytes = memory_bytes
+        self.load_source = source
+        self.prefetch_hit_rate = prefetch_hit_rate
+        self._paint_times.clear()
+        self._paint_costs.clear()
+        self._declared_delays.clear()
+
+    def intervals(self):
+        times = list(self._paint_times)
+        return [(b - a) * 1000.0 for a, b in zip(times, times[1:])]
+
+    def histogram(self):
+        """帧间隔直方图：每个分档的计数"""
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for interval in self.intervals():
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if interval <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def snapshot(self):
+        intervals = self.intervals()
+        real_fps = 1000.0 / (sum(intervals) / len(intervals)) if intervals else 0.0
+        delays = self._declared_delays
+        declared_fps = 1000.0 / (sum(delays) / len(delays)) if delays else 0.0
+        costs = sorted(self._paint_costs)
+        clock = self.clock.stats() if self.clock is not None else {}
+        return {
+            'gif': self.gif_path,
+            'real_fps': real_fps,
+            'declared_fps': declared_fps,
+            'paint_ms_p50': _percentile(costs, 0.50),
+            'paint_ms_p95': _percentile(costs, 0.95),
+            'paint_ms_p99': _percentile(costs, 0.99),
+            'merged_frames': self.merged_frames,
+            'decode_ms': self.decode_ms,
+            'memory_bytes': self.memory_bytes,
+            'load_source': self.load_source,
+            'prefetch_hit_rate': self.prefetch_hit_rate,
+            'histogram_bounds_ms': list(HISTOGRAM_BUCKETS),
+            'histogram': self.histogram(),
+            'startup_ms': dict(self.startup),
+            'wakeups_per_second': clock.get('wakeups_per_second'),
+            'callbacks_per_wakeup': clock.get('callbacks_per_wakeup'),
+            'timer_slack_ms_p95': clock.get('timer_slack_ms_p95'),
+            'timer_slack_ms_max': clock.get('timer_slack_ms_max'),
+        }
+
+    def dump(self, path):
+        """把当前滚动统计连同原始样本写入 JSON 文件"""
+        data = self.snapshot()
+        data['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        data['paint_costs_ms'] = list(self._paint_costs)
+        data['frame_intervals_ms'] = self.intervals()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def draw_hud(painter, widget_rect, stats):
+    """在窗口左上角绘制半透明的性能面板和帧间隔直方图"""
+    snap = stats.snapshot()
+    decode = f"{snap['decode_ms']:.1f} ms" if snap['decode_ms'] is not None else '-'
+    memory = f"{snap['memory_bytes'] / (1024 * 1024):.1f} MB" if snap['memory_bytes'] is not None else '-'
+    lines = [
+        f"FPS {snap['real_fps']:.1f} / {snap['declared_fps']:.1f}",
+        f"paint p50 {snap['paint_ms_p50']:.2f} p95 {snap['paint_ms_p95']:.2f} ms",
+        f"merged {snap['merged_frames']}",
+        f"decode {decode}  mem {memory}",
+    ]
+    if snap['load_source'] is not None:
+        hit_rate = f"{snap['prefetch_hit_rate']:.0%}" if snap['prefetch_hit_rate'] is not None else '-'
+        lines.append(f"from {snap['load_source']}  prefetch hit {hit_rate}")
+    if snap['wakeups_per_second'] is not None:
+        lines.append(f"wake {snap['wakeups_per_second']:.1f}/s  slack p95 {snap['timer_slack_ms_p95']:.1f} ms")
+    font = QFont(painter.font())
+    font.setPixelSize(10)
+    painter.save()
+    painter.setFont(font)
+    line_h = painter.fontMetrics().height()
+    hist_h = 24
+    box = QRect(widget_rect.left() + 2, widget_rect.top() + 2,
+                min(widget_rect.width() - 4, 190), line_h * len(lines) + hist_h + 8)
+    painter.fillRect(box, QColor(0, 0, 0, 160))
+    painter.setPen(QPen(QColor(255, 255, 255)))
+    for i, text in enumerate(lines):
+        painter.drawText(box.left() + 4, box.top() + 2 + line_h * (i + 1) - painter.fontMetrics().descent(), text)
+
+    counts = snap['histogram']
+    peak = max(counts) or 1
+    bar_w = max(1, (box.width() - 8) // len(counts))
+    base_y = box.bottom() - 3
+    for i, count in enumerate(counts):
+        h = int((hist_h - 4) * count / peak)
+        # 超过 50ms 的档位（明显卡顿）用红色
+        color = QColor(255, 80, 80) if i >= HISTOGRAM_BUCKETS.index(50) + 1 else QColor(80, 220, 120)
+        painter.fillRect(box.left() + 4 + i * bar_w, base_y - h, bar_w - 1, h, color)
+    painter.restore()
@@ -0,0 +1,422 @@
+from PyQt5.QtCore import Qt, QObject, QRect, QTimer
+from PyQt5.QtGui import QMovie, QPainter
+from PyQt5.QtWidgets import QLabel, QMenu, QAction
+
+from compact_playlist import playlist_index
+from dirty_rects import DirtyTracker, map_to_widget
+from frame_cache import FrameCache, render_frame, fit_rect
+from gif_decoder import DecodedMovie, decode_covers, decode_side_for, scaled_decode_size
+from gif_frames import seek_movie
+from playback_power import PlaybackGovernor
+from gif_source import image_size, movie_for, source_exists
+
+WINDOW_OFFSET = 40  # 新窗口相对上一个窗口的偏移（像素）
+
+
+class SharedFrameStore:
+    """多个窗口共用的已解码 GIF：同一 GIF 只解码一次，最后一个播放它的窗口切走后释放
+
+    acquire() 依次尝试：其他窗口正在使用的同档位帧、loader(path, max_side) 加载（预取缓存或磁盘缓存，
+    结果已在表中时同样共享）、其他窗口正在使用的更大档位的帧（多个时取最小的）。每次 acquire 都要对应一次 release。
+    """
+
+    def __init__(self):
+        self._entries = {}  # path -> [[DecodedGif, 引用数], ...]
+
+    def acquire(self, path, max_side, loader):
+        """取可用于 max_side 的已解码 GIF 并增加引用，无法取得时返回 None"""
+        entries = self._entries.setdefault(path, [])
+        entry = next((e for e in entries if e[0].max_side == max_side), None)
+        if entry is None:
+            decoded = loader(path, max_side)
+            if decoded is not None:
+                entry = next((e for e in entries if e[0] is decoded), None)
+                if entry is None:
+                    entry = [decoded, 0]
+                    entries.append(entry)
+        if entry is None:
+            usable = [e for e in entries if decode_covers(e[0].max_side, max_side)]
+            if usable:
+                entry = min(usable, key=lambda e: float('inf') if e[0].max_side is None else e[0].max_side)
+        if entry is None:
+            if not entries:
+                del self._entries[path]
+            return None
+        entry[1] += 1
+        return entry[0]
+
+    def release(self, decoded):
+        """减少引用，没有窗口再使用时从共享表中移除"""
+        entries = self._entries.get(decoded.path)
+        if not entries:
+            return
+        for i, entry in enumerate(entries):
+            if entry[0] is decoded:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del entries[i]
+                break
+        if not entries:
+            del self._entries[decoded.path]
+
+    def refs(self, decoded):
+        for entry in self._entries.get(decoded.path, []):
+            if entry[0] is decoded:
+                return entry[1]
+        return 0
+
+    @property
+    def nbytes(self):
+        return sum(entry[0].nbytes for entries in self._entries.values() for entry in entries)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+
+class PetController(QObject):
+    """多窗口模式的控制器：管理主窗口之外的陪伴窗口
+
+    所有窗口共用主窗口的播放列表、预取器、磁盘缓存、已缩放帧缓存和帧率设置，
+    已解码的帧通过 SharedFrameStore 共享，再多开一个显示同一 GIF 的窗口只增加它自己的绘制开销。
+    """
+
+    def __init__(self, player):
+        super().__init__(player)
+        self._player = player
+        self.windows = []
+        self._base_cache_bytes = player._frame_cache.max_bytes
+        player._prefetcher.decoded_ready.connect(self._on_decoded_ready)
+        player._pacer.changed.connect(self._apply_pacing)
+
+    @property
+    def frame_store(self):
+        return self._player._frame_store
+
+    @property
+    def frame_cache(self):
+        return self._player._frame_cache
+
+    @property
+    def pacer(self):
+        return self._player._pacer
+
+    def playlist(self):
+        return self._player.gif_list
+
+    def neighbour(self, gif_path, offset):
+        """播放列表中 gif_path 前后 offset 个的GIF（播放列表为空时返回 None）"""
+        playlist = self.playlist()
+        if not playlist:
+            return None
+        if self._player._single_file_mode:
+            return playlist[0]
+        i = playlist_index(playlist, gif_path) if gif_path else -1
+        if i < 0:
+            return playlist[0]
+        return playlist[(i + offset) % len(playlist)]
+
+    def acquire(self, gif_path, max_side):
+        """从共享表、预取缓存或磁盘缓存取已解码的GIF"""
+        return self.frame_store.acquire(gif_path, max_side, self._player._load_decoded)
+
+    def acquire_prefetched(self, gif_path, max_side):
+        """预取完成时取共享的帧：与主窗口共用同一份，不计入预取命中率"""
+        return self.frame_store.acquire(gif_path, max_side, self._player._prefetched)
+
+    def seek(self, movie, gif_path, frame_number):
+        """把陪伴窗口的动画定位到某一帧（QMovie 借助主窗口的帧索引只从最近的关键帧开始解码）"""
+        if frame_number > 0:
+            seek_movie(movie, gif_path, frame_number, self._player._get_library_index())
+
+    def add_window(self, gif_path=None, geometry=None, flipped=False, save=True):
+        """新建一个陪伴窗口，默认显示主窗口当前的GIF，位置在最后一个窗口旁边"""
+        gif_path = gif_path or self._player._current_gif
+        if not gif_path:
+            return None
+        window = CompanionWindow(self)
+        window._flipped = flipped
+        rect = QRect(*geometry) if geometry else None
+        if rect is None or rect.width() < 50 or rect.height() < 50:
+            last = self.windows[-1] if self.windows else self._player
+            rect = last.geometry().translated(WINDOW_OFFSET, WINDOW_OFFSET)
+        window.setGeometry(rect)
+        self.windows.append(window)
+        # 每个窗口各有一份已缩放帧的预算，显示同一GIF、同一尺寸的窗口共用缓存中的帧
+        self.frame_cache.max_bytes = self._base_cache_bytes * (1 + len(self.windows))
+        window.apply_always_on_top(self._player._always_on_top)
+        window.set_gif(gif_path)
+        window.show()
+        if save:
+            self.save()
+        return window
+
+    def remove_window(self, window):
+        """关闭一个陪伴窗口并释放它引用的帧"""
+        if window not in self.windows:
+            return
+        self.windows.remove(window)
+        window.release_movie()
+        window.hide()
+        window.deleteLater()
+        self.frame_cache.max_bytes = self._base_cache_bytes * (1 + len(self.windows))
+        self.save()
+
+    def set_always_on_top(self, on_top):
+        for window in self.windows:
+            window.apply_always_on_top(on_top)
+
+    def describe(self):
+        """陪伴窗口的位置大小、当前GIF和翻转状态，保存到配置的 companions 中"""
+        result = []
+        for window in self.windows:
+            geom = window.geometry()
+            result.append({
+                'geometry': [geom.x(), geom.y(), geom.width(), geom.height()],
+                'current_gif': window._current_gif,
+                'flipped': window._flipped,
+            })
+        return result
+
+    def restore(self, companions):
+        """按配置重新打开上次退出时的陪伴窗口"""
+        if not isinstance(companions, list):
+            return
+        for item in companions:
+            if not isinstance(item, dict):
+                continue
+            gif_path = item.get('current_gif')
+            if not gif_path or not source_exists(gif_path):
+                gif_path = None
+            geometry = item.get('geometry')
+            if not isinstance(geometry, list) or len(geometry) != 4:
+                geometry = None
+            self.add_window(gif_path, geometry, item.get('flipped', False), save=False)
+
+    def save(self):
+        self._player._save_config()
+
+    def _on_decoded_ready(self, path):
+        for window in self.windows:
+            window.on_decoded_ready(path)
+
+    def _apply_pacing(self):
+        for window in self.windows:
+            window.apply_pacing()
+
+
+class CompanionWindow(QLabel):
+    """陪伴窗口：只负责显示和切换自己的GIF，解码、缓存和播放列表都由 PetController 共享"""
+
+    def __init__(self, controller):
+        super().__init__()
+        self._controller = controller
+        self.setAttribute(Qt.WA_TranslucentBackground, True)
+        self.movie = None
+        self._current_gif = None
+        self._flipped = False
+        self._drag_pos = None
+        self._decode_side = None
+        self._playback = PlaybackGovernor(self)
+        self._dirty_tracker = DirtyTracker()
+        # 与主窗口一样按窗口尺寸分档解码，拖动调整大小结束后跨档才重新取帧
+        self._decode_size_timer = QTimer(self)
+        self._decode_size_timer.setSingleShot(True)
+        self._decode_size_timer.setInterval(200)
+        self._decode_size_timer.timeout.connect(self._update_decode_size)
+
+    def apply_always_on_top(self, on_top):
+        flags = Qt.FramelessWindowHint
+        if on_top:
+            flags |= Qt.WindowStaysOnTopHint
+        visible = self.isVisible()
+        self.setWindowFlags(flags)
+        if visible:
+            self.show()  # 重新应用窗口标志需要调用 show()
+
+    def release_movie(self):
+        """停止当前动画并归还共享的帧"""
+        if self.movie is None:
+            return
+        self.movie.stop()
+        if isinstance(self.movie, DecodedMovie):
+            self._controller.frame_store.release(self.movie.decoded)
+        self.movie.deleteLater()
+        self.movie = None
+
+    def set_gif(self, gif_path):
+        """播放GIF：优先使用其他窗口或预取已解码好的帧，都没有时退回 QMovie 边播边解码"""
+        self.release_movie()
+        self._current_gif = gif_path
+        self._decode_side = decode_side_for(self.width(), self.height(), self.devicePixelRatioF())
+        decoded = self._controller.acquire(gif_path, self._decode_side)
+        if decoded is not None:
+            self.movie = DecodedMovie(decoded, self)
+        else:
+            self.movie = movie_for(gif_path, parent=self)
+            size = scaled_decode_size(image_size(gif_path), self._decode_side)
+            if size is not None:
+                self.movie.setScaledSize(size)
+        self.movie.frameChanged.connect(self._on_frame_changed)
+        self.apply_pacing()
+        self.movie.start()
+        self._playback.attach(self.movie)
+        self._controller.save()
+
+    def on_decoded_ready(self, path):
+        """预取器解码好了正用 QMovie 播放的GIF，换成共享的帧"""
+        if path != self._current_gif or not isinstance(self.movie, QMovie):
+            return
+        decoded = self._controller.acquire_prefetched(path, self._decode_side)
+        if decoded is None:
+            return
+        frame_number = self.movie.currentFrameNumber()
+        self.movie.stop()
+        self.movie.deleteLater()
+        self.movie = DecodedMovie(decoded, self)
+        self.movie.frameChanged.connect(self._on_frame_changed)
+        self.apply_pacing()
+        self.movie.start()
+        self.movie.jumpToFrame(max(0, frame_number))
+        self._playback.attach(self.movie)
+
+    def _update_decode_size(self):
+        """窗口尺寸跨过解码档位时按新档位重新取帧（共享的帧、预取或磁盘缓存，都没有时按新尺寸边播边解码），
+        停留在原来的帧"""
+        side = decode_side_for(self.width(), self.height(), self.devicePixelRatioF())
+        if side == self._decode_side or self._current_gif is None:
+            return
+        frame_number = self.movie.currentFrameNumber() if self.movie is not None else 0
+        self.set_gif(self._current_gif)
+        self._controller.seek(self.movie, self._current_gif, frame_number)
+
+    def _on_frame_changed(self, frame_number):
+        """只重绘与上一帧不同的区域"""
+        rect = self._dirty_tracker.frame_changed(self.movie, self.movie.currentFrameNumber())
+        frame_rect = self.movie.frameRect()
+        if rect is None or frame_rect.isEmpty():
+            self.update()
+        elif not rect.isEmpty():
+            target = fit_rect(frame_rect.width(), frame_rect.height(), self.width(), self.height())
+            self.update(map_to_widget(rect, frame_rect.width(), frame_rect.height(), target, self._flipped)
+                        .intersected(self.rect()))
+
+    def apply_pacing(self):
+        if isinstance(self.movie, DecodedMovie):
+            self.movie.setMinFrameInterval(self._controller.pacer.min_interval_ms)
+
+    def step(self, offset):
+        gif_path = self._controller.neighbour(self._current_gif, offset)
+        if gif_path:
+            self.set_gif(gif_path)
+
+    def paintEvent(self, event):
+        """按窗口大小绘制当前帧，已缩放/翻转的帧与其他窗口共用缓存"""
+        if self.movie is None or not self.movie.isValid():
+            return
+        frame_rect = self.movie.frameRect()
+        if frame_rect.isEmpty():
+            return
+        target = fit_rect(frame_rect.width(), frame_rect.height(), self.width(), self.height())
+        dpr = self.devicePixelRatioF()
+        cache = self._controller.frame_cache
+        transform_mode = self._controller.pacer.transform_mode
+        key = FrameCache.make_key(self._current_gif, self.movie.currentFrameNumber(),
+                                  target.width(), target.height(), self._flipped, dpr, transform_mode)
+        pixmap = cache.get(key)
+        if pixmap is None:
+            pixmap = render_frame(self.movie.currentPixmap(), target.width(), target.height(), self._flipped, dpr,
+                                  transform_mode)
+            cache.put(key, pixmap)
+        painter = QPainter(self)
+        painter.drawPixmap(target.topLeft(), pixmap)
+        painter.end()
+
+    def moveEvent(self, event):
+        self._controller.save()
+        super().moveEvent(event)
+
+    def resizeEvent(self, event):
+        self._decode_size_timer.start()
+        self._controller.save()
+        super().resizeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._playback.refresh()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._playback.refresh()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        self._playback.refresh()
+
+    def mousePressEvent(self, event):
+        """左键拖动窗口"""
+        if event.button() == Qt.LeftButton:
+            self._drag_pos = event.globalPos() - self.frameGeometry().topLeft()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_pos is not None and event.buttons() & Qt.LeftButton:
+            self.move(event.globalPos() - self._drag_pos)
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_pos = None
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        """左键双击切换到下一个GIF"""
+        if event.button() == Qt.LeftButton:
+            self.step(1)
+        super().mouseDoubleClickEvent(event)
+
+    def keyPressEvent(self, event):
+        """Ctrl+加减号/0 缩放，Ctrl+左右切换，Ctrl+F 翻转（与主窗口一致）"""
+        if event.modifiers() & Qt.ControlModifier:
+            if event.key() in (Qt.Key_Plus, Qt.Key_Equal):
+                self.resize(int(self.width() * 1.1), int(self.height() * 1.1))
+            elif event.key() == Qt.Key_Minus:
+                self.resize(max(50, int(self.width() * 0.9)), max(50, int(self.height() * 0.9)))
+            elif event.key() == Qt.Key_0:
+                self.resize(self._controller._player._default_size)
+            elif event.key() == Qt.Key_Right:
+                self.step(1)
+            elif event.key() == Qt.Key_Left:
+                self.step(-1)
+            elif event.key() == Qt.Key_F:
+                self._toggle_flip()
+        super().keyPressEvent(event)
+
+    def _toggle_flip(self):
+        self._flipped = not self._flipped
+        self._controller.save()
+        self.update()
+
+    def contextMenuEvent(self, event):
+        """右键菜单：切换、翻转、新建/关闭窗口"""
+        menu = QMenu(self)
+        next_action = QAction('下一个GIF', self)
+        next_action.triggered.connect(lambda: self.step(1))
+        menu.addAction(next_action)
+
+        prev_action = QAction('上一个GIF', self)
+        prev_action.triggered.connect(lambda: self.step(-1))
+        menu.addAction(prev_action)
+
+        flip_action = QAction('左右翻转', self, checkable=True)
+        flip_action.setChecked(self._flipped)
+        flip_action.triggered.connect(self._toggle_flip)
+        menu.addAction(flip_action)
+
+        new_action = QAction('新建窗口', self)
+        new_action.triggered.connect(lambda: self._controller.add_window(self._current_gif))
+        menu.addAction(new_action)
+
+        close_action = QAction('关闭此窗口', self)
+        close_action.triggered.connect(lambda: self._controller.remove_window(self))
+        menu.addAction(close_action)
+
+        menu.exec_(event.globalPos())
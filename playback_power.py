@@ -0,0 +1,92 @@
+from PyQt5.QtCore import QObject, QEvent, Qt
+from PyQt5.QtGui import QGuiApplication
+
+from frame_scheduler import master_clock
+
+# 暂停播放的原因
+HIDDEN = 'hidden'  # 窗口隐藏（最小化到托盘）
+MINIMIZED = 'minimized'
+OBSCURED = 'obscured'  # 窗口不可见（被遮挡、锁屏等，平台支持时由 Expose 事件得知）
+INACTIVE_SESSION = 'inactive_session'  # 应用被系统挂起/隐藏
+TRANSPARENT = 'transparent'  # 窗口完全透明
+
+
+class PlaybackGovernor(QObject):
+    """省电播放状态机：窗口不可见时暂停动画解码，重新可见时从暂停的那一帧继续
+
+    播放相关的唤醒（帧切换、自动切换）都由主时钟统一处理，wakeups_per_second() 报告整个进程的唤醒频率。
+    """
+
+    def __init__(self, widget):
+        super().__init__(widget)
+        self._widget = widget
+        self._movie = None
+        self._reasons = set()
+        self._paused = False
+        self._watched_window = None
+        app = QGuiApplication.instance()
+        if app is not None:
+            # 连接到自身的方法（而非 lambda），窗口销毁后连接随之断开
+            app.applicationStateChanged.connect(self._on_application_state_changed)
+
+    @property
+    def paused(self):
+        return self._paused
+
+    @property
+    def reasons(self):
+        return frozenset(self._reasons)
+
+    def attach(self, movie):
+        """接管新的动画对象；当前不可见时立即暂停"""
+        self._movie = movie
+        self._paused = False
+        self._apply()
+
+    def detach(self):
+        """动画被释放（之后不再有动画）时调用"""
+        self._movie = None
+        self._paused = False
+
+    def wakeups_per_second(self):
+        return master_clock().wakeups_per_second()
+
+    def refresh(self):
+        """重新判断窗口是否可见，并据此暂停或恢复播放"""
+        widget = self._widget
+        reasons = set()
+        if not widget.isVisible():
+            reasons.add(HIDDEN)
+        if widget.isMinimized():
+            reasons.add(MINIMIZED)
+        if widget.windowOpacity() <= 0.0:
+            reasons.add(TRANSPARENT)
+        window = widget.windowHandle()
+        if window is not None:
+            if window is not self._watched_window:
+                window.installEventFilter(self)
+                self._watched_window = window
+            if widget.isVisible() and not window.isExposed():
+                reasons.add(OBSCURED)
+        app = QGuiApplication.instance()
+        if app is not None and app.applicationState() in (Qt.ApplicationHidden, Qt.ApplicationSuspended):
+            reasons.add(INACTIVE_SESSION)
+        if reasons != self._reasons:
+            self._reasons = reasons
+            self._apply()
+
+    def _apply(self):
+        movie = self._movie
+        should_pause = bool(self._reasons)
+        if movie is None or should_pause == self._paused:
+            return
+        self._paused = should_pause
+        movie.setPaused(should_pause)
+
+    def _on_application_state_changed(self, state):
+        self.refresh()
+
+    def eventFilter(self, obj, event):
+        if obj is self._watched_window and event.type() == QEvent.Expose:
+            self.refresh()
+        return False
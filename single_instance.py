@@ -0,0 +1,120 @@
+import getpass
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+# 命令协议：每行一条 UTF-8 命令 "<命令> [参数]"，每条命令回复一行 "ok" 或 "error <原因>"
+CMD_FOLDER = 'folder'  # folder <文件夹路径>
+CMD_FILE = 'file'  # file <GIF文件路径>
+CMD_NEXT = 'next'
+CMD_PREV = 'prev'
+CMD_SHOW = 'show'
+COMMANDS = (CMD_FOLDER, CMD_FILE, CMD_NEXT, CMD_PREV, CMD_SHOW)
+CONNECT_TIMEOUT_MS = 200
+NO_REPLY = 'error no reply from the running instance'
+
+
+def server_name():
+    """每个用户一个实例（Windows 上为命名管道 \\\\.\\pipe\\<名称>，其他平台为临时目录下的套接字）"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = 'default'
+    return f'yierbubu-gif-player-{user}'
+
+
+def parse_command(line):
+    """把一行命令解析为 (命令, 参数)，无法识别时返回 None"""
+    name, _, arg = line.strip().partition(' ')
+    name = name.lower()
+    if name not in COMMANDS:
+        return None
+    return name, arg.strip()
+
+
+def send_commands(name, lines, timeout_ms=CONNECT_TIMEOUT_MS):
+    """把命令发给已在运行的实例，返回每条命令的回复；没有正在运行的实例时返回 None
+
+    等待回复超时后，其余命令（包括正在等待的这条）的回复都记为 NO_REPLY。
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout_ms):
+        return None
+    replies = []
+    for line in lines:
+        socket.write((line + '\n').encode('utf-8'))
+        socket.flush()
+        while not socket.canReadLine():
+            if not socket.waitForReadyRead(timeout_ms * 5):
+                socket.abort()
+                return replies + [NO_REPLY] * (len(lines) - len(replies))
+        replies.append(bytes(socket.readLine()).decode('utf-8', 'replace').strip())
+    socket.disconnectFromServer()
+    return replies
+
+
+class CommandServer(QObject):
+    """单实例守护：监听本地套接字，把其他实例或脚本发来的命令交给 handler(命令, 参数) 执行
+
+    handler 返回 None 表示成功，返回字符串表示失败原因。
+    """
+
+    def __init__(self, name, handler, parent=None):
+        super().__init__(parent)
+        self._name = name
+        self._handler = handler
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)  # 只允许当前用户连接
+        self._server.newConnection.connect(self._on_new_connection)
+
+    def listen(self):
+        """开始监听；上次异常退出遗留的套接字文件会先被清理
+
+        监听前先尝试连接：只有连接被拒绝（或套接字不存在）才接管这个名称。另一个实例仍在运行
+        （哪怕响应很慢）时不抢占它的套接字——设置了访问权限选项时 QLocalServer 会直接替换已有的套接字文件。
+        """
+        if not self._name_is_free():
+            print(f"DEBUG: Command server not started, another instance is listening on {self._name}")
+            return False
+        if self._server.listen(self._name):
+            return True
+        if self._server.serverError() == QLocalSocket.AddressInUseError:
+            QLocalServer.removeServer(self._name)
+            if self._server.listen(self._name):
+                return True
+        print(f"DEBUG: Command server failed to listen on {self._name}: {self._server.errorString()}")
+        return False
+
+    def _name_is_free(self):
+        probe = QLocalSocket()
+        probe.connectToServer(self._name)
+        if probe.waitForConnected(CONNECT_TIMEOUT_MS):
+            probe.disconnectFromServer()
+            return False
+        return probe.error() in (QLocalSocket.ConnectionRefusedError, QLocalSocket.ServerNotFoundError)
+
+    def close(self):
+        self._server.close()
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _on_ready_read(self, socket):
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).decode('utf-8', 'replace').strip()
+            if not line:
+                continue
+            command = parse_command(line)
+            if command is None:
+                error = f'unknown command: {line}'
+            else:
+                try:
+                    error = self._handler(*command)
+                except Exception as e:
+                    error = str(e)
+            reply = 'ok' if error is None else f'error {error}'
+            socket.write((reply + '\n').encode('utf-8'))
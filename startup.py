@@ -0,0 +1,47 @@
+import os
+import time
+
+from PyQt5.QtGui import QPixmap
+
+SNAPSHOT_FILENAME = 'last_frame.png'
+
+
+def snapshot_path_for_config(config_path):
+    """首帧快照放在 user_config.json 旁边；没有配置文件时不使用快照"""
+    if not config_path:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), SNAPSHOT_FILENAME)
+
+
+def load_snapshot(path):
+    """读取上次退出时保存的画面，不存在或无效时返回 None"""
+    if not path or not os.path.isfile(path):
+        return None
+    pixmap = QPixmap(path)
+    return None if pixmap.isNull() else pixmap
+
+
+def save_snapshot(pixmap, path):
+    """保存当前画面（先写临时文件再替换），供下次启动立即显示"""
+    if not path or pixmap is None or pixmap.isNull():
+        return
+    tmp_path = f'{path}.tmp'
+    try:
+        if pixmap.save(tmp_path, 'PNG'):
+            os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"保存启动快照失败: {e}")
+
+
+class StartupTimer:
+    """记录冷启动各阶段距进程启动的耗时（毫秒），如首帧、首个GIF帧、托盘就绪"""
+
+    def __init__(self, process_start):
+        self._start = process_start
+        self.marks = {}
+
+    def mark(self, name):
+        """记录某阶段第一次到达的时间，重复调用不覆盖"""
+        if name not in self.marks:
+            self.marks[name] = round((time.perf_counter() - self._start) * 1000.0, 1)
+        return self.marks[name]
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the compact recursive playlist and the lazy shuffle order
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from compact_playlist import CompactPlaylist, ShuffleOrder, playlist_index
+
+
+def _tree_playlist():
+    playlist = CompactPlaylist()
+    playlist.add_directory(os.path.join('lib'), ['a.gif', 'b.gif'])
+    playlist.add_directory(os.path.join('lib', 'cats'), ['c1.gif', 'c2.gif', 'c3.gif'])
+    return playlist
+
+
+def test_index_and_find():
+    """按下标取回完整路径，find 与下标互逆，不存在的路径返回 -1"""
+    playlist = _tree_playlist()
+    paths = [os.path.join('lib', 'a.gif'), os.path.join('lib', 'b.gif')] + \
+            [os.path.join('lib', 'cats', name) for name in ('c1.gif', 'c2.gif', 'c3.gif')]
+    assert len(playlist) == 5
+    assert list(playlist) == paths
+    assert playlist[-1] == paths[-1]
+    for i, path in enumerate(paths):
+        assert playlist.find(path) == i
+        assert playlist_index(playlist, path) == i
+    assert playlist.find(os.path.join('lib', 'cats', 'c0.gif')) == -1
+    assert playlist.find(os.path.join('other', 'a.gif')) == -1
+    assert playlist_index(sorted(paths), paths[2]) == sorted(paths).index(paths[2])
+
+
+def test_shuffle_visits_everything_once_per_round():
+    """每一轮恰好播放每个条目一次，轮与轮之间不连续重复，后退沿历史返回"""
+    order = ShuffleOrder(50, random.Random(1))
+    first = [order.next() for _ in range(50)]
+    second = [order.next() for _ in range(50)]
+    assert sorted(first) == list(range(50)) and sorted(second) == list(range(50))
+    assert first[-1] != second[0]
+    assert order.prev() == second[-2]
+    assert order.next() == second[-1]
+
+
+def test_shuffle_grows_without_losing_history():
+    """追加条目后，已播放的不会重复，新条目在本轮内播放"""
+    order = ShuffleOrder(10, random.Random(2))
+    played = [order.next() for _ in range(5)]
+    order.grow(20)
+    played += [order.next() for _ in range(15)]
+    assert sorted(played) == list(range(20))
+
+
+if __name__ == '__main__':
+    test_index_and_find()
+    test_shuffle_visits_everything_once_per_round()
+    test_shuffle_grows_without_losing_history()
+    print("✓ All compact playlist tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the debounced, atomic configuration store
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication
+
+from config_store import ConfigStore
+
+
+def test_update_is_debounced_until_flush():
+    """update 不会立即写盘，flush 后写出合并后的全部配置"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'user_config.json')
+        store = ConfigStore(path, delay_ms=10_000)
+        store.update({'flipped': True})
+        store.update({'flipped': False, 'interval': 1000})
+        assert not os.path.exists(path)
+        store.flush()
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f) == {'flipped': False, 'interval': 1000}
+        assert not os.path.exists(path + '.tmp')
+
+
+def test_load_keeps_existing_keys():
+    """load 读入的配置会与之后的修改合并，损坏的文件按空配置处理"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'user_config.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'gif_folder': 'gif', 'interval': 60000}, f)
+        store = ConfigStore(path)
+        assert store.load()['gif_folder'] == 'gif'
+        store.update({'interval': 1000})
+        store.flush()
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f) == {'gif_folder': 'gif', 'interval': 1000}
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"gif_folder": ')
+        assert ConfigStore(path).load() == {}
+
+
+def test_none_removes_stale_keys():
+    """值为 None 的配置项会从文件中删除，删除不存在的项不算变化"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'user_config.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'current_gif': 'a.gif', 'current_frame': 3, 'interval': 1000}, f)
+        store = ConfigStore(path, delay_ms=10_000)
+        store.load()
+        store.update({'current_gif': None, 'current_frame': None})
+        store.flush()
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f) == {'interval': 1000}
+
+        store.update({'current_gif': None})
+        assert not store._dirty
+
+
+def test_player_drops_cleared_playback_position():
+    """播放列表清空后保存配置，旧的 current_gif 不会残留在文件中"""
+    from transparent_gif_player import TransparentGifPlayer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'user_config.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'current_gif': os.path.join(tmp, 'gone.gif'), 'current_frame': 5}, f)
+        player = TransparentGifPlayer(tmp, config_path=path)
+        player._clear_playlist()
+        player._save_config()
+        player._prefetcher.shutdown()
+        player._config_store.flush()
+        player.close()
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        assert 'current_gif' not in config and 'gif_folder' not in config
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_update_is_debounced_until_flush()
+    test_load_keeps_existing_keys()
+    test_none_removes_stale_keys()
+    test_player_drops_cleared_playback_position()
+    print("✓ All config store tests passed!")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test script to verify dirty-rect computation between frames
+"""
+
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QRect, Qt
+from PyQt5.QtGui import QColor, QImage, QPainter
+
+from dirty_rects import changed_rect, map_to_widget
+
+
+def _image(width, height):
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    return image
+
+
+def test_changed_rect_bounds_modified_block():
+    before = _image(64, 48)
+    after = before.copy()
+    painter = QPainter(after)
+    painter.fillRect(QRect(10, 20, 5, 3), QColor(255, 0, 0))
+    painter.end()
+    assert changed_rect(before, after) == QRect(10, 20, 5, 3)
+    assert changed_rect(before, before.copy()).isEmpty()
+    assert changed_rect(before, _image(32, 48)) == QRect(0, 0, 32, 48)
+
+
+def test_map_to_widget_scales_and_flips():
+    target = QRect(0, 0, 200, 100)  # 帧 100x50 放大两倍
+    rect = map_to_widget(QRect(0, 0, 10, 10), 100, 50, target, False)
+    assert rect.contains(QRect(0, 0, 20, 20))
+    flipped = map_to_widget(QRect(0, 0, 10, 10), 100, 50, target, True)
+    assert flipped.contains(QRect(180, 0, 20, 20))
+    assert not flipped.intersects(QRect(0, 0, 20, 20))
@@ -15,7 +15,7 @@ try:
     
     def test_application():
         """Test if the application can start with the double-click changes"""
-        app = QApplication(sys.argv)
+        app = QApplication.instance() or QApplication(sys.argv)
         
         # Create a test instance
         gif_folder = os.path.join(os.path.dirname(__file__), "gifs")  # Default folder
@@ -51,8 +51,8 @@ try:
         player.show()
         print("✓ Application window displayed successfully")
         
-        # Close the application
-        app.quit()
+        # Close the window (the QApplication is shared with the other tests)
+        player.close()
         
         return True
         
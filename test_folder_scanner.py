@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the background folder scanner and the incremental folder-watch updates
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication
+
+from folder_scanner import FolderScanner, UNCHANGED, FIRST_BATCH
+from library_index import LibraryIndex, INDEX_FILENAME
+
+
+def _touch(folder, *names):
+    for name in names:
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(b'GIF89a')
+
+
+def _run_refresh(folder, generation, **kwargs):
+    """在当前线程运行一次文件夹监视触发的增量扫描，返回 (新增, 删除, total)"""
+    scanner = FolderScanner(folder, generation, refresh=True, **kwargs)
+    diffs, finished = [], []
+    scanner.listing_diff.connect(lambda g, added, removed: diffs.append((added, removed)))
+    scanner.scan_finished.connect(lambda g, total: finished.append(total))
+    scanner.run()
+    added, removed = diffs[0] if diffs else ([], [])
+    return added, removed, finished[0]
+
+
+def test_first_gif_is_sent_alone_then_batches_grow():
+    """第一个GIF单独回传以便立即开始播放，之后批次逐渐增大；扫描结果写入索引"""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'gif')
+        os.makedirs(folder)
+        names = [f'{i:04d}.gif' for i in range(600)]
+        _touch(folder, 'notes.txt', *names)
+        index_path = os.path.join(tmp, INDEX_FILENAME)
+        scanner = FolderScanner(folder, 1, index_path=index_path)
+        batches, finished = [], []
+        scanner.batch_found.connect(lambda g, paths: batches.append(paths))
+        scanner.scan_finished.connect(lambda g, total: finished.append(total))
+        scanner.run()
+        assert [len(b) for b in batches] == [FIRST_BATCH, 256, 600 - FIRST_BATCH - 256]
+        assert sorted(p for b in batches for p in b) == [os.path.join(folder, n) for n in names]
+        assert finished == [600]
+
+        index = LibraryIndex(index_path)
+        mtime, paths = index.load_folder(folder)
+        assert len(paths) == 600 and mtime == os.stat(folder).st_mtime
+        index.close()
+
+
+def test_refresh_diffs_against_index():
+    """文件夹变化时只比较文件名，增量更新索引；没有变化时以 UNCHANGED 结束"""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'gif')
+        os.makedirs(folder)
+        _touch(folder, 'a.gif', 'b.gif', 'notes.txt')
+        index_path = os.path.join(tmp, INDEX_FILENAME)
+        index = LibraryIndex(index_path)
+        index.save_folder(folder, 1.0, [(os.path.join(folder, n), 6, 1.0) for n in ('a.gif', 'b.gif')])
+
+        os.remove(os.path.join(folder, 'a.gif'))
+        _touch(folder, 'c.gif', 'd.GIF')
+        added, removed, total = _run_refresh(folder, 1, index_path=index_path)
+        assert added == [os.path.join(folder, 'c.gif'), os.path.join(folder, 'd.GIF')]
+        assert removed == [os.path.join(folder, 'a.gif')]
+        assert total == 3
+        mtime, paths = index.load_folder(folder)
+        assert paths == [os.path.join(folder, n) for n in ('b.gif', 'c.gif', 'd.GIF')]
+        assert mtime == os.stat(folder).st_mtime
+
+        assert _run_refresh(folder, 2, index_path=index_path) == ([], [], UNCHANGED)
+        index.close()
+
+
+def test_refresh_without_index_uses_known_paths():
+    """没有索引时与当前播放列表比较"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _touch(tmp, 'a.gif', 'b.gif')
+        known = [os.path.join(tmp, 'a.gif'), os.path.join(tmp, 'z.gif')]
+        added, removed, total = _run_refresh(tmp, 1, known_paths=known)
+        assert added == [os.path.join(tmp, 'b.gif')]
+        assert removed == [os.path.join(tmp, 'z.gif')]
+        assert total == 2
+
+
+def test_player_applies_diff_and_clears_when_folder_empties():
+    """增量结果原地合并且保持当前位置；GIF全部被删除时清空播放列表并停止播放，再放入GIF时重新开始"""
+    from transparent_gif_player import TransparentGifPlayer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        player = TransparentGifPlayer(tmp, config_path=os.path.join(tmp, 'user_config.json'))
+        paths = [os.path.join(tmp, n) for n in ('a.gif', 'c.gif', 'e.gif')]
+        player.gif_list = list(paths)
+        player.gif_index = 1
+        player._scan_started = True
+        player._scan_folder = tmp
+        player._current_gif = paths[1]
+
+        player._on_listing_diff(player._scan_generation, [os.path.join(tmp, 'b.gif')], [paths[0]])
+        assert player.gif_list == [os.path.join(tmp, 'b.gif'), paths[1], paths[2]]
+        assert player.gif_list[player.gif_index] == paths[1]
+        player._on_listing_diff(player._scan_generation - 1, [os.path.join(tmp, 'x.gif')], [])
+        assert len(player.gif_list) == 3  # 过期的扫描结果被丢弃
+
+        player._on_listing_diff(player._scan_generation, [], list(player.gif_list))
+        assert player.gif_list == [] and player.movie is None and player._current_gif is None
+        assert not player._timer.isActive()
+
+        played = []
+        player.set_gif = played.append
+        player._on_listing_diff(player._scan_generation, [paths[2]], [])
+        assert player.gif_list == [paths[2]] and played == [paths[2]]
+        player._prefetcher.shutdown()
+        player._config_store.flush()
+        player.close()
+
+
+def test_removing_the_playing_head_keeps_the_next_switch():
+    """正在播放的第一个GIF被删除后，下一次切换播放顶替到开头的那个，上一个回到末尾"""
+    from transparent_gif_player import TransparentGifPlayer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        player = TransparentGifPlayer(tmp, config_path=os.path.join(tmp, 'user_config.json'))
+        paths = [os.path.join(tmp, n) for n in ('a.gif', 'b.gif', 'c.gif')]
+        played = []
+        player.set_gif = played.append
+        for switch, expected in ((player.next_gif, paths[1]), (player.prev_gif, paths[2])):
+            player.gif_list = list(paths)
+            player.gif_index = 0
+            player._index_is_next = False
+            player._scan_started = True
+            player._current_gif = paths[0]
+            player._on_listing_diff(player._scan_generation, [], [paths[0]])
+            assert player.gif_list == paths[1:]
+            switch()
+            assert played[-1] == expected
+        player._prefetcher.shutdown()
+        player._config_store.flush()
+        player.close()
+
+
+def test_scan_batch_after_playlist_was_cleared_restarts_playback():
+    """扫描途中播放列表被清空后，下一批结果重新开始播放而不是出错"""
+    from transparent_gif_player import TransparentGifPlayer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        player = TransparentGifPlayer(tmp, config_path=os.path.join(tmp, 'user_config.json'))
+        player._scan_started = True
+        player._scan_folder = tmp
+        player._clear_playlist()
+        played = []
+        player.set_gif = played.append
+        paths = [os.path.join(tmp, n) for n in ('b.gif', 'a.gif')]
+        player._on_scan_batch(player._scan_generation, list(paths))
+        assert player.gif_list == sorted(paths) and played == [sorted(paths)[0]]
+        player._prefetcher.shutdown()
+        player._config_store.flush()
+        player.close()
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_first_gif_is_sent_alone_then_batches_grow()
+    test_refresh_diffs_against_index()
+    test_refresh_without_index_uses_known_paths()
+    test_player_applies_diff_and_clears_when_folder_empties()
+    test_removing_the_playing_head_keeps_the_next_switch()
+    test_scan_batch_after_playlist_was_cleared_restarts_playback()
+    print("✓ All folder scanner tests passed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the scaled/flipped frame cache
+"""
+
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QRect, Qt
+from PyQt5.QtGui import QImage, QColor
+
+from frame_cache import FrameCache, render_frame, alpha_mask_region
+
+
+def _make_image(w, h):
+    image = QImage(w, h, QImage.Format_ARGB32)
+    image.fill(QColor(255, 0, 0, 128))
+    return image
+
+
+def test_render_frame_size_and_format():
+    """缩放后的帧应为目标尺寸，翻转不改变尺寸"""
+    pixmap = render_frame(_make_image(40, 20), 80, 40, flipped=True)
+    assert (pixmap.width(), pixmap.height()) == (80, 40)
+    assert pixmap.toImage().hasAlphaChannel()
+
+
+def test_lru_budget_evicts_oldest():
+    """超出字节预算时淘汰最久未使用的帧"""
+    frame_bytes = 10 * 10 * 4
+    cache = FrameCache(max_bytes=frame_bytes * 2)
+    keys = [FrameCache.make_key('a.gif', i, 10, 10, False, 1.0) for i in range(3)]
+    for key in keys[:2]:
+        cache.put(key, render_frame(_make_image(10, 10), 10, 10))
+    assert cache.get(keys[0]) is not None  # keys[0] 变为最近使用
+    cache.put(keys[2], render_frame(_make_image(10, 10), 10, 10))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.size_bytes == frame_bytes * 2
+
+
+def test_clear_resets_bytes():
+    """清空后缓存为空且字节计数归零"""
+    cache = FrameCache()
+    cache.put(FrameCache.make_key('a.gif', 0, 10, 10, True, 2.0), render_frame(_make_image(10, 10), 10, 10))
+    cache.clear()
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_alpha_mask_covers_opaque_pixels_on_grid():
+    """遮罩按网格覆盖所有不透明像素，透明区域不在遮罩内；遮罩随帧缓存、随帧淘汰"""
+    image = QImage(64, 64, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    image.setPixel(20, 30, QColor(0, 0, 255).rgba())
+    mask = alpha_mask_region(image, cell=8)
+    assert mask.boundingRect() == QRect(16, 24, 8, 8)
+    assert alpha_mask_region(render_frame(image, 128, 128), cell=8).contains(QRect(40, 60, 2, 2))
+
+    cache = FrameCache(max_bytes=64 * 64 * 4)
+    key = FrameCache.make_key('a.gif', 0, 64, 64, False, 1.0)
+    cache.put_mask(key, mask)  # 帧不在缓存中时不保存
+    assert cache.get_mask(key) is None
+    cache.put(key, render_frame(image, 64, 64))
+    cache.put_mask(key, mask)
+    assert cache.get_mask(key) == mask
+    cache.put(FrameCache.make_key('a.gif', 1, 64, 64, False, 1.0), render_frame(image, 64, 64))
+    assert cache.get_mask(key) is None
+
+
+def test_scaling_quality_is_part_of_the_key():
+    """平滑/快速缩放的帧分别缓存：自适应画质切换后重新缩放，不沿用另一种方式的帧"""
+    cache = FrameCache()
+    smooth = FrameCache.make_key('a.gif', 0, 64, 64, False, 1.0, Qt.SmoothTransformation)
+    fast = FrameCache.make_key('a.gif', 0, 64, 64, False, 1.0, Qt.FastTransformation)
+    assert smooth == FrameCache.make_key('a.gif', 0, 64, 64, False, 1.0)
+    cache.put(fast, render_frame(_make_image(32, 32), 64, 64, transform_mode=Qt.FastTransformation))
+    assert cache.get(fast) is not None
+    assert cache.get(smooth) is None and cache.misses == 1
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_render_frame_size_and_format()
+    test_lru_budget_evicts_oldest()
+    test_clear_resets_bytes()
+    test_alpha_mask_covers_opaque_pixels_on_grid()
+    test_scaling_quality_is_part_of_the_key()
+    print("✓ All frame cache tests passed!")
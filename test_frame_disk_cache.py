@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script to verify decoded frames round-trip through the memory-mapped disk cache
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtGui import QColor, QImage
+from PyQt5.QtWidgets import QApplication
+
+from frame_disk_cache import FrameDiskCache, CACHE_SUFFIX
+from gif_decoder import DecodedGif
+
+
+def _decoded(path, colors, max_side=None):
+    frames = []
+    for color in colors:
+        frame = QImage(30, 20, QImage.Format_ARGB32_Premultiplied)
+        frame.fill(QColor(*color))
+        frames.append(frame)
+    return DecodedGif(path, frames, [40 + 10 * i for i in range(len(frames))], 3, max_side)
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_store_and_load_mapped_frames():
+    """写入后再读取得到映射自缓存文件的相同帧、延时和循环次数；不同解码档位各自缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        gif = os.path.join(tmp, 'a.gif')
+        _write(gif, b'GIF89a')
+        cache = FrameDiskCache(os.path.join(tmp, 'frames'))
+        assert cache.load(gif, 100) is None
+        cache.store(_decoded(gif, [(255, 0, 0), (0, 0, 255, 128)], 100))
+
+        loaded = cache.load(gif, 100)
+        assert loaded is not None and loaded.mapping is not None
+        assert loaded.delays == [40, 50] and loaded.loop_count == 3 and loaded.max_side == 100
+        assert loaded.frames[0].size() == _decoded(gif, [(0, 0, 0)]).frames[0].size()
+        assert loaded.frames[0].pixelColor(5, 5) == QColor(255, 0, 0)
+        assert loaded.frames[1].pixel(29, 19) == _decoded(gif, [(0, 0, 255, 128)]).frames[0].pixel(29, 19)
+        assert cache.load(gif, 200) is None and cache.load(gif) is None
+
+        cache.store(loaded)  # 已映射自缓存的结果不再写回
+        assert len(os.listdir(cache.cache_dir)) == 1
+
+
+def test_changed_source_and_corrupt_files_miss():
+    """源文件被修改后旧的缓存不再命中；文件头损坏时按未命中处理"""
+    with tempfile.TemporaryDirectory() as tmp:
+        gif = os.path.join(tmp, 'a.gif')
+        _write(gif, b'GIF89a')
+        cache = FrameDiskCache(os.path.join(tmp, 'frames'))
+        cache.store(_decoded(gif, [(255, 0, 0)]))
+        assert cache.load(gif) is not None
+
+        _write(gif, b'GIF89a changed')
+        assert cache.load(gif) is None
+        cache.store(_decoded(gif, [(0, 255, 0)]))
+        cache_file = cache._file_for(gif, None)
+        with open(cache_file, 'r+b') as f:
+            f.write(b'XXXX')
+        assert cache.load(gif) is None
+
+
+def test_evicts_least_recently_used():
+    """总大小超出上限时淘汰最久未使用的缓存文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FrameDiskCache(os.path.join(tmp, 'frames'))
+        paths = [os.path.join(tmp, name) for name in ('a.gif', 'b.gif')]
+        for path in paths:
+            _write(path, b'GIF89a')
+        cache.store(_decoded(paths[0], [(255, 0, 0)]))
+        cache_file = cache._file_for(paths[0], None)
+        os.utime(cache_file, (1, 1))
+        cache.max_bytes = os.path.getsize(cache_file)
+        cache.store(_decoded(paths[1], [(0, 255, 0)]))
+        assert [n for n in os.listdir(cache.cache_dir) if n.endswith(CACHE_SUFFIX)] \
+            == [os.path.basename(cache._file_for(paths[1], None))]
+        assert cache.load(paths[0]) is None and cache.load(paths[1]) is not None
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_store_and_load_mapped_frames()
+    test_changed_source_and_corrupt_files_miss()
+    test_evicts_least_recently_used()
+    print("✓ All frame disk cache tests passed!")
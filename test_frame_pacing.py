@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the frame rate cap and the adaptive frame rate / scaling quality
+"""
+
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from frame_pacing import (FramePacer, ADAPTIVE_LEVELS, FAST_SCALING_LEVEL, EVALUATE_EVERY,
+                          CALM_WINDOWS_TO_RECOVER, LAG_HIGH_MS, PAINT_HIGH_MS)
+
+
+def _window(pacer, lag_ms, paint_ms=0.0):
+    """模拟一个评估窗口的事件循环延迟和绘制耗时"""
+    pacer._lags = [lag_ms] * EVALUATE_EVERY
+    pacer._paint_costs = [paint_ms]
+    pacer._evaluate()
+
+
+def test_frame_cap_merges_frames():
+    """帧率上限内到达的帧合并为一次重绘"""
+    pacer = FramePacer(max_fps=10)
+    assert pacer.effective_fps == 10 and pacer.min_interval_ms == 100.0
+    assert pacer.allow_paint()
+    assert not pacer.allow_paint() and pacer.merged_frames == 1
+    assert 0 < pacer.remaining_ms() <= 101
+    assert FramePacer().allow_paint() and FramePacer().min_interval_ms == 0.0
+
+
+def test_adaptive_steps_down_under_load_and_recovers():
+    """繁忙时逐级降低帧率并改用快速缩放，连续空闲若干窗口后才逐级恢复"""
+    pacer = FramePacer(max_fps=25, adaptive=True)
+    changes = []
+    pacer.changed.connect(lambda: changes.append(pacer.level))
+    assert pacer.effective_fps == 25 and pacer.transform_mode == Qt.SmoothTransformation
+
+    _window(pacer, LAG_HIGH_MS + 10)
+    assert pacer.level == 1 and pacer.effective_fps == min(25, ADAPTIVE_LEVELS[1])
+    _window(pacer, 0.0, PAINT_HIGH_MS + 1)
+    assert pacer.level == FAST_SCALING_LEVEL and pacer.transform_mode == Qt.FastTransformation
+    for _ in range(10):
+        _window(pacer, LAG_HIGH_MS + 10)
+    assert pacer.level == len(ADAPTIVE_LEVELS) - 1
+    assert changes == list(range(1, len(ADAPTIVE_LEVELS)))
+
+    for _ in range(CALM_WINDOWS_TO_RECOVER - 1):
+        _window(pacer, 0.0)
+    assert pacer.level == len(ADAPTIVE_LEVELS) - 1
+    _window(pacer, 0.0)
+    assert pacer.level == len(ADAPTIVE_LEVELS) - 2
+
+    pacer.configure(0, False)
+    assert pacer.level == 0 and pacer.effective_fps == 0
+    assert pacer.transform_mode == Qt.SmoothTransformation and not pacer._probe.isActive()
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_frame_cap_merges_frames()
+    test_adaptive_steps_down_under_load_and_recovers()
+    print("✓ All frame pacing tests passed!")
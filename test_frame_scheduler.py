@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the master frame scheduler coalesces animation and timer wakeups
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtGui import QImage, QMovie
+from PyQt5.QtWidgets import QApplication
+
+from frame_scheduler import FrameScheduler, ScheduledTimer
+from gif_decoder import DecodedGif, DecodedMovie
+
+
+def _run(ms):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec_()
+
+
+def _frames(count):
+    return [QImage(4, 4, QImage.Format_ARGB32_Premultiplied) for _ in range(count)]
+
+
+def test_animations_share_wakeups():
+    """不同时刻启动的多个动画对齐到同一批唤醒上，自动切换也在帧的唤醒中处理"""
+    clock = FrameScheduler()
+    counts = [0, 0, 0]
+    movies = []
+    for i in range(3):
+        movie = DecodedMovie(DecodedGif(f'a{i}.gif', _frames(4), [20] * 4), clock=clock)
+        movie.frameChanged.connect(lambda frame, i=i: counts.__setitem__(i, counts[i] + 1))
+        movie.start()
+        movies.append(movie)
+        time.sleep(0.003)
+    switches = []
+    timer = ScheduledTimer(slack_ms=250, clock=clock)
+    timer.timeout.connect(lambda: switches.append(1))
+    timer.start(300)
+    _run(700)
+    for movie in movies:
+        movie.stop()
+    timer.stop()
+    stats = clock.stats()
+    assert min(counts) >= 20 and len(switches) >= 2
+    # 三个动画各自计时时每秒约 150 次唤醒，共用主时钟后约 50 次
+    assert stats['callbacks_per_wakeup'] > 2.5
+    assert stats['wakeups_per_second'] < 80
+    assert stats['scheduled'] == 0
+
+
+def test_pause_and_finish():
+    """暂停后不再唤醒；有限循环的动画播完后结束"""
+    clock = FrameScheduler()
+    movie = DecodedMovie(DecodedGif('once.gif', _frames(3), [10] * 3, loop_count=0), clock=clock)
+    finished = []
+    movie.finished.connect(lambda: finished.append(1))
+    movie.start()
+    movie.setPaused(True)
+    assert not clock.is_scheduled(movie)
+    movie.setPaused(False)
+    _run(150)
+    assert finished == [1] and movie.state() == QMovie.NotRunning
+    assert not clock.is_scheduled(movie)
+    still = DecodedMovie(DecodedGif('still.gif', _frames(1), [100]), clock=clock)
+    still.start()
+    assert not clock.is_scheduled(still)  # 静态图不需要唤醒
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_animations_share_wakeups()
+    test_pause_and_finish()
+    print("✓ All frame scheduler tests passed!")
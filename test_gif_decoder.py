@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script to verify GIFs are decoded at a bucketed size that follows the window size
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QSize
+from PyQt5.QtWidgets import QApplication
+
+from gif_decoder import (decode_covers, decode_gif, decode_side_for, scaled_decode_size,
+                         DECODE_SIZE_STEP, MIN_DECODE_SIDE)
+
+
+def test_decode_side_is_bucketed():
+    """档位不小于窗口的最长边（设备像素），档内的小幅缩放不改变档位，相邻档位按比例递增"""
+    side = decode_side_for(200, 150)
+    assert 200 <= side < 200 * DECODE_SIZE_STEP
+    assert decode_side_for(175, 10) == side and decode_side_for(150, side - 1) == side
+    bigger = decode_side_for(side + 1, 10)
+    assert side < bigger <= side * DECODE_SIZE_STEP + 1
+    assert decode_side_for(200, 150, 2.0) >= 400
+    assert decode_side_for(1, 1) >= MIN_DECODE_SIDE
+
+
+def test_decode_covers_and_scaled_size():
+    """更大档位（或原尺寸）的帧可用于更小的档位；缩小保持比例且不放大"""
+    assert decode_covers(None, 100) and decode_covers(200, 100) and decode_covers(100, 100)
+    assert not decode_covers(100, 200) and not decode_covers(100, None)
+    assert scaled_decode_size(QSize(400, 200), 100) == QSize(100, 50)
+    assert scaled_decode_size(QSize(300, 900), 90) == QSize(30, 90)
+    assert scaled_decode_size(QSize(80, 60), 100) is None
+    assert scaled_decode_size(QSize(400, 200), None) is None
+    assert scaled_decode_size(QSize(), 100) is None
+
+
+def test_decode_gif_at_window_size():
+    """按档位解码时每帧在解码时即缩小，内存随窗口而非源尺寸增长"""
+    Image = pytest.importorskip('PIL.Image')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'big.gif')
+        frames = [Image.new('RGB', (800, 400), color) for color in ((255, 0, 0), (0, 255, 0))]
+        frames[0].save(path, save_all=True, append_images=frames[1:], duration=50, loop=0)
+        side = decode_side_for(200, 100)
+        small = decode_gif(path, max_side=side)
+        full = decode_gif(path)
+        assert len(small) == len(full) == 2
+        assert max(small.frames[0].width(), small.frames[0].height()) == side
+        assert small.max_side == side and full.max_side is None
+        assert small.nbytes < full.nbytes / 4
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_decode_side_is_bucketed()
+    test_decode_covers_and_scaled_size()
+    test_decode_gif_at_window_size()
+    print("✓ All GIF decoder tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the GIF frame offset index and key-frame seeking
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+Image = pytest.importorskip('PIL.Image')
+ImageDraw = pytest.importorskip('PIL.ImageDraw')
+
+from PyQt5.QtGui import QImage, QImageReader
+from PyQt5.QtWidgets import QApplication
+
+from gif_frames import GifFrameIndex, decode_frame, frame_index_for, scan_gif, seek_movie
+from gif_source import buffer_for, movie_for
+from library_index import LibraryIndex
+
+
+def _write_gif(path, mode, disposal, optimize, count=8):
+    """一个方块从左向右移动的动画"""
+    frames = []
+    for i in range(count):
+        background = (0, 0, 0, 0) if mode == 'RGBA' else (40, 40 + i * 10, 90)
+        image = Image.new(mode, (48, 32), background)
+        ImageDraw.Draw(image).rectangle([i * 4, 6, i * 4 + 10, 24], fill=(255, i * 30, 0, 255)[:len(mode)])
+        frames.append(image)
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=40, loop=0,
+                   disposal=disposal, optimize=optimize)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _sequential_frames(data):
+    buffer = buffer_for(data)
+    reader = QImageReader(buffer, b'gif')
+    frames = []
+    while reader.canRead():
+        image = reader.read()
+        if image.isNull():
+            break
+        frames.append(image.convertToFormat(QImage.Format_ARGB32_Premultiplied))
+    return frames
+
+
+@pytest.mark.parametrize('mode,disposal,optimize,all_keys', [
+    ('RGB', 1, False, True),  # 每帧都覆盖整个画布且不透明
+    ('RGBA', 2, False, True),  # 每帧画完都清为透明
+    ('RGBA', 1, True, False),  # 只存变化区域，依赖之前的画面
+])
+def test_seek_matches_sequential_decode(mode, disposal, optimize, all_keys):
+    """从最近的关键帧解码得到的每一帧都与从第 0 帧顺序解码的结果相同"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data = _write_gif(os.path.join(tmp, 'a.gif'), mode, disposal, optimize)
+        index = scan_gif(data)
+        expected = _sequential_frames(data)
+        assert len(index) == len(expected) == 8 and index.loop_count == -1
+        assert (len(index.key_frames) == 8) == all_keys and index.key_frames[0] == 0
+        for n in range(len(index)):
+            image = decode_frame(data, index, n).convertToFormat(QImage.Format_ARGB32_Premultiplied)
+            assert image == expected[n], n
+        restored = GifFrameIndex.from_bytes(index.to_bytes())
+        assert restored.offsets == index.offsets and restored.key_frames == index.key_frames
+
+
+def test_index_is_stored_and_movie_resumes_at_frame():
+    """帧索引存入库索引（文件变化后失效）；QMovie 定位后从该帧继续并在播完后回到第 0 帧"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'a.gif')
+        _write_gif(path, 'RGB', 1, False)
+        library = LibraryIndex(os.path.join(tmp, 'library_index.sqlite3'))
+        index = frame_index_for(path, library)
+        st = os.stat(path)
+        assert library.load_frame_index(path, st.st_size, st.st_mtime) == index.to_bytes()
+        assert library.load_frame_index(path, st.st_size + 1, st.st_mtime) is None
+
+        movie = movie_for(path)
+        frames = []
+        movie.frameChanged.connect(lambda _: frames.append(movie.currentFrameNumber()))
+        movie.start()
+        movie.setPaused(True)
+        assert seek_movie(movie, path, 6, library)
+        assert movie.currentFrameNumber() == 6 and movie.frameCount() == 8
+        assert movie.state() == movie.Paused
+        frames.clear()
+        movie.setPaused(False)
+        for _ in range(4):
+            movie._advance()
+        assert frames == [7, 0, 1, 2]
+        movie.stop()
+        library.forget_folder(tmp)
+        assert library.load_frame_index(path, st.st_size, st.st_mtime) is None
+        library.close()
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    for case in [('RGB', 1, False, True), ('RGBA', 2, False, True), ('RGBA', 1, True, False)]:
+        test_seek_matches_sequential_decode(*case)
+    test_index_is_stored_and_movie_resumes_at_frame()
+    print("✓ All GIF frame index tests passed!")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the batch GIF optimizer and the side-by-side optimized cache
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+Image = pytest.importorskip('PIL.Image')
+
+import gif_optimize
+from gif_optimize import find_gifs, optimize_file, optimized_path_for, playable_path, OPTIMIZED_DIRNAME
+
+
+def _write_gif(path, colors, size=(120, 80), duration=50):
+    frames = [Image.new('RGB', size, color) for color in colors]
+    # optimize=False 保留连续的重复帧
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=duration, loop=0, optimize=False)
+
+
+def test_duplicate_frames_are_merged_and_downscaled():
+    """连续重复帧合并且总时长不变，按 max_side 缩小，并排缓存生效后播放器读取副本"""
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'a.gif')
+        _write_gif(src, [(255, 0, 0)] * 3 + [(0, 0, 255)] * 2)
+        dst = optimized_path_for(src)
+        assert playable_path(src) == src
+        result = optimize_file(src, dst, max_side=60)
+        assert result['optimized'] and result['bytes_after'] < result['bytes_before']
+        with Image.open(dst) as image:
+            assert max(image.size) == 60
+            durations = []
+            for i in range(image.n_frames):
+                image.seek(i)
+                durations.append(image.info['duration'])
+        assert len(durations) == 2 and sum(durations) == 250
+        assert playable_path(src) == dst
+        # 原文件更新后旧副本失效
+        future = time.time() + 10
+        os.utime(src, (future, future))
+        assert playable_path(src) == src
+
+
+def test_find_gifs_skips_optimized_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'sub', OPTIMIZED_DIRNAME))
+        for rel in ('b.gif', os.path.join('sub', 'a.GIF'), os.path.join('sub', OPTIMIZED_DIRNAME, 'a.GIF'), 'c.png'):
+            open(os.path.join(tmp, rel), 'wb').close()
+        assert find_gifs(tmp) == [os.path.join(tmp, 'b.gif'), os.path.join(tmp, 'sub', 'a.GIF')]
+
+
+def _run_main(*argv):
+    """运行命令行入口，返回 (退出码, 输出)"""
+    out, saved = io.StringIO(), sys.argv
+    sys.argv = ['gif_optimize.py', *argv]
+    try:
+        with contextlib.redirect_stdout(out):
+            code = gif_optimize.main()
+    finally:
+        sys.argv = saved
+    return code, out.getvalue()
+
+
+def test_cache_mode_skips_unshrinkable_files_on_next_run():
+    """并排缓存模式：没有变小的GIF不创建目录、记入清单，第二次运行不再处理任何文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'small'))
+        big = os.path.join(tmp, 'big.gif')
+        _write_gif(big, [(255, 0, 0)] * 4 + [(0, 0, 255)] * 4)
+        tiny = os.path.join(tmp, 'small', 'tiny.gif')
+        Image.new('P', (1, 1)).save(tiny, optimize=True)
+
+        code, out = _run_main(tmp, '--cache', '--max-side', '40', '--jobs', '1')
+        assert code == 0 and 'Optimizing 2 GIF files' in out
+        assert os.path.isfile(optimized_path_for(big))
+        assert not os.path.exists(os.path.join(tmp, 'small', OPTIMIZED_DIRNAME))
+        assert playable_path(tiny) == tiny
+
+        code, out = _run_main(tmp, '--cache', '--max-side', '40', '--jobs', '1')
+        assert code == 0 and 'Optimizing 0 GIF files' in out
+
+        # 原文件被修改后重新处理
+        future = time.time() + 10
+        os.utime(tiny, (future, future))
+        code, out = _run_main(tmp, '--cache', '--max-side', '40', '--jobs', '1')
+        assert 'Optimizing 1 GIF files' in out
+        for directory, subdirs, files in os.walk(tmp):
+            assert subdirs or files, f'empty directory {directory}'
+
+
+if __name__ == '__main__':
+    test_duplicate_frames_are_merged_and_downscaled()
+    test_find_gifs_skips_optimized_cache()
+    test_cache_mode_skips_unshrinkable_files_on_next_run()
+    print("✓ All GIF optimizer tests passed!")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared raw-bytes cache for GIF sources
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication
+
+from gif_source import SourceCache, buffer_for
+
+
+def _write(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'G' * size)
+
+
+def test_files_are_read_into_bytes():
+    """文件（包括大文件）整个读入 bytes，不保留映射，缓存期间文件可被截断或删除；命中时不再读盘"""
+    with tempfile.TemporaryDirectory() as tmp:
+        small, large = os.path.join(tmp, 'small.gif'), os.path.join(tmp, 'large.gif')
+        _write(small, 100)
+        _write(large, 4 * 1024 * 1024)
+        cache = SourceCache()
+        assert isinstance(cache.get(small), bytes)
+        data = cache.get(large)
+        assert isinstance(data, bytes)
+        with open(large, 'r+b') as f:
+            f.truncate(10)
+        os.remove(large)
+        assert data[-1:] == b'G'  # 已读入内存，不受文件截断影响
+        os.remove(small)
+        assert cache.get(small) == b'G' * 100  # 命中缓存，不访问文件系统
+        assert (cache.hits, cache.misses) == (1, 2)
+        cache.invalidate(os.path.join(tmp, 'small'))
+        assert len(cache) == 1
+
+
+def test_budget_evicts_oldest():
+    """超出字节预算时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f'{i}.gif') for i in range(3)]
+        for path in paths:
+            _write(path, 100)
+        cache = SourceCache(max_bytes=250)
+        for path in paths:
+            cache.get(path)
+        assert len(cache) == 2 and cache.size_bytes == 200
+        cache.get(paths[1])
+        assert cache.hits == 1
+
+
+def test_buffer_wraps_data_without_copying():
+    """QBuffer 直接读取原始字节"""
+    data = b'GIF89a' + bytes(range(200))
+    buffer = buffer_for(data)
+    assert bytes(buffer.readAll()) == data
+    assert buffer.source_data is data
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_files_are_read_into_bytes()
+    test_budget_evicts_oldest()
+    test_buffer_wraps_data_without_copying()
+    print("✓ All GIF source tests passed!")
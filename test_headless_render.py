@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the headless render/export pipeline
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication
+
+from headless_render import HeadlessRenderer, build_playlist, play_order, raw_sink
+
+# 1x1 的最小 GIF
+TINY_GIF = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+            b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+
+def test_playlist_and_shuffle_order():
+    """文件夹列表与播放器一致（有序、只含GIF），随机顺序不重复"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('b.gif', 'a.gif', 'notes.txt'):
+            with open(os.path.join(tmp, name), 'wb') as f:
+                f.write(TINY_GIF)
+        assert build_playlist(tmp) == [os.path.join(tmp, 'a.gif'), os.path.join(tmp, 'b.gif')]
+    assert sorted(play_order(10, shuffle=True, seed=3)) == list(range(10))
+
+
+def test_raw_stream_has_one_canvas_per_frame():
+    """每帧输出一张窗口大小的画布，循环播放时命中已缩放帧的缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'a.gif')
+        with open(path, 'wb') as f:
+            f.write(TINY_GIF)
+        renderer = HeadlessRenderer(30, 20, flipped=True)
+        stream = io.BytesIO()
+        assert renderer.render_gif(path, raw_sink(stream), loops=2)
+        assert renderer.stats['frames'] == 2 and renderer.stats['gifs'] == 1
+        assert len(stream.getvalue()) == 2 * 30 * 20 * 4
+        assert renderer.frame_cache.hits == 1
+        assert not renderer.render_gif(os.path.join(tmp, 'missing.gif'))
+        assert renderer.stats['failed'] == 1
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_playlist_and_shuffle_order()
+    test_raw_stream_has_one_canvas_per_frame()
+    print("✓ All headless render tests passed!")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the persistent GIF library index
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from library_index import LibraryIndex, index_path_for_config, INDEX_FILENAME
+
+
+def test_index_path_next_to_config():
+    """索引文件应放在配置文件旁边"""
+    config_path = os.path.join(tempfile.gettempdir(), 'user_config.json')
+    assert index_path_for_config(config_path) == os.path.join(tempfile.gettempdir(), INDEX_FILENAME)
+    assert index_path_for_config(None) is None
+
+
+def test_save_and_load_folder():
+    """保存后能一次读回有序的播放列表，重新保存会替换旧条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LibraryIndex(os.path.join(tmp, INDEX_FILENAME))
+        folder = os.path.join(tmp, 'gif')
+        assert index.load_folder(folder) is None
+
+        entries = [(os.path.join(folder, name), 10, 1.0) for name in ('b.gif', 'a.gif', 'c.gif')]
+        index.save_folder(folder, 123.0, entries)
+        mtime, paths = index.load_folder(folder)
+        assert mtime == 123.0
+        assert paths == sorted(path for path, _, _ in entries)
+
+        index.save_folder(folder, 456.0, entries[:1])
+        assert index.load_folder(folder) == (456.0, [entries[0][0]])
+
+        index.forget_folder(folder)
+        assert index.load_folder(folder) is None
+        index.close()
+
+
+if __name__ == '__main__':
+    test_index_path_next_to_config()
+    test_save_and_load_folder()
+    print("✓ All library index tests passed!")
@@ -19,11 +19,12 @@ def test_flip_functionality():
     """Test the left-right flip functionality"""
     print("Testing left-right flip functionality...")
     
-    # Create a temporary config file
-    config_path = os.path.join(tempfile.gettempdir(), 'test_config.json')
+    # 每个测试用独立的临时目录：配置文件旁边的帧缓存和库索引也随之清理
+    tmp_dir = tempfile.TemporaryDirectory()
+    config_path = os.path.join(tmp_dir.name, 'test_config.json')
     
     # Create test folder with a simple gif (we'll create a mock folder)
-    test_folder = os.path.join(tempfile.gettempdir(), 'test_gifs')
+    test_folder = os.path.join(tmp_dir.name, 'test_gifs')
     os.makedirs(test_folder, exist_ok=True)
     
     # Create a dummy gif file (just an empty file for testing purposes)
@@ -54,6 +55,8 @@ def test_flip_functionality():
         assert '_flipped' in player.__dict__, "Flip state tracking variable exists"
         print("✓ Flip state tracking is implemented")
         
+        player._prefetcher.shutdown()
+        player._config_store.flush()
         player.close()
         print("✓ Left-right flip functionality test passed!")
         
@@ -62,12 +65,7 @@ def test_flip_functionality():
         return False
     finally:
         # Cleanup
-        if os.path.exists(test_gif_path):
-            os.remove(test_gif_path)
-        if os.path.exists(test_folder):
-            os.rmdir(test_folder)
-        if os.path.exists(config_path):
-            os.remove(config_path)
+        tmp_dir.cleanup()
     
     return True
 
@@ -75,11 +73,12 @@ def test_single_file_functionality():
     """Test the single file selection functionality"""
     print("\nTesting single file selection functionality...")
     
-    # Create a temporary config file
-    config_path = os.path.join(tempfile.gettempdir(), 'test_config_single.json')
+    # 每个测试用独立的临时目录：配置文件旁边的帧缓存和库索引也随之清理
+    tmp_dir = tempfile.TemporaryDirectory()
+    config_path = os.path.join(tmp_dir.name, 'test_config_single.json')
     
     # Create test folder and file
-    test_folder = os.path.join(tempfile.gettempdir(), 'test_gifs_single')
+    test_folder = os.path.join(tmp_dir.name, 'test_gifs_single')
     os.makedirs(test_folder, exist_ok=True)
     test_gif_path = os.path.join(test_folder, 'single_test.gif')
     with open(test_gif_path, 'w') as f:
@@ -105,6 +104,8 @@ def test_single_file_functionality():
         assert hasattr(player, 'set_single_gif_file'), "set_single_gif_file method exists"
         print("✓ set_single_gif_file method is implemented")
         
+        player._prefetcher.shutdown()
+        player._config_store.flush()
         player.close()
         print("✓ Single file selection functionality test passed!")
         
@@ -113,12 +114,7 @@ def test_single_file_functionality():
         return False
     finally:
         # Cleanup
-        if os.path.exists(test_gif_path):
-            os.remove(test_gif_path)
-        if os.path.exists(test_folder):
-            os.rmdir(test_folder)
-        if os.path.exists(config_path):
-            os.remove(config_path)
+        tmp_dir.cleanup()
     
     return True
 
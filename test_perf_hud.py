@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the perf HUD statistics, histogram and JSON export
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QApplication
+
+from perf_hud import PerfStats, HISTOGRAM_BUCKETS, draw_hud
+
+
+def _paint_at(stats, times, costs):
+    """按给定的时间戳（秒）记录绘制，不依赖真实的时钟"""
+    for t, cost in zip(times, costs):
+        stats.record_paint(cost)
+        stats._paint_times[-1] = t
+
+
+def test_snapshot_statistics():
+    """实际/声明帧率、绘制耗时分位数和帧间隔直方图"""
+    stats = PerfStats(window=100)
+    _paint_at(stats, [0.0, 0.02, 0.04, 0.06, 0.16], [1.0, 2.0, 3.0, 4.0, 10.0])
+    for _ in range(4):
+        stats.record_frame(20)
+    stats.record_frame(0)  # 未声明延时的帧不计入
+    snap = stats.snapshot()
+    assert abs(snap['real_fps'] - 25.0) < 1e-6
+    assert snap['declared_fps'] == 50.0
+    assert snap['paint_ms_p50'] == 3.0 and snap['paint_ms_p99'] == 10.0
+    assert snap['histogram_bounds_ms'] == list(HISTOGRAM_BUCKETS)
+    assert sum(snap['histogram']) == 4
+    assert snap['histogram'][HISTOGRAM_BUCKETS.index(33)] == 3
+    assert snap['histogram'][HISTOGRAM_BUCKETS.index(100)] == 1
+    assert snap['wakeups_per_second'] is None  # 没有主时钟
+
+
+def test_set_gif_resets_window_and_records_source():
+    """切换GIF时清空上一个GIF的帧统计，记录解码耗时、内存和帧来源；滚动窗口只保留最近的样本"""
+    stats = PerfStats(window=3)
+    _paint_at(stats, [0.0, 0.1, 0.2, 0.3, 0.4], [5.0] * 5)
+    assert len(stats.intervals()) == 2
+    stats.set_gif('a.gif', 12.5, 4096, 'prefetch', 0.5)
+    snap = stats.snapshot()
+    assert snap['gif'] == 'a.gif' and snap['decode_ms'] == 12.5 and snap['memory_bytes'] == 4096
+    assert snap['load_source'] == 'prefetch' and snap['prefetch_hit_rate'] == 0.5
+    assert snap['real_fps'] == 0.0 and snap['paint_ms_p50'] == 0.0 and sum(snap['histogram']) == 0
+
+    image = QImage(200, 200, QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    painter = QPainter(image)
+    draw_hud(painter, QRect(0, 0, 200, 200), stats)
+    painter.end()
+    assert image.pixelColor(5, 5).alpha() > 0
+
+
+def test_dump_writes_samples():
+    """导出的 JSON 包含统计结果和原始样本"""
+    stats = PerfStats()
+    _paint_at(stats, [0.0, 0.05], [1.5, 2.5])
+    stats.set_gif('b.gif', None, None)
+    _paint_at(stats, [1.0, 1.04], [0.5, 0.7])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'perf.json')
+        stats.dump(path)
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    assert data['gif'] == 'b.gif' and data['load_source'] is None
+    assert data['paint_costs_ms'] == [0.5, 0.7]
+    assert abs(data['frame_intervals_ms'][0] - 40.0) < 1e-6
+    assert 'timestamp' in data
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_snapshot_statistics()
+    test_set_gif_resets_window_and_records_source()
+    test_dump_writes_samples()
+    print("✓ All perf HUD tests passed!")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared decoded-frame store used by multiple windows
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage
+
+from gif_decoder import DecodedGif, DecodedMovie, decode_side_for
+from pet_windows import SharedFrameStore
+
+
+def _run(ms):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec_()
+
+
+def _wait_for(condition, timeout_ms=3000):
+    for _ in range(timeout_ms // 20):
+        if condition():
+            return True
+        _run(20)
+    return condition()
+
+
+def _decoded(path, max_side):
+    image = QImage(max_side or 64, max_side or 64, QImage.Format_ARGB32_Premultiplied)
+    return DecodedGif(path, [image], [100], max_side=max_side)
+
+
+def test_same_gif_is_loaded_once_and_released_by_refcount():
+    """同一GIF同一档位只加载一次，最后一个窗口释放后才移出共享表"""
+    store = SharedFrameStore()
+    loads = []
+
+    def loader(path, max_side):
+        loads.append((path, max_side))
+        return _decoded(path, max_side)
+
+    first = store.acquire('a.gif', 100, loader)
+    second = store.acquire('a.gif', 100, loader)
+    assert first is second and loads == [('a.gif', 100)]
+    assert store.refs(first) == 2
+    store.release(first)
+    assert len(store) == 1
+    store.release(second)
+    assert len(store) == 0
+
+
+def test_larger_decode_is_shared_when_loader_misses():
+    """加载不到所需档位时，共用其他窗口正在使用的更大档位的帧"""
+    store = SharedFrameStore()
+    big = store.acquire('a.gif', 200, lambda path, side: _decoded(path, side))
+    small = store.acquire('a.gif', 100, lambda path, side: None)
+    assert small is big
+    assert store.acquire('a.gif', 400, lambda path, side: None) is None
+    assert store.acquire('b.gif', 100, lambda path, side: None) is None
+    assert store.refs(big) == 2
+
+
+def test_main_window_and_companion_share_one_decode():
+    """预取未命中时主窗口先用 QMovie 播放，预取完成后主窗口和陪伴窗口共用同一份已解码的帧；
+    陪伴窗口调整大小跨档后按新档位重新取帧"""
+    Image = pytest.importorskip('PIL.Image')
+    from transparent_gif_player import TransparentGifPlayer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, color in (('a.gif', (255, 0, 0)), ('b.gif', (0, 0, 255))):
+            path = os.path.join(tmp, name)
+            frames = [Image.new('RGB', (400, 300), color) for _ in range(3)]
+            frames[0].save(path, save_all=True, append_images=frames[1:], duration=40, loop=0, optimize=False)
+            paths.append(path)
+        player = TransparentGifPlayer(tmp, config_path=os.path.join(tmp, 'user_config.json'))
+        player.gif_list = paths
+        player.set_gif(paths[0])
+        assert not isinstance(player.movie, DecodedMovie)
+        assert _wait_for(lambda: isinstance(player.movie, DecodedMovie))
+        window = player._pets.add_window(paths[0], save=False)
+        assert isinstance(window.movie, DecodedMovie)
+        assert window.movie.decoded is player.movie.decoded
+        assert player._frame_store.refs(player.movie.decoded) == 2 and len(player._frame_store) == 1
+
+        window.resize(360, 360)
+        window._update_decode_size()
+        assert window._decode_side == decode_side_for(360, 360, window.devicePixelRatioF())
+        assert window.movie.frameRect().width() > player.movie.frameRect().width()
+        assert player._frame_store.refs(player.movie.decoded) == 1
+
+        player._pets.remove_window(window)
+        player._release_movie()
+        assert len(player._frame_store) == 0
+        player._prefetcher.shutdown()
+        player._config_store.flush()
+        player.close()
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_same_gif_is_loaded_once_and_released_by_refcount()
+    test_larger_decode_is_shared_when_loader_misses()
+    test_main_window_and_companion_share_one_decode()
+    print("✓ All pet window tests passed!")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script to verify playback pauses while the window is hidden, minimized or transparent
+"""
+
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication, QLabel
+
+from playback_power import PlaybackGovernor, HIDDEN, MINIMIZED, TRANSPARENT
+
+
+class _Movie:
+    """只记录 setPaused 调用的动画替身"""
+
+    def __init__(self):
+        self.calls = []
+
+    def setPaused(self, paused):
+        self.calls.append(paused)
+
+
+def test_pauses_while_hidden_and_resumes_on_show():
+    """窗口隐藏时接管的动画立即暂停，显示后恢复；原因没有变化时不重复暂停"""
+    widget = QLabel()
+    governor = PlaybackGovernor(widget)
+    movie = _Movie()
+    governor.refresh()
+    governor.attach(movie)
+    assert governor.paused and HIDDEN in governor.reasons
+    assert movie.calls == [True]
+    governor.refresh()
+    assert movie.calls == [True]
+
+    widget.show()
+    QApplication.processEvents()
+    governor.refresh()
+    assert not governor.paused and not governor.reasons
+    assert movie.calls == [True, False]
+    widget.close()
+
+
+def test_minimized_and_transparent_pause():
+    """最小化或完全透明时暂停，恢复后继续；释放动画后不再操作它"""
+    widget = QLabel()
+    widget.show()
+    QApplication.processEvents()
+    governor = PlaybackGovernor(widget)
+    movie = _Movie()
+    governor.attach(movie)
+    assert not governor.paused and movie.calls == []
+
+    widget.showMinimized()
+    QApplication.processEvents()
+    governor.refresh()
+    assert governor.paused and MINIMIZED in governor.reasons
+    widget.showNormal()
+    QApplication.processEvents()
+    governor.refresh()
+    assert not governor.paused
+
+    widget.setWindowOpacity(0.0)
+    governor.refresh()
+    assert governor.paused and governor.reasons == {TRANSPARENT}
+    governor.detach()
+    widget.setWindowOpacity(1.0)
+    governor.refresh()
+    assert movie.calls == [True, False, True]
+    widget.close()
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_pauses_while_hidden_and_resumes_on_show()
+    test_minimized_and_transparent_pause()
+    print("✓ All playback power tests passed!")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script to verify single-instance command forwarding over the local socket
+"""
+
+import os
+import socket
+import sys
+import threading
+import uuid
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QDir, QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from single_instance import CommandServer, parse_command, send_commands, NO_REPLY
+
+
+def test_parse_command():
+    """命令名不区分大小写，参数保留空格，未知命令返回 None"""
+    assert parse_command('NEXT\n') == ('next', '')
+    assert parse_command('folder /tmp/my gifs') == ('folder', '/tmp/my gifs')
+    assert parse_command('rm -rf') is None
+
+
+def test_commands_are_forwarded_to_running_instance():
+    """没有实例时 send_commands 返回 None；有实例时逐条执行并回复 ok/error"""
+    name = f'gif-player-test-{uuid.uuid4().hex[:8]}'
+    assert send_commands(name, ['show']) is None
+
+    received = []
+    server = CommandServer(name, lambda cmd, arg: received.append((cmd, arg)) or (None if cmd != 'file' else 'bad'))
+    assert server.listen()
+    result = {}
+    # 客户端使用阻塞调用，放在线程中，主线程运行事件循环处理服务端
+    client = threading.Thread(target=lambda: result.setdefault('replies', send_commands(name, ['next', 'file x', 'oops'])))
+    client.start()
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.timeout.connect(lambda: not client.is_alive() and loop.quit())
+    timer.start(10)
+    QTimer.singleShot(5000, loop.quit)
+    loop.exec_()
+    client.join()
+    server.close()
+    assert received == [('next', ''), ('file', 'x')]
+    assert result['replies'] == ['ok', 'error bad', 'error unknown command: oops']
+
+
+def test_running_instance_keeps_its_socket_and_stale_socket_is_replaced():
+    """另一个实例仍在监听（即使没有处理事件）时不抢占它的套接字；遗留的套接字文件被清理后正常监听"""
+    name = f'gif-player-test-{uuid.uuid4().hex[:8]}'
+    first = CommandServer(name, lambda cmd, arg: None)
+    assert first.listen()
+    second = CommandServer(name, lambda cmd, arg: None)
+    assert not second.listen()
+    # 第一个实例没有运行事件循环，等不到回复：未回复的命令记为失败，启动器据此以非零状态退出
+    assert send_commands(name, ['next', 'show'], timeout_ms=20) == [NO_REPLY, NO_REPLY]
+    first.close()
+    second.close()
+
+    if sys.platform == 'win32':
+        pytest.skip('named pipes leave no socket file behind')
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(os.path.join(QDir.tempPath(), name))
+    stale.close()  # 套接字文件还在，但已没有进程监听
+    server = CommandServer(name, lambda cmd, arg: None)
+    assert server.listen()
+    server.close()
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_parse_command()
+    test_commands_are_forwarded_to_running_instance()
+    test_running_instance_keeps_its_socket_and_stale_socket_is_replaced()
+    print("✓ All single instance tests passed!")
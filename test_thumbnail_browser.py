@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the thumbnail cache and on-demand thumbnail loading
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QEventLoop, QTimer, Qt
+from PyQt5.QtGui import QColor, QImage
+from PyQt5.QtWidgets import QApplication
+
+from thumbnail_browser import THUMBNAIL_SIDE, ThumbnailCache, ThumbnailLoader, ThumbnailModel
+
+
+def _write_image(path, width, height):
+    image = QImage(width, height, QImage.Format_ARGB32)
+    image.fill(QColor(0, 128, 255))
+    assert image.save(path, 'PNG')  # 按内容识别格式，不需要真正的 GIF
+
+
+def test_cache_is_keyed_by_mtime():
+    """GIF 修改后旧缩略图不再命中"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'a.gif')
+        _write_image(path, 20, 10)
+        cache = ThumbnailCache(os.path.join(tmp, 'thumbnails'))
+        assert cache.load(path) is None
+        cache.store(path, QImage(path))
+        assert cache.load(path).size() == QImage(path).size()
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        assert cache.load(path) is None
+
+
+def test_model_loads_requested_rows_in_background():
+    """只有被请求的行会加载缩略图，加载完成后发出 dataChanged 并写入磁盘缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f'{i}.gif') for i in range(3)]
+        for path in paths:
+            _write_image(path, 400, 200)
+        cache = ThumbnailCache(os.path.join(tmp, 'thumbnails'))
+        loader = ThumbnailLoader(cache)
+        model = ThumbnailModel(loader)
+        model.set_playlist(paths)
+        changed = []
+        model.dataChanged.connect(lambda first, last, roles: changed.append(first.row()))
+        index = model.index(1)
+        assert model.data(index) == '1.gif'
+        model.data(index, Qt.DecorationRole)  # 触发加载
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(lambda: changed and loop.quit())
+        timer.start(10)
+        QTimer.singleShot(5000, loop.quit)
+        loop.exec_()
+        loader.shutdown()
+        assert changed == [1]
+        pixmap = model.data(index, Qt.DecorationRole)
+        assert (pixmap.width(), pixmap.height()) == (THUMBNAIL_SIDE, THUMBNAIL_SIDE // 2)
+        assert cache.load(paths[1]) is not None and cache.load(paths[0]) is None
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_cache_is_keyed_by_mtime()
+    test_model_loads_requested_rows_in_background()
+    print("✓ All thumbnail browser tests passed!")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script to verify playing GIFs straight from ZIP archives
+"""
+
+import os
+import sys
+import tempfile
+import zipfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication
+
+from gif_decoder import decode_gif
+from gif_source import image_size, invalidate_sources, movie_for, source_exists
+from zip_source import close_archive, list_archive, member_path, open_archive, split_member
+
+
+# 1x1 的最小 GIF
+TINY_GIF = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+            b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+
+def test_split_member():
+    assert split_member('/a/pack.zip::x/y.gif') == ('/a/pack.zip', 'x/y.gif')
+    assert split_member('/a/b.gif') is None
+    assert split_member('/a/notes::b.gif') is None
+
+
+def test_archive_lists_gifs_and_stays_open():
+    """只列出 GIF 成员（有序）；同一压缩包在多次读取之间保持打开，修改后重新打开"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, 'pack.zip')
+        with zipfile.ZipFile(archive, 'w') as z:
+            z.writestr('b/2.gif', b'GIF89a')
+            z.writestr('a.gif', b'GIF89a')
+            z.writestr('readme.txt', b'hi')
+            z.writestr('dir/', b'')
+        assert list_archive(archive) == [member_path(archive, 'a.gif'), member_path(archive, 'b/2.gif')]
+        assert open_archive(archive) is open_archive(archive)
+        assert source_exists(member_path(archive, 'a.gif'))
+        assert not source_exists(member_path(archive, 'missing.gif'))
+
+        first = open_archive(archive)
+        with zipfile.ZipFile(archive, 'a') as z:
+            z.writestr('c.gif', b'GIF89a')
+        os.utime(archive, ns=(0, os.stat(archive).st_mtime_ns + 10 ** 9))
+        assert open_archive(archive) is not first
+        assert len(list_archive(archive)) == 3
+
+
+def test_members_are_decoded_from_memory():
+    """压缩包成员直接从映射中解压并解码，不会写到磁盘"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, 'pack.zip')
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as z:
+            z.writestr('stickers/a.gif', TINY_GIF)
+        path = member_path(archive, 'stickers/a.gif')
+        assert (image_size(path).width(), image_size(path).height()) == (1, 1)
+        decoded = decode_gif(path)
+        assert decoded is not None and len(decoded.frames) == 1
+        assert os.listdir(tmp) == ['pack.zip']
+
+
+def test_closed_or_broken_archive_reads_fail_softly():
+    """关闭后的压缩包解除映射，旧句柄读取只抛 OSError；成员读不出时得到无效的动画而不是出错"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, 'pack.zip')
+        with zipfile.ZipFile(archive, 'w') as z:
+            z.writestr('a.gif', TINY_GIF)
+        stale = open_archive(archive)
+        close_archive(archive)
+        assert stale._mapping.closed
+        try:
+            stale.read('a.gif')
+        except OSError:
+            pass
+        else:
+            raise AssertionError('reading a closed archive should raise OSError')
+        assert open_archive(archive) is not stale
+
+        path = member_path(archive, 'missing.gif')
+        invalidate_sources(path)
+        assert not movie_for(path).isValid()
+        assert not image_size(path).isValid()
+        close_archive(archive)
+
+
+def test_player_closes_archive_when_library_changes():
+    """播放列表从压缩包换到文件夹后，压缩包不再保持映射"""
+    from transparent_gif_player import TransparentGifPlayer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, 'pack.zip')
+        with zipfile.ZipFile(archive, 'w') as z:
+            z.writestr('a.gif', TINY_GIF)
+        folder = os.path.join(tmp, 'gifs')
+        os.makedirs(folder)
+        with open(os.path.join(folder, 'b.gif'), 'wb') as f:
+            f.write(TINY_GIF)
+        player = TransparentGifPlayer(archive, config_path=os.path.join(tmp, 'user_config.json'))
+        player.set_gif_folder(archive, save_config=False)
+        mapped = open_archive(archive)
+        assert player.gif_list == [member_path(archive, 'a.gif')]
+        player.set_gif_folder(folder, save_config=False)
+        assert mapped._mapping.closed
+        player._stop_scanner()
+        player._prefetcher.shutdown()
+        player._config_store.flush()
+        player.close()
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    test_split_member()
+    test_archive_lists_gifs_and_stays_open()
+    test_members_are_decoded_from_memory()
+    test_closed_or_broken_archive_reads_fail_softly()
+    test_player_closes_archive_when_library_changes()
+    print("✓ All ZIP source tests passed!")
@@ -0,0 +1,248 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, QAbstractListModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QListView, QVBoxLayout, QWidget
+
+from gif_source import read_first_frame, source_stat
+
+THUMBNAIL_DIRNAME = 'thumbnails'
+THUMBNAIL_SIDE = 96  # 缩略图最长边（像素）
+MEMORY_THUMBNAILS = 600  # 内存中保留的缩略图数量（约 20 MB）
+MAX_PENDING = 256  # 排队中的任务上限，快速滚动时丢弃最早的请求
+
+
+def thumbnail_dir_for_config(config_path):
+    """缩略图缓存目录放在 user_config.json 旁边；没有配置文件时只在内存中缓存"""
+    if not config_path:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), THUMBNAIL_DIRNAME)
+
+
+class ThumbnailCache:
+    """磁盘缩略图缓存：每个GIF的首帧缩略图存为一个 PNG，文件名由路径、mtime 和大小的哈希决定
+
+    GIF 被修改后键随之变化，旧缩略图不再命中。load/store 可在工作线程中调用。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _file_for(self, path):
+        try:
+            st = source_stat(path)
+        except OSError:
+            return None
+        key = f'{os.path.abspath(path)}\0{st.st_mtime_ns}\0{st.st_size}'.encode('utf-8', 'surrogatepass')
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest() + '.png')
+
+    def load(self, path):
+        """返回缓存的缩略图 QImage，没有或已过期时返回 None"""
+        file_path = self._file_for(path)
+        if file_path is None or not os.path.exists(file_path):
+            return None
+        image = QImage(file_path)
+        return None if image.isNull() else image
+
+    def store(self, path, image):
+        """写入缩略图（先写临时文件再替换，其他线程不会读到半个文件）"""
+        file_path = self._file_for(path)
+        if file_path is None:
+            return
+        tmp_path = f'{file_path}.{os.getpid()}.{id(image)}.tmp'
+        if image.save(tmp_path, 'PNG'):
+            os.replace(tmp_path, file_path)
+
+
+def make_thumbnail(path, side=THUMBNAIL_SIDE):
+    """读取GIF的首帧并缩小到最长边不超过 side，失败时返回 None"""
+    def fit(size):
+        if max(size.width(), size.height()) > side:
+            return size.scaled(side, side, Qt.KeepAspectRatio)
+        return None
+    image = read_first_frame(path, fit)
+    if image.isNull():
+        return None
+    return image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+
+
+class _ThumbnailSignals(QObject):
+    """工作线程回传结果用的信号（跨线程自动排队到 GUI 线程）"""
+    done = pyqtSignal(str, object)
+
+
+class _ThumbnailTask(QRunnable):
+    """在工作线程中读取或生成一个缩略图"""
+
+    def __init__(self, path, cache, signals):
+        super().__init__()
+        self.setAutoDelete(False)  # 由 ThumbnailLoader 持有，排队中的任务可以被撤回
+        self.path = path
+        self._cache = cache
+        self._signals = signals
+
+    def run(self):
+        image = None
+        try:
+            if self._cache is not None:
+                image = self._cache.load(self.path)
+            if image is None:
+                image = make_thumbnail(self.path)
+                if image is not None and self._cache is not None:
+                    self._cache.store(self.path, image)
+        except Exception as e:
+            print(f"DEBUG: Thumbnail failed for {self.path}: {e}")
+            image = None
+        self._signals.done.emit(self.path, image)
+
+
+class ThumbnailLoader(QObject):
+    """按需在线程池中加载缩略图，结果转成 QPixmap 按 LRU 保存在内存中
+
+    后请求的先加载（视图只为可见的格子请求），排队的请求超过 MAX_PENDING 时撤回最早的。
+    """
+
+    thumbnail_ready = pyqtSignal(str)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self._cache = cache
+        self._pixmaps = OrderedDict()  # path -> QPixmap，失败的为 None
+        self._pending = OrderedDict()  # path -> _ThumbnailTask
+        self._priority = 0
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, min(4, QThreadPool.globalInstance().maxThreadCount() // 2)))
+        self._signals = _ThumbnailSignals()
+        self._signals.done.connect(self._on_done)
+
+    def get(self, path):
+        """已加载的缩略图；尚未加载时发起加载并返回 None"""
+        if path in self._pixmaps:
+            self._pixmaps.move_to_end(path)
+            return self._pixmaps[path]
+        if path not in self._pending:
+            self._request(path)
+        return None
+
+    def _request(self, path):
+        while len(self._pending) >= MAX_PENDING:
+            old_path, old_task = next(iter(self._pending.items()))
+            if not self._pool.tryTake(old_task):
+                break  # 最早的任务已在运行，等它完成
+            del self._pending[old_path]
+        task = _ThumbnailTask(path, self._cache, self._signals)
+        self._pending[path] = task
+        self._priority += 1
+        self._pool.start(task, self._priority)
+
+    def _on_done(self, path, image):
+        if self._pending.pop(path, None) is None:
+            return
+        self._pixmaps[path] = QPixmap.fromImage(image) if image is not None else None
+        while len(self._pixmaps) > MEMORY_THUMBNAILS:
+            self._pixmaps.popitem(last=False)
+        self.thumbnail_ready.emit(path)
+
+    def shutdown(self):
+        """撤回排队中的任务并等待正在运行的任务结束"""
+        self._pool.clear()
+        self._pool.waitForDone()
+        self._pending.clear()
+
+
+class ThumbnailModel(QAbstractListModel):
+    """把播放列表（列表或 CompactPlaylist）呈现为缩略图列表，不复制路径，只为视图请求的行加载缩略图"""
+
+    def __init__(self, loader, parent=None):
+        super().__init__(parent)
+        self._loader = loader
+        self._playlist = []
+        self._row_count = 0
+        self._rows = {}  # 等待缩略图的路径 -> 行号
+        self._placeholder = QPixmap(THUMBNAIL_SIDE, THUMBNAIL_SIDE)
+        self._placeholder.fill(Qt.transparent)
+        loader.thumbnail_ready.connect(self._on_thumbnail_ready)
+
+    def set_playlist(self, playlist, appended=False):
+        """播放列表被替换或增删条目后调用；appended 表示同一个列表只在末尾追加了条目（递归扫描）"""
+        count = len(playlist)
+        if appended and playlist is self._playlist and count >= self._row_count:
+            if count > self._row_count:
+                self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+                self._row_count = count
+                self.endInsertRows()
+            return
+        self.beginResetModel()
+        self._playlist = playlist
+        self._row_count = count
+        self._rows.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._row_count:
+            return None
+        path = self._playlist[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.ToolTipRole:
+            return path
+        if role == Qt.DecorationRole:
+            pixmap = self._loader.get(path)
+            if pixmap is None:
+                self._rows[path] = index.row()
+                return self._placeholder
+            return pixmap
+        return None
+
+    def _on_thumbnail_ready(self, path):
+        row = self._rows.pop(path, None)
+        if row is not None and row < len(self._playlist) and self._playlist[row] == path:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class ThumbnailBrowser(QWidget):
+    """当前GIF库的缩略图网格窗口，选中（双击或回车）某一格时调用 on_pick(行号)"""
+
+    def __init__(self, loader, on_pick, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle('GIF缩略图')
+        self.resize(720, 520)
+        self._on_pick = on_pick
+        self.model = ThumbnailModel(loader, self)
+        self.view = QListView(self)
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)  # 不逐行询问尺寸，上万个条目也能流畅滚动
+        self.view.setLayoutMode(QListView.Batched)
+        self.view.setIconSize(QSize(THUMBNAIL_SIDE, THUMBNAIL_SIDE))
+        self.view.setGridSize(QSize(THUMBNAIL_SIDE + 24, THUMBNAIL_SIDE + 36))
+        self.view.setWordWrap(False)
+        self.view.setTextElideMode(Qt.ElideMiddle)
+        self.view.setModel(self.model)
+        self.view.activated.connect(lambda index: self._on_pick(index.row()))
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.view)
+
+    def set_playlist(self, playlist, title=None, appended=False):
+        """换成新的播放列表（或同一列表追加了条目），尽量保持滚动位置"""
+        scroll = self.view.verticalScrollBar().value()
+        self.model.set_playlist(playlist, appended)
+        self.view.verticalScrollBar().setValue(scroll)
+        if title:
+            self.setWindowTitle(f'GIF缩略图 - {title}')
+
+    def select(self, row):
+        """选中并滚动到某一行"""
+        if 0 <= row < self.model.rowCount():
+            index = self.model.index(row)
+            self.view.setCurrentIndex(index)
+            self.view.scrollTo(index, QListView.PositionAtCenter)
@@ -1,13 +1,35 @@
+import time
+
+# 进程启动时间，用于测量首帧耗时（time-to-first-frame）；在导入 PyQt 之前记录，导入耗时也计入首帧
+_PROCESS_START = time.perf_counter()
+
 import sys
 import os
-import json
+import bisect
+import heapq
 from PyQt5.QtWidgets import QApplication, QLabel, QMenu, QAction, QFileDialog, QSystemTrayIcon, QStyle, QMessageBox
-from PyQt5.QtCore import Qt, QSize, QTimer, QEvent
-from PyQt5.QtGui import QMovie, QPainter, QIcon
+from PyQt5.QtCore import Qt, QSize, QTimer, QEvent, QRect
+from PyQt5.QtGui import QMovie, QPainter, QIcon, QGuiApplication, QRegion
+
+# 首帧之前只导入窗口、解码和播放需要的模块；库索引（sqlite3）、文件夹扫描、多窗口、
+# 缩略图、单实例（QtNetwork）等模块在第一次使用时才导入
+from frame_cache import FrameCache, render_frame, fit_rect, alpha_mask_region
+from gif_decoder import DecodedMovie, decode_covers, decode_side_for, scaled_decode_size
+from gif_prefetch import GifPrefetcher
+from zip_source import close_archive, is_archive, is_library, list_archive, split_member
+from gif_source import movie_for, image_size, invalidate_sources, source_exists
+from folder_watcher import FolderWatcher
+from playback_power import PlaybackGovernor
+from frame_pacing import FramePacer
+from frame_scheduler import ScheduledTimer, master_clock
+from dirty_rects import DirtyTracker, map_to_widget
+from frame_disk_cache import FrameDiskCache, cache_dir_for_config
+from config_store import ConfigStore
+from perf_hud import PerfStats, draw_hud
+from startup import StartupTimer, snapshot_path_for_config, load_snapshot, save_snapshot
 
-# 导入编译后的资源文件
-# 确保您已经运行了 'pyrcc5 resources.qrc -o resources_rc.py' 命令
-import resources_rc
+STARTUP_FALLBACK_MS = 1000  # 窗口迟迟没有绘制时，最晚在此时间后完成启动
+SWITCH_SLACK_MS = 250  # 自动切换可提前到这一范围内的动画帧唤醒中处理，不单独唤醒
 
 class TransparentGifPlayer(QLabel):
     def __init__(self, gif_folder, config_path=None):
@@ -16,11 +38,228 @@ class TransparentGifPlayer(QLabel):
         # 托盘图标设置
         self._always_on_top = True  # 先定义，后面读取配置会覆盖
 
-        # 检查系统托盘是否可用，否则弹窗提示
+        # 托盘和托盘菜单在首帧绘制后再创建（见 _finish_startup）
+        self.tray_icon = None
+
+        # 设置窗口标志：无边框、置顶、透明
+        # 只用 FramelessWindowHint，避免 Qt.Tool 导致无法 Alt+Tab/任务栏找回
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
+        self.setAttribute(Qt.WA_TranslucentBackground, True)
+        
+        self._default_size = QSize(200, 200)
+        self.resize(self._default_size)
+        self._margin = 8  # 边缘判定宽度
+        self._interval = 60_000  # 默认1分钟
+        self._auto_switch = True
+        
+        # 自动切换与所有动画帧共用主时钟，切换在帧的同一次唤醒中处理
+        self._timer = ScheduledTimer(self, slack_ms=SWITCH_SLACK_MS)
+        self._timer.timeout.connect(self.next_gif)
+        # 省电播放：窗口隐藏/最小化/不可见时暂停解码，恢复时从原帧继续
+        self._playback = PlaybackGovernor(self)
+        self.setAlignment(Qt.AlignCenter)
+        
+        self._resizing = False
+        self._resize_dir = None
+        self._mouse_pos = None
+        self._dragging = False
+        self._drag_pos = None
+        self._click_pos = None
+        self._moved = False
+        
+        self.movie = None
+        self.gif_index = 0
+        self.gif_list = []
+        self._index_is_next = False  # 当前GIF已从播放列表中删除，gif_index 已指向原来的下一个
+        self._config_path = config_path
+        self._user_gif_folder = None
+        self._flipped = False  # 左右翻转状态
+        self._single_file_mode = False  # 单文件模式标志
+        self._current_gif = None  # 当前播放的GIF路径，用作帧缓存键
+        self._frame_cache = FrameCache()  # 已缩放/翻转帧的缓存（与陪伴窗口共用）
+        self._frame_store = None  # 各窗口正在播放的已解码GIF，按引用计数共享（见 _ensure_pets）
+        self._prefetch_depth = 1  # 前后各预取的GIF数量
+        self._load_source = None  # 最近一次 _load_decoded 取到的帧来自预取（prefetch）还是磁盘缓存（disk）
+        self._scanner = None  # 后台文件夹扫描线程
+        self._scan_generation = 0  # 每次扫描递增，用于丢弃过期扫描的结果
+        self._scan_folder = None
+        self._scan_save_config = False
+        self._scan_started = False
+        self._watch_folder = True  # 监视文件夹变化并增量更新播放列表
+        self._recursive = False  # 递归播放子文件夹中的GIF（紧凑播放列表）
+        self._shuffle = False  # 随机播放（不重复）
+        self._shuffle_order = None
+        self._locating_gif = None  # 递归模式下已在播放、但所在目录尚未扫描到的GIF
+        self._max_fps = 0  # 帧率上限，0 表示不限制
+        self._adaptive_fps = False  # 根据CPU负载自动降低帧率和画质
+        self._frame_cache_mb = 512  # 已解码帧磁盘缓存的总大小上限（MB）
+        self._show_hud = False  # 是否在GIF上方显示性能监视面板
+        self._click_through = False  # 透明区域点击穿透：窗口只在不透明的像素上接收鼠标
+        self._click_mask = None  # 当前设置的窗口遮罩（窗口坐标），未设置时为 None
+        self._thumbnail_browser = None  # 缩略图浏览窗口，第一次打开时创建
+        self._perf_stats = PerfStats(clock=master_clock())  # 帧率、绘制耗时、唤醒频率等滚动统计
+        
+        # 持久化的GIF库索引，加载文件夹时直接从索引加载播放列表（首帧之后才打开，见 _get_library_index）
+        self._library_index = None
+        self._library_index_path = None
+        self._library_index_opened = False
+        
+        # 读取用户配置（之后的修改由 ConfigStore 防抖后在后台原子写入）
+        self._always_on_top = True # 默认置顶
+        self._resume_gif = None  # 上次退出时正在播放的GIF，加载播放列表后从这里继续
+        self._resume_frame = 0  # 上次退出时停在的帧，续播时借助帧索引直接定位
+        self._parked = None  # 最小化到托盘时释放了动画，记下 (GIF, 帧号)，恢复窗口时回到同一帧
+        self._injected_gif = None  # 为立即续播而提前放入播放列表的GIF，扫描合并时去重
+        self._companion_config = []  # 上次退出时打开的陪伴窗口，启动完成后恢复
+        self._pending_commands = []  # 启动完成前收到的命令（命令行参数或其他实例转发）
+        self._config_store = ConfigStore(config_path, parent=self)
+        QApplication.instance().aboutToQuit.connect(self._flush_config)
+        cfg = self._config_store.load()
+        if cfg:
+            user_folder = cfg.get('gif_folder')
+            if user_folder and is_library(user_folder):
+                self._user_gif_folder = user_folder
+            
+            self._always_on_top = cfg.get('always_on_top', True)
+            self._auto_switch = cfg.get('auto_switch', True)
+            self._interval = cfg.get('interval', 60_000)
+            self._flipped = cfg.get('flipped', False)
+            self._single_file_mode = cfg.get('single_file_mode', False)
+            self._prefetch_depth = cfg.get('prefetch_depth', 1)
+            self._watch_folder = cfg.get('watch_folder', True)
+            self._recursive = cfg.get('recursive', False)
+            self._shuffle = cfg.get('shuffle', False)
+            self._max_fps = cfg.get('max_fps', 0)
+            self._adaptive_fps = cfg.get('adaptive_fps', False)
+            self._frame_cache_mb = cfg.get('frame_cache_mb', 512)
+            self._show_hud = cfg.get('show_hud', False)
+            self._click_through = cfg.get('click_through', False)
+            self._resume_gif = cfg.get('current_gif')
+            self._resume_frame = cfg.get('current_frame', 0)
+            self._companion_config = cfg.get('companions', [])
+            self._restore_geometry(cfg.get('geometry'))
+        
+        # 帧率限制与自适应画质：过短的帧合并为一次重绘
+        self._pacer = FramePacer(self._max_fps, self._adaptive_fps, self)
+        self._pacer.changed.connect(self._apply_pacing)
+        self._deferred_paint = ScheduledTimer(self)
+        self._deferred_paint.setSingleShot(True)
+        self._deferred_paint.timeout.connect(self._flush_dirty)
+        # 局部重绘：只重绘相邻两帧之间变化的区域
+        self._dirty_tracker = DirtyTracker()
+        self._dirty_rect = QRect()  # 尚未重绘的变化区域（帧坐标）
+        self._dirty_full = True  # 下一次需要整窗重绘
+        
+        # 按窗口尺寸解码：解码尺寸分档，缩放/拖动跨档时才重新解码
+        self._decode_side = decode_side_for(self.width(), self.height(), self.devicePixelRatioF())
+        self._decode_size_timer = QTimer(self)
+        self._decode_size_timer.setSingleShot(True)
+        self._decode_size_timer.setInterval(200)  # 拖动调整大小结束后再重新解码
+        self._decode_size_timer.timeout.connect(self._update_decode_size)
+        
+        # 已解码帧的磁盘缓存，再次播放时直接映射，无需重新解码
+        self._disk_cache = None
+        cache_dir = cache_dir_for_config(config_path)
+        if cache_dir and self._frame_cache_mb > 0:
+            try:
+                self._disk_cache = FrameDiskCache(cache_dir, self._frame_cache_mb * 1024 * 1024)
+            except OSError as e:
+                print(f"创建帧缓存目录失败: {e}")
+        
+        # 后台预取播放列表中前后的GIF，切换时直接使用已解码的动画
+        self._prefetcher = GifPrefetcher(depth=self._prefetch_depth, max_side=self._decode_side,
+                                         disk_cache=self._disk_cache, parent=self)
+        self._prefetcher.decoded_ready.connect(self._on_decoded_ready)
+        QApplication.instance().aboutToQuit.connect(self._prefetcher.shutdown)
+        QApplication.instance().aboutToQuit.connect(self._stop_scanner)
+        
+        # 监视当前文件夹，新增/删除的GIF原地插入/移除，不重置播放位置
+        self._folder_watcher = FolderWatcher(parent=self)
+        self._folder_watcher.folder_changed.connect(self._on_folder_changed)
+        self._folder_watcher.folder_removed.connect(self._on_folder_removed)
+        
+        # 多窗口模式：陪伴窗口共用播放列表、已解码帧和已缩放帧的缓存（第一次播放GIF时创建）
+        self._pets = None
+        
+        # 应用置顶配置（只设置窗口标志，由调用方 show()）
+        self._apply_always_on_top(show=False)
+        
+        # 冷启动：先在保存的窗口位置显示上次退出时的画面，
+        # 托盘、菜单和播放列表在首帧绘制之后再加载（见 _finish_startup）
+        self._startup = StartupTimer(_PROCESS_START)
+        self._startup_done = False
+        self._startup_scheduled = False
+        self._snapshot_path = snapshot_path_for_config(config_path)
+        self._snapshot = load_snapshot(self._snapshot_path)
+        QTimer.singleShot(STARTUP_FALLBACK_MS, self._finish_startup)
+
+    def _finish_startup(self):
+        """首帧绘制后完成启动：创建托盘、加载GIF文件夹、启动自动切换"""
+        if self._startup_done:
+            return
+        self._startup_done = True
+        self._setup_tray()
+        self._startup.mark('tray_ready')
+        
+        # 命令行或其他实例指定了文件夹/文件时直接打开它，不再加载上次的文件夹
+        from single_instance import CMD_FOLDER, CMD_FILE
+        pending, self._pending_commands = self._pending_commands, []
+        opens_path = any(name in (CMD_FOLDER, CMD_FILE) for name, _ in pending)
+        
+        # --- 关键修改：初始加载GIF文件夹逻辑 ---
+        initial_folder_to_load = None
+        if opens_path:
+            pass
+        elif self._user_gif_folder and is_library(self._user_gif_folder):
+            initial_folder_to_load = self._user_gif_folder
+            print(f"DEBUG: Using user configured GIF folder: {initial_folder_to_load}")
+        else:
+            default_gif_folder = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), 'gif')
+            if os.path.isdir(default_gif_folder):
+                # 是否有GIF由后台扫描判断，为空时会提示重新选择
+                initial_folder_to_load = default_gif_folder
+                print(f"DEBUG: Using default GIF folder: {initial_folder_to_load}")
+            else:
+                print(f"DEBUG: Default GIF folder does not exist: {default_gif_folder}")
+
+        if initial_folder_to_load:
+            self.set_gif_folder(initial_folder_to_load, save_config=False)
+        elif not opens_path:
+            # 如果没有找到任何有效的GIF文件夹（用户配置或默认），则立即弹出选择框
+            print("DEBUG: No valid GIF folder found, prompting user.")
+            # 使用 singleShot 确保窗口初始化后再弹出对话框，避免阻塞
+            QTimer.singleShot(100, self._ask_for_gif_folder)
+            
+        for name, arg in pending:
+            self.handle_command(name, arg)
+        
+        # 恢复上次打开的陪伴窗口
+        companions, self._companion_config = self._companion_config, []
+        if companions:
+            self._ensure_pets().restore(companions)
+            
+        # 启动计时器（如果自动切换开启）
+        if self._auto_switch:
+            self._timer.start(self._interval)
+
+    def _tray_message(self, text, icon=QSystemTrayIcon.Information, msecs=3000):
+        """通过托盘气泡提示（托盘尚未创建时只打印日志）"""
+        if self.tray_icon is None:
+            print(f"DEBUG: {text}")
+            return
+        self.tray_icon.showMessage('一二布布', text, icon, msecs)
+
+    def _setup_tray(self):
+        """创建系统托盘图标和托盘菜单"""
+        # 系统托盘不可用（无桌面环境、部分 Linux 桌面）时不创建托盘，播放器照常运行，
+        # 只是不能最小化到托盘（可用 --show 命令恢复窗口）
         if not QSystemTrayIcon.isSystemTrayAvailable():
-            QMessageBox.critical(self, "错误", "系统托盘不可用，无法显示托盘图标！")
-            # 如果系统托盘不可用，可以考虑退出应用程序或提供替代方案
-            sys.exit(1) 
+            print("DEBUG: System tray is not available, running without a tray icon")
+            return
+
+        # 导入编译后的资源文件（延迟到首帧之后，加快冷启动）
+        # 确保您已经运行了 'pyrcc5 resources.qrc -o resources_rc.py' 命令
+        import resources_rc
 
         # 使用资源文件中的图标
         # 关键修改：图标路径现在是 ":/icons/icon/output.png"，
@@ -53,14 +292,7 @@ class TransparentGifPlayer(QLabel):
         
         # 显示窗口动作
         show_action = QAction('显示窗口', self)
-        def show_window():
-            self.showNormal()
-            self.raise_()
-            self.activateWindow()
-            # 恢复自动切换和计时
-            if self._auto_switch and not self._timer.isActive():
-                self._timer.start(self._interval)
-        show_action.triggered.connect(show_window)
+        show_action.triggered.connect(self.show_window)
         tray_menu.addAction(show_action)
 
         # 窗口置顶动作
@@ -90,122 +322,97 @@ class TransparentGifPlayer(QLabel):
         # 托盘图标单击/双击恢复窗口
         def tray_restore(reason):
             if reason in (QSystemTrayIcon.DoubleClick, QSystemTrayIcon.Trigger):
-                self.showNormal()  # 恢复窗口，重新出现在任务栏和 Alt+Tab
-                self.raise_()
-                self.activateWindow()
-                # 恢复自动切换和计时
-                if self._auto_switch and not self._timer.isActive():
-                    self._timer.start(self._interval)
+                self.show_window()
         self.tray_icon.activated.connect(tray_restore)
 
-        # 设置窗口标志：无边框、置顶、透明
-        # 只用 FramelessWindowHint，避免 Qt.Tool 导致无法 Alt+Tab/任务栏找回
-        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
-        self.setAttribute(Qt.WA_TranslucentBackground, True)
-        
-        self._default_size = QSize(200, 200)
-        self.resize(self._default_size)
-        self._margin = 8  # 边缘判定宽度
-        self._interval = 60_000  # 默认1分钟
-        self._auto_switch = True
-        
-        self._timer = QTimer(self)
-        self._timer.timeout.connect(self.next_gif)
-        self.setAlignment(Qt.AlignCenter)
-        
-        self._resizing = False
-        self._resize_dir = None
-        self._mouse_pos = None
-        self._dragging = False
-        self._drag_pos = None
-        self._click_pos = None
-        self._moved = False
-        
-        self.movie = None
-        self.gif_index = 0
-        self.gif_list = []
-        self._config_path = config_path
-        self._user_gif_folder = None
-        self._flipped = False  # 左右翻转状态
-        self._single_file_mode = False  # 单文件模式标志
-        
-        # 读取用户配置
-        self._always_on_top = True # 默认置顶
-        if config_path and os.path.isfile(config_path):
-            try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    cfg = json.load(f)
-                user_folder = cfg.get('gif_folder')
-                if user_folder and os.path.isdir(user_folder):
-                    self._user_gif_folder = user_folder
-                
-                self._always_on_top = cfg.get('always_on_top', True)
-                self._auto_switch = cfg.get('auto_switch', True)
-                self._interval = cfg.get('interval', 60_000)
-                self._flipped = cfg.get('flipped', False)
-                self._single_file_mode = cfg.get('single_file_mode', False)
-            except Exception as e:
-                print(f"读取配置文件失败: {e}")
-                pass # 忽略错误，使用默认配置
-        
-        # 应用置顶配置
-        self._apply_always_on_top()
-        
-        # --- 关键修改：初始加载GIF文件夹逻辑 ---
-        initial_folder_to_load = None
-        if self._user_gif_folder and os.path.isdir(self._user_gif_folder):
-            initial_folder_to_load = self._user_gif_folder
-            print(f"DEBUG: Using user configured GIF folder: {initial_folder_to_load}")
-        else:
-            default_gif_folder = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), 'gif')
-            if os.path.isdir(default_gif_folder):
-                gif_files_in_default = [f for f in os.listdir(default_gif_folder) if f.lower().endswith('.gif')]
-                if gif_files_in_default:
-                    initial_folder_to_load = default_gif_folder
-                    print(f"DEBUG: Using default GIF folder: {initial_folder_to_load}")
-                else:
-                    print(f"DEBUG: Default GIF folder exists but is empty: {default_gif_folder}")
-            else:
-                print(f"DEBUG: Default GIF folder does not exist: {default_gif_folder}")
-
-        if initial_folder_to_load:
-            self.set_gif_folder(initial_folder_to_load, save_config=False)
-        else:
-            # 如果没有找到任何有效的GIF文件夹（用户配置或默认），则立即弹出选择框
-            print("DEBUG: No valid GIF folder found, prompting user.")
-            # 使用 singleShot 确保窗口初始化后再弹出对话框，避免阻塞
-            QTimer.singleShot(100, self._ask_for_gif_folder)
-            
-        # 启动计时器（如果自动切换开启）
-        if self._auto_switch:
+    def show_window(self):
+        """从托盘或最小化恢复窗口，重新出现在任务栏和 Alt+Tab"""
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+        # 恢复自动切换和计时
+        if self._auto_switch and not self._timer.isActive():
             self._timer.start(self._interval)
 
+    def handle_command(self, name, arg):
+        """执行命令行参数或其他实例/脚本转发的命令（见 single_instance），失败时返回原因"""
+        if not self._startup_done:
+            self._pending_commands.append((name, arg))
+            return None
+        from single_instance import CMD_FOLDER, CMD_FILE, CMD_NEXT, CMD_PREV, CMD_SHOW
+        if name == CMD_FOLDER:
+            if not is_library(arg):
+                return f'not a folder or ZIP archive: {arg}'
+            self.set_gif_folder(os.path.abspath(arg), save_config=True)
+        elif name == CMD_FILE:
+            if not os.path.isfile(arg) or not arg.lower().endswith('.gif'):
+                return f'not a GIF file: {arg}'
+            self.set_single_gif_file(os.path.abspath(arg), save_config=True)
+        elif name in (CMD_NEXT, CMD_PREV):
+            self.next_gif() if name == CMD_NEXT else self.prev_gif()
+            if self._auto_switch:
+                self._timer.start(self._interval)  # 重置计时器
+        elif name == CMD_SHOW:
+            self.show_window()
+        return None
+
     def _save_config(self, gif_folder=None):
         """保存所有相关配置到文件"""
         config = {}
-        # gif_folder 优先参数，否则用当前
+        # gif_folder 优先参数，否则用当前；都没有时写 None，从文件中删除旧值
         if gif_folder is not None:
             config['gif_folder'] = gif_folder
-        elif self._user_gif_folder:
-            config['gif_folder'] = self._user_gif_folder
+        else:
+            config['gif_folder'] = self._user_gif_folder or None
         
         # 其他配置
         config['always_on_top'] = self._always_on_top # 直接使用内部状态
         config['auto_switch'] = self._auto_switch
         config['interval'] = self._interval
         config['flipped'] = self._flipped
+        config['click_through'] = self._click_through
         config['single_file_mode'] = self._single_file_mode
+        config['prefetch_depth'] = self._prefetch_depth
+        config['watch_folder'] = self._watch_folder
+        config['recursive'] = self._recursive
+        config['shuffle'] = self._shuffle
+        config['max_fps'] = self._max_fps
+        config['adaptive_fps'] = self._adaptive_fps
+        config['frame_cache_mb'] = self._frame_cache_mb
+        config['show_hud'] = self._show_hud
+        if not self._startup_done and self._companion_config:
+            # 陪伴窗口还没恢复，保留上次的配置
+            config['companions'] = self._companion_config
+        else:
+            config['companions'] = self._pets.describe() if self._pets is not None else []
         
-        if self._config_path:
-            try:
-                with open(self._config_path, 'w', encoding='utf-8') as f:
-                    json.dump(config, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                print(f"保存配置文件失败: {e}")
-                pass
+        # 窗口位置大小和播放位置，重启后从这里继续
+        geom = self.geometry()
+        config['geometry'] = [geom.x(), geom.y(), geom.width(), geom.height()]
+        config['current_gif'] = self._current_gif
+        config['current_frame'] = self._current_frame()
+        config['gif_index'] = self.gif_index
+        
+        self._config_store.update(config)
 
-    def _apply_always_on_top(self):
-        """根据 _always_on_top 状态应用窗口置顶标志"""
+    def _flush_config(self):
+        """退出前同步写出尚未保存的配置，并保存当前画面作为下次启动的首帧"""
+        self._save_config()
+        self._config_store.flush()
+        if self.movie is not None and self.movie.isValid():
+            save_snapshot(self.movie.currentPixmap(), self._snapshot_path)
+
+    def _restore_geometry(self, geometry):
+        """恢复上次保存的窗口位置和大小（窗口须仍落在某个屏幕上）"""
+        if not isinstance(geometry, list) or len(geometry) != 4:
+            return
+        rect = QRect(*geometry)
+        if rect.width() < 50 or rect.height() < 50 or QGuiApplication.screenAt(rect.center()) is None:
+            return
+        self.setGeometry(rect)
+
+    def _apply_always_on_top(self, show=True):
+        """根据 _always_on_top 状态应用窗口置顶标志（陪伴窗口随之一起）"""
         flags = self.windowFlags()
         # 只保留 FramelessWindowHint，避免 Qt.Tool
         base_flags = Qt.FramelessWindowHint
@@ -213,6 +420,10 @@ class TransparentGifPlayer(QLabel):
             self.setWindowFlags(base_flags | Qt.WindowStaysOnTopHint)
         else:
             self.setWindowFlags(base_flags)
+        if self._pets is not None:
+            self._pets.set_always_on_top(self._always_on_top)
+        if not show:
+            return
         self.show() # 重新应用窗口标志需要调用 show()
         self.raise_()
         self.activateWindow()
@@ -220,11 +431,18 @@ class TransparentGifPlayer(QLabel):
     def showEvent(self, event):
         """窗口显示事件，此处不再用于首次询问文件夹，但保留以防万一"""
         super().showEvent(event)
+        self._unpark_movie()  # 从托盘恢复时重新载入动画并回到原来的帧
+        self._playback.refresh()  # 恢复播放
         # 移除原有的 _need_ask_for_folder 逻辑，因为已在 __init__ 中处理
         # if getattr(self, '_need_ask_for_folder', False):
         #     QTimer.singleShot(100, self._ask_for_gif_folder)
         #     self._need_ask_for_folder = False # 确保只询问一次
 
+    def hideEvent(self, event):
+        """窗口隐藏事件（最小化到托盘），暂停动画解码"""
+        super().hideEvent(event)
+        self._playback.refresh()
+
     def _ask_for_gif_folder(self):
         """弹出文件对话框让用户选择GIF文件夹"""
         base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
@@ -235,67 +453,349 @@ class TransparentGifPlayer(QLabel):
         else:
             self.close()  # 用户未选则直接关闭窗口
 
+    def _prompt_for_folder(self, title, text):
+        """提示用户重新选择文件夹，返回所选文件夹；用户取消或退出时关闭窗口并返回 None"""
+        box = QMessageBox(self)
+        box.setWindowTitle(title)
+        box.setText(text)
+        choose_btn = box.addButton("选择文件夹", QMessageBox.AcceptRole)
+        exit_btn = box.addButton("退出", QMessageBox.RejectRole)
+        box.setDefaultButton(choose_btn)
+        box.exec_()
+        
+        if box.clickedButton() == choose_btn:
+            base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+            folder = QFileDialog.getExistingDirectory(self, '请选择包含GIF图片的文件夹', base_dir)
+            if folder:
+                return folder
+        # 用户取消选择或点击退出
+        self.close()
+        return None
+
     def set_gif_folder(self, gif_folder, save_config=True):
-        """设置GIF文件夹并加载GIF图片"""
-        while True: # 循环直到用户选择有效文件夹或退出
-            if not os.path.isdir(gif_folder):
-                box = QMessageBox(self)
-                box.setWindowTitle("未找到文件夹")
-                box.setText(f"未找到文件夹：{gif_folder}\n\n请选择一个包含GIF图片的文件夹，或退出程序。")
-                choose_btn = box.addButton("选择文件夹", QMessageBox.AcceptRole)
-                exit_btn = box.addButton("退出", QMessageBox.RejectRole)
-                box.setDefaultButton(choose_btn)
-                box.exec_()
-                
-                if box.clickedButton() == choose_btn:
-                    base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-                    folder = QFileDialog.getExistingDirectory(self, '请选择包含GIF图片的文件夹', base_dir)
-                    if folder:
-                        gif_folder = folder # 更新文件夹路径，继续循环
-                        continue
-                    else: # 用户取消选择，退出
-                        self.close()
-                        return
-                else: # 用户点击退出
-                    self.close()
-                    return
-            
-            # 尝试加载GIF文件
-            self.gif_list = [os.path.join(gif_folder, f) for f in os.listdir(gif_folder) if f.lower().endswith('.gif')]
-            self.gif_list.sort()
-            self.gif_index = 0
-            
-            if self.gif_list:
-                # 重置为文件夹模式
-                self._single_file_mode = False
-                self.set_gif(self.gif_list[self.gif_index])
-                # 保存用户选择
-                if save_config:
-                    self._user_gif_folder = gif_folder
-                    self._save_config(gif_folder=gif_folder)
-                break # 成功加载，退出循环
+        """设置GIF文件夹（或 ZIP 压缩包）并在后台扫描加载GIF图片，找到第一个即开始播放"""
+        if not is_library(gif_folder):
+            folder = self._prompt_for_folder(
+                "未找到文件夹", f"未找到文件夹：{gif_folder}\n\n请选择一个包含GIF图片的文件夹，或退出程序。")
+            if folder:
+                self.set_gif_folder(folder, save_config)
+            return
+        
+        # 取消仍在进行的扫描，旧扫描的结果通过 generation 丢弃
+        if self._scanner is not None:
+            self._scanner.requestInterruption()
+        self._scan_generation += 1
+        self._close_previous_archive(gif_folder)
+        self._scan_folder = gif_folder
+        self._scan_save_config = save_config
+        self._scan_started = False
+        invalidate_sources(gif_folder)  # 重新打开GIF库时丢弃缓存的原始字节，之后按需重新读取
+        
+        if is_archive(gif_folder):
+            self._open_archive_library()
+            return
+        
+        if self._recursive:
+            # 递归模式：播放列表随扫描逐个目录追加到紧凑结构中（不使用索引和文件夹监视）
+            from folder_scanner import FolderScanner
+            self._folder_watcher.unwatch()
+            self._scanner = FolderScanner(gif_folder, self._scan_generation, recursive=True, parent=self)
+            self._scanner.tree_batch.connect(self._on_tree_batch)
+            self._scanner.scan_finished.connect(self._on_scan_finished)
+            self._scanner.finished.connect(self._scanner.deleteLater)
+            self._scanner.start()
+            return
+        
+        # 已索引的文件夹直接从索引加载播放列表，后台只校验文件夹是否有变化
+        from folder_scanner import FolderScanner
+        index = self._get_library_index()
+        cached = None
+        if index is not None:
+            try:
+                cached = index.load_folder(gif_folder)
+            except Exception as e:
+                print(f"读取GIF库索引失败: {e}")
+        known_mtime = None
+        if cached is not None and cached[1]:
+            known_mtime, paths = cached
+            print(f"DEBUG: Loaded {len(paths)} GIF files from library index")
+            self._start_playlist(paths)
+        
+        self._scanner = FolderScanner(gif_folder, self._scan_generation,
+                                      index_path=self._library_index_path, known_mtime=known_mtime, parent=self)
+        self._scanner.batch_found.connect(self._on_scan_batch)
+        self._scanner.listing_changed.connect(self._on_listing_changed)
+        self._scanner.scan_finished.connect(self._on_scan_finished)
+        self._scanner.finished.connect(self._scanner.deleteLater)
+        self._scanner.start()
+
+    def _get_library_index(self):
+        """第一次加载文件夹时才打开GIF库索引（sqlite3），打开失败时返回 None，之后不再重试"""
+        if not self._library_index_opened:
+            self._library_index_opened = True
+            from library_index import LibraryIndex, index_path_for_config
+            path = index_path_for_config(self._config_path)
+            if path:
+                try:
+                    self._library_index = LibraryIndex(path)
+                    self._library_index_path = path
+                except Exception as e:
+                    print(f"打开GIF库索引失败: {e}")
+        return self._library_index
+
+    def _close_previous_archive(self, new_library):
+        """播放列表换成别的GIF库时关闭之前的 ZIP 压缩包，不让它一直映射在内存中（以后再打开时重新映射）"""
+        old = self._scan_folder
+        if old and os.path.abspath(old) != os.path.abspath(new_library):
+            close_archive(old)  # 不是压缩包或没有打开时什么也不做
+
+    def _open_archive_library(self):
+        """ZIP 压缩包作为GIF库：成员列表只读中央目录，GIF 不解压到磁盘，压缩包在切换之间保持映射"""
+        import zipfile
+        self._folder_watcher.unwatch()
+        self._scanner = None
+        archive = self._scan_folder
+        try:
+            paths = list_archive(archive)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print(f"DEBUG: Failed to open archive {archive}: {e}")
+            paths = []
+        if paths:
+            self._start_playlist(paths)
+        self._on_scan_finished(self._scan_generation, len(paths))
+
+    def _start_playlist(self, paths):
+        """用第一批GIF建立播放列表：重置为文件夹模式并立即开始播放"""
+        self._scan_started = True
+        self._single_file_mode = False
+        self.gif_list = paths
+        self.gif_index = 0
+        # 续播上次退出时的GIF；它还没被扫描到时先放进列表，之后合并时去重
+        resume, self._resume_gif = self._resume_gif, None
+        resume_target = resume
+        self._injected_gif = None
+        member = split_member(resume) if resume else None
+        if member is not None:
+            # 压缩包成员：压缩包的列表是完整的，在列表中才续播
+            i = bisect.bisect_left(self.gif_list, resume)
+            if i < len(self.gif_list) and self.gif_list[i] == resume:
+                self.gif_index = i
+            resume = None
+        same_folder = resume and (os.path.normcase(os.path.dirname(os.path.abspath(resume)))
+                                  == os.path.normcase(os.path.abspath(self._scan_folder)))
+        if same_folder and os.path.isfile(resume):
+            i = bisect.bisect_left(self.gif_list, resume)
+            if i == len(self.gif_list) or self.gif_list[i] != resume:
+                self.gif_list.insert(i, resume)
+                self._injected_gif = resume
+            self.gif_index = i
+        self.set_gif(self.gif_list[self.gif_index])
+        self._restore_resume_frame(resume_target)
+        self._playlist_changed()
+        # 保存用户选择
+        if self._scan_save_config:
+            self._user_gif_folder = self._scan_folder
+            self._save_config(gif_folder=self._scan_folder)
+        if self._watch_folder and not is_archive(self._scan_folder):
+            self._folder_watcher.watch(self._scan_folder)
+
+    def _on_tree_batch(self, generation, groups):
+        """递归扫描的一批结果（按目录分组）追加到紧凑播放列表，不打断当前播放"""
+        if generation != self._scan_generation:
+            return
+        from compact_playlist import CompactPlaylist
+        playlist = self.gif_list if self._scan_started else CompactPlaylist()
+        for directory, names in groups:
+            playlist.add_directory(directory, names)
+        if not self._scan_started:
+            self._start_tree_playlist(playlist)
+            return
+        self._playlist_changed(appended=True)
+        if self._locating_gif is not None and self._locating_gif == self._current_gif:
+            i = playlist.find(self._locating_gif)
+            if i >= 0:
+                self.gif_index = i
+                self._locating_gif = None
+
+    def _start_tree_playlist(self, playlist):
+        """递归模式下用第一批结果开始播放；上次的GIF还没扫描到时先播放它，扫描到后再定位"""
+        self._scan_started = True
+        self._single_file_mode = False
+        self.gif_list = playlist
+        self.gif_index = 0
+        resume, self._resume_gif = self._resume_gif, None
+        self._locating_gif = None
+        root = os.path.join(os.path.normcase(os.path.abspath(self._scan_folder)), '')
+        if resume and os.path.normcase(os.path.abspath(resume)).startswith(root) and os.path.isfile(resume):
+            i = playlist.find(resume)
+            if i >= 0:
+                self.gif_index = i
             else:
-                self.clear() # 清除当前显示的GIF
-                box = QMessageBox(self)
-                box.setWindowTitle("没有GIF图片")
-                box.setText(f"文件夹 {gif_folder} 下没有找到任何GIF图片。\n\n请选择一个包含GIF图片的文件夹，或退出程序。")
-                choose_btn = box.addButton("选择文件夹", QMessageBox.AcceptRole)
-                exit_btn = box.addButton("退出", QMessageBox.RejectRole)
-                box.setDefaultButton(choose_btn)
-                box.exec_()
-                
-                if box.clickedButton() == choose_btn:
-                    base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-                    folder = QFileDialog.getExistingDirectory(self, '请选择包含GIF图片的文件夹', base_dir)
-                    if folder:
-                        gif_folder = folder # 更新文件夹路径，继续循环
-                        continue
-                    else: # 用户取消选择，退出
-                        self.close()
-                        return
-                else: # 用户点击退出
-                    self.close()
-                    return
+                self._locating_gif = resume
+            self.set_gif(resume)
+            self._restore_resume_frame(resume)
+        else:
+            self.set_gif(playlist[0])
+        self._playlist_changed()
+        if self._scan_save_config:
+            self._user_gif_folder = self._scan_folder
+            self._save_config(gif_folder=self._scan_folder)
+
+    def _stop_scanner(self):
+        """中断并等待后台扫描线程结束（退出时调用）"""
+        if self._scanner is not None:
+            self._scanner.requestInterruption()
+            self._scanner.wait()
+            self._scanner = None
+
+    def _on_scan_batch(self, generation, paths):
+        """合并一批扫描结果到播放列表，保持有序且不打断当前播放"""
+        if generation != self._scan_generation:
+            return
+        paths.sort()
+        if not self._scan_started or not self.gif_list:
+            # 扫描途中播放列表被清空（文件夹监视发现GIF全部被删除）时，用这一批重新开始播放
+            self._start_playlist(paths)
+            return
+        if self._injected_gif in paths:
+            paths.remove(self._injected_gif)
+            self._injected_gif = None
+        current = self.gif_list[self.gif_index]
+        self.gif_list = list(heapq.merge(self.gif_list, paths))
+        self.gif_index = bisect.bisect_left(self.gif_list, current)
+        self._playlist_changed()
+
+    def _on_listing_changed(self, generation, paths):
+        """索引过期时后台重新列出的完整列表：把新增/删除的GIF原地合并到播放列表，保持当前播放位置"""
+        if generation != self._scan_generation:
+            return
+        if not paths:
+            if self._scan_started:
+                self._clear_playlist()  # 索引中的GIF已全部不存在，扫描结束时提示重新选择文件夹
+            return
+        if not self._scan_started:
+            self._start_playlist(sorted(paths))
+            return
+        new_paths = set(paths)
+        old_paths = set(self.gif_list)
+        self._apply_listing_diff(sorted(new_paths - old_paths), sorted(old_paths - new_paths))
+
+    def _on_listing_diff(self, generation, added, removed):
+        """文件夹监视触发的增量扫描结果"""
+        if generation != self._scan_generation or not self._scan_started:
+            return
+        self._apply_listing_diff(added, removed)
+
+    def _apply_listing_diff(self, added, removed):
+        """把新增/删除的GIF原地插入/移除，不重置播放位置；GIF全部被删除时清空播放列表并停止播放"""
+        was_empty = not self.gif_list
+        removed_count = added_count = 0
+        for path in removed:
+            i = bisect.bisect_left(self.gif_list, path)
+            if i == len(self.gif_list) or self.gif_list[i] != path:
+                continue
+            del self.gif_list[i]
+            removed_count += 1
+            if i < self.gif_index:
+                self.gif_index -= 1
+            elif i == self.gif_index:
+                # 当前GIF被删除：gif_index 不变，已指向原来的下一个，下一次切换落在它上面而不是再往后一个
+                self._index_is_next = True
+        for path in added:
+            i = bisect.bisect_left(self.gif_list, path)
+            if i < len(self.gif_list) and self.gif_list[i] == path:
+                continue
+            self.gif_list.insert(i, path)
+            added_count += 1
+            if i < self.gif_index or (i == self.gif_index and not self._index_is_next):
+                self.gif_index += 1
+        if not removed_count and not added_count:
+            return
+        if not self.gif_list:
+            self._clear_playlist()
+            self._tray_message(f'文件夹 {self._scan_folder} 中的GIF已全部删除，放入新的GIF后会自动开始播放。')
+            return
+        if self.gif_index >= len(self.gif_list):
+            self.gif_index = 0  # 删除的是最后一个，原来的下一个回到开头
+        self._playlist_changed()
+        if was_empty and self._current_gif is None:
+            # 清空后又有GIF放进来：重新开始播放
+            self.set_gif(self.gif_list[self.gif_index])
+            if self._auto_switch:
+                self._timer.start(self._interval)
+
+    def _clear_playlist(self):
+        """GIF库中已经没有GIF：清空播放列表，停止动画和自动切换"""
+        self._timer.stop()
+        self._release_movie()
+        self._parked = None
+        self._current_gif = None
+        self.gif_list = []
+        self.gif_index = 0
+        self._index_is_next = False
+        self._playlist_changed()
+        self.clear()  # 清除当前显示的GIF
+        self.update()
+
+    def _on_folder_changed(self, folder):
+        """监视到文件夹内容变化：后台只列出文件名与索引比较，增量更新播放列表和索引"""
+        if self._single_file_mode or self._recursive or folder != self._scan_folder:
+            return
+        if self._scanner is not None:
+            # 正在扫描，稍后再检查
+            self._folder_watcher.retrigger()
+            return
+        invalidate_sources(os.path.join(folder, ''))  # 文件可能被替换，缓存的原始字节不再可信
+        self._scan_generation += 1
+        # 没有索引时与当前播放列表比较
+        from folder_scanner import FolderScanner
+        known = None if self._get_library_index() is not None else list(self.gif_list)
+        self._scanner = FolderScanner(folder, self._scan_generation, index_path=self._library_index_path,
+                                      refresh=True, known_paths=known, parent=self)
+        self._scanner.listing_diff.connect(self._on_listing_diff)
+        self._scanner.scan_finished.connect(self._on_refresh_finished)
+        self._scanner.finished.connect(self._scanner.deleteLater)
+        self._scanner.start()
+
+    def _on_refresh_finished(self, generation, total):
+        """增量扫描结束（文件夹变空时由 _apply_listing_diff 处理，不弹出选择文件夹的对话框）"""
+        if generation == self._scan_generation:
+            self._scanner = None
+
+    def _on_folder_removed(self, folder):
+        """当前文件夹被删除：停止切换，保留正在显示的画面，提示用户"""
+        if self._single_file_mode or folder != self._scan_folder:
+            return
+        print(f"DEBUG: GIF folder disappeared: {folder}")
+        self._timer.stop()
+        self.gif_list = []
+        self.gif_index = 0
+        self._playlist_changed()
+        index = self._get_library_index()
+        if index is not None:
+            try:
+                index.forget_folder(folder)
+            except Exception as e:
+                print(f"更新GIF库索引失败: {e}")
+        self._tray_message(f'GIF文件夹已不存在：{folder}\n请通过右键菜单重新选择文件夹。',
+                           QSystemTrayIcon.Warning, 5000)
+
+    def _on_scan_finished(self, generation, total):
+        """扫描结束；文件夹中没有GIF时提示重新选择"""
+        if generation != self._scan_generation:
+            return
+        self._scanner = None
+        from folder_scanner import UNCHANGED
+        if total == UNCHANGED:
+            print(f"DEBUG: Library index is up to date for {self._scan_folder}")
+            return
+        print(f"DEBUG: Scanned {total} GIF files in {self._scan_folder}")
+        if total == 0:
+            self._clear_playlist()
+            folder = self._prompt_for_folder(
+                "没有GIF图片", f"文件夹 {self._scan_folder} 下没有找到任何GIF图片。\n\n请选择一个包含GIF图片的文件夹，或退出程序。")
+            if folder:
+                self.set_gif_folder(folder, self._scan_save_config)
 
     def set_single_gif_file(self, gif_path, save_config=True):
         """设置单个GIF文件并进入单文件模式"""
@@ -305,9 +805,12 @@ class TransparentGifPlayer(QLabel):
         
         # 设置单文件模式
         self._single_file_mode = True
+        self._folder_watcher.unwatch()
+        self._close_previous_archive(gif_path)
         self.gif_list = [gif_path]
         self.gif_index = 0
         self.set_gif(gif_path)
+        self._playlist_changed()
         
         # 保存配置
         if save_config:
@@ -315,48 +818,348 @@ class TransparentGifPlayer(QLabel):
             self._user_gif_folder = os.path.dirname(gif_path)
             self._save_config()
 
+    def _playlist_changed(self, appended=False):
+        """播放列表被替换或增删后同步到打开着的缩略图窗口"""
+        if self._thumbnail_browser is not None and self._thumbnail_browser.isVisible():
+            self._thumbnail_browser.set_playlist(self.gif_list, self._scan_folder, appended)
+
+    def show_thumbnails(self):
+        """打开当前GIF库的缩略图窗口（首次打开时创建缩略图加载线程池和磁盘缓存）"""
+        if self._thumbnail_browser is None:
+            from thumbnail_browser import ThumbnailBrowser, ThumbnailCache, ThumbnailLoader, thumbnail_dir_for_config
+            cache = None
+            cache_dir = thumbnail_dir_for_config(self._config_path)
+            if cache_dir:
+                try:
+                    cache = ThumbnailCache(cache_dir)
+                except OSError as e:
+                    print(f"创建缩略图缓存目录失败: {e}")
+            loader = ThumbnailLoader(cache, self)
+            QApplication.instance().aboutToQuit.connect(loader.shutdown)
+            self._thumbnail_browser = ThumbnailBrowser(loader, self._on_thumbnail_picked, self)
+        browser = self._thumbnail_browser
+        browser.set_playlist(self.gif_list, self._scan_folder)
+        browser.select(self.gif_index)
+        browser.show()
+        browser.raise_()
+        browser.activateWindow()
+
+    def _on_thumbnail_picked(self, row):
+        """在缩略图窗口选中了某个GIF：跳到播放列表中的这一项"""
+        if not 0 <= row < len(self.gif_list):
+            return
+        self.gif_index = row
+        self._locating_gif = None
+        self.set_gif(self.gif_list[row])
+        if self._auto_switch:
+            self._timer.start(self._interval)  # 重置计时器
+
     def set_gif(self, gif_path):
         """设置并播放GIF"""
-        if self.movie:
-            self.movie.stop()
-        self.movie = QMovie(gif_path)
-        self.setMovie(self.movie)
-        self.movie.frameChanged.connect(self.update)  # 每帧刷新
+        self._release_movie()
+        self._ensure_pets()
+        self._index_is_next = False
+        self._parked = None
+        self._current_gif = gif_path
+        load_start = time.perf_counter()
+        # 其他窗口正在播放同一GIF时直接共用它的帧
+        self._load_source = None
+        decoded = self._frame_store.acquire(gif_path, self._decode_side, self._load_decoded)
+        source = 'decode' if decoded is None else self._load_source or 'shared'
+        if decoded is not None:
+            # 命中预取：直接换上已解码的动画，不再读盘解码
+            self.movie = DecodedMovie(decoded, self)
+            self.clear()
+        else:
+            self.movie = movie_for(gif_path)  # 从共用的原始字节缓存读取，再次播放时不再读盘
+            self._apply_movie_scaled_size()
+            # 画面由 paintEvent 绘制；不交给 QLabel.setMovie，否则它会按未缩放的帧区域另外请求重绘
+            self.clear()
+        self.movie.frameChanged.connect(self._on_frame_changed)  # 每帧刷新（受帧率上限约束）
+        self._apply_pacing()
         self.movie.start()
+        self._playback.attach(self.movie)
+        # 帧的来源和命中率显示在性能面板上；命中率只统计预取器本身，磁盘缓存或其他窗口提供的帧不算预取命中
+        hit_rate = self._prefetcher.hit_rate()
+        if decoded is not None:
+            self._perf_stats.set_gif(gif_path, decoded.decode_ms, decoded.nbytes, source, hit_rate)
+        else:
+            # QMovie 边播放边解码：记录同步加载首帧的耗时，内存按当前帧估算
+            rect = self.movie.frameRect()
+            self._perf_stats.set_gif(gif_path, (time.perf_counter() - load_start) * 1000.0,
+                                     rect.width() * rect.height() * 4, source, hit_rate)
+        # 预取新位置前后的GIF（随机播放时预取下一个随机到的GIF）
+        order = self._current_shuffle_order()
+        if order is not None:
+            upcoming = self.gif_list[order.peek()]
+            self._prefetcher.prefetch_around([gif_path, upcoming], 0)
+        else:
+            self._prefetcher.prefetch_around(self.gif_list, self.gif_index)
+        self._save_config()  # 记录播放位置（防抖写入）
+
+    def _ensure_pets(self):
+        """第一次播放GIF或打开陪伴窗口时才导入多窗口模块，创建共享帧表和陪伴窗口控制器"""
+        if self._pets is None:
+            from pet_windows import PetController, SharedFrameStore
+            self._frame_store = SharedFrameStore()
+            self._pets = PetController(self)
+        return self._pets
+
+    def _release_movie(self):
+        """停止当前动画并归还共享的帧"""
+        if self.movie is None:
+            return
+        self.movie.stop()
+        if isinstance(self.movie, DecodedMovie):
+            self._frame_store.release(self.movie.decoded)
+        self._playback.detach()
+        self.movie.deleteLater()
+        self.movie = None
+
+    def _current_frame(self):
+        """当前（或最小化到托盘前）停在的帧号"""
+        if self._parked is not None:
+            return self._parked[1]
+        return self.movie.currentFrameNumber() if self.movie is not None else 0
+
+    def _seek(self, frame_number):
+        """把当前动画定位到某一帧：预解码的动画直接跳转，QMovie 借助帧索引只从最近的关键帧开始解码"""
+        if self.movie is None or frame_number <= 0:
+            return
+        from gif_frames import seek_movie
+        seek_movie(self.movie, self._current_gif, frame_number, self._get_library_index())
+
+    def _restore_resume_frame(self, gif_path):
+        """续播上次退出时的GIF时回到退出时的那一帧（只用一次）"""
+        frame_number, self._resume_frame = self._resume_frame, 0
+        if gif_path and gif_path == self._current_gif:
+            self._seek(frame_number)
+
+    def _park_movie(self):
+        """最小化到托盘：保存当前画面作为下次启动的首帧，然后释放动画和它的帧，只记下播放位置"""
+        if self.movie is None or self._current_gif is None:
+            return
+        if self.movie.isValid():
+            save_snapshot(self.movie.currentPixmap(), self._snapshot_path)
+        self._parked = (self._current_gif, self.movie.currentFrameNumber())
+        self._release_movie()
+        self._prefetcher.clear()  # 预取的帧也一并释放
+
+    def _unpark_movie(self):
+        """从托盘恢复：重新载入最小化前的GIF并回到同一帧"""
+        parked, self._parked = self._parked, None
+        if parked is None or self.movie is not None:
+            return
+        gif_path, frame_number = parked
+        if not source_exists(gif_path):
+            self.next_gif()
+            return
+        self.set_gif(gif_path)
+        self._seek(frame_number)
+
+    def _load_decoded(self, gif_path, max_side):
+        """从预取缓存或磁盘缓存取已解码的GIF，都没有时返回 None；来源记在 _load_source 中"""
+        decoded = None
+        if decode_covers(self._prefetcher.max_side, max_side):
+            decoded = self._prefetcher.get(gif_path)
+            if decoded is not None:
+                self._load_source = 'prefetch'
+        if decoded is None and self._disk_cache is not None:
+            # 未预取到时，磁盘缓存中的帧可直接映射使用
+            decoded = self._disk_cache.load(gif_path, max_side)
+            if decoded is not None:
+                self._load_source = 'disk'
+        return decoded
+
+    def _apply_movie_scaled_size(self):
+        """让 QMovie 在解码时就把每帧缩小到当前解码尺寸档位"""
+        size = scaled_decode_size(image_size(self._current_gif), self._decode_side)
+        if size is not None:
+            self.movie.setScaledSize(size)
+
+    def _update_decode_size(self):
+        """窗口尺寸跨过解码档位时按新尺寸重新解码当前及预取的GIF"""
+        side = decode_side_for(self.width(), self.height(), self.devicePixelRatioF())
+        if side == self._decode_side:
+            return
+        self._decode_side = side
+        self._prefetcher.set_max_side(side)  # 当前GIF重新解码完成后由 _on_decoded_ready 换上
+        if isinstance(self.movie, QMovie):
+            self._apply_movie_scaled_size()
+            self._dirty_tracker.reset()  # 帧尺寸变了，之前的变化区域不再适用
+
+    def _on_decoded_ready(self, path):
+        """预取器解码好了当前GIF：边播边解码的 QMovie 换成共享的帧（陪伴窗口随后共用同一份），
+        窗口尺寸跨档后换成按新档位解码的帧；都停留在原来的帧"""
+        if path != self._current_gif or self.movie is None:
+            return
+        old = self.movie
+        if isinstance(old, DecodedMovie) and old.decoded.max_side == self._decode_side:
+            return
+        decoded = self._frame_store.acquire(path, self._decode_side, self._prefetched)
+        if decoded is None:
+            return
+        if isinstance(old, DecodedMovie):
+            self._frame_store.release(old.decoded)
+            if decoded is old.decoded:
+                return
+            self._frame_cache.clear()  # 解码尺寸变了，旧档位缩放出的帧不再使用
+        frame_number = old.currentFrameNumber()
+        running = old.state() != QMovie.NotRunning
+        old.stop()
+        old.deleteLater()
+        self.movie = DecodedMovie(decoded, self)
+        self.movie.frameChanged.connect(self._on_frame_changed)
+        self._apply_pacing()
+        if running:
+            self.movie.start()
+        self.movie.jumpToFrame(frame_number)
+        self._playback.attach(self.movie)
+        self._perf_stats.memory_bytes = decoded.nbytes
+        self._perf_stats.load_source = 'prefetch'
+
+    def _prefetched(self, gif_path, max_side):
+        """预取器中可用于 max_side 的已解码GIF（不计入预取命中率），没有时返回 None"""
+        if not decode_covers(self._prefetcher.max_side, max_side):
+            return None
+        return self._prefetcher.peek(gif_path)
+
+    def _on_frame_changed(self, frame_number):
+        """新帧到达时只重绘变化的区域；超过帧率上限的帧合并到稍后的一次重绘中"""
+        self._perf_stats.record_frame(self.movie.nextFrameDelay())
+        # 从关键帧开始播放的 QMovie 发出的是片段内的帧号，以 currentFrameNumber() 为准
+        rect = self._dirty_tracker.frame_changed(self.movie, self.movie.currentFrameNumber())
+        if rect is None:
+            self._dirty_full = True
+        else:
+            self._dirty_rect = self._dirty_rect.united(rect)
+        if self._pacer.allow_paint():
+            self._flush_dirty()
+        elif not self._deferred_paint.isActive():
+            self._deferred_paint.start(self._pacer.remaining_ms())
+
+    def _flush_dirty(self):
+        """把累积的变化区域按当前缩放/翻转映射到窗口坐标并请求重绘"""
+        full, rect = self._dirty_full, self._dirty_rect
+        self._dirty_full, self._dirty_rect = False, QRect()
+        if self.movie is None:
+            return
+        if self._click_through:
+            self._update_click_mask()
+        frame_rect = self.movie.frameRect()
+        if full or self._show_hud or self._snapshot is not None or frame_rect.isEmpty():
+            self.update()  # 性能面板和启动快照每次都要整窗重绘
+            return
+        if rect.isEmpty():
+            return
+        target = fit_rect(frame_rect.width(), frame_rect.height(), self.width(), self.height())
+        self.update(map_to_widget(rect, frame_rect.width(), frame_rect.height(), target, self._flipped)
+                    .intersected(self.rect()))
+
+    def _apply_pacing(self):
+        """把当前帧率上限应用到动画（预解码的动画可直接跳过过短的帧）"""
+        if isinstance(self.movie, DecodedMovie):
+            self.movie.setMinFrameInterval(self._pacer.min_interval_ms)
 
     def paintEvent(self, event):
         """绘制事件，用于绘制缩放后的GIF"""
+        paint_start = time.perf_counter()
+        if not self._startup_scheduled:
+            # 首帧已经绘制，接着完成其余的启动工作
+            self._startup_scheduled = True
+            self._startup.mark('first_paint')
+            QTimer.singleShot(0, self._finish_startup)
         if not self.movie or not self.movie.isValid():
+            if self._snapshot is not None:
+                self._paint_snapshot()
+                return
             super().paintEvent(event)
             return
-        frame = self.movie.currentPixmap()
-        if frame.isNull():
+        frame_rect = self.movie.frameRect()
+        if frame_rect.isEmpty():
             super().paintEvent(event)
             return
         
-        # 如果需要左右翻转，应用水平翻转变换
-        if self._flipped:
-            from PyQt5.QtGui import QTransform
-            transform = QTransform()
-            transform.scale(-1, 1)  # 水平翻转
-            frame = frame.transformed(transform)
-        
+        target, _, pixmap = self._scaled_frame(frame_rect)
         painter = QPainter(self)
-        # 计算缩放比例，保持原比例，居中
-        widget_w, widget_h = self.width(), self.height()
-        frame_w, frame_h = frame.width(), frame.height()
-        scale = min(widget_w / frame_w, widget_h / frame_h)
-        new_w = int(frame_w * scale)
-        new_h = int(frame_h * scale)
-        x = (widget_w - new_w) // 2
-        y = (widget_h - new_h) // 2
-        painter.drawPixmap(x, y, new_w, new_h, frame)
+        painter.drawPixmap(target.topLeft(), pixmap)
+        if 'first_gif_frame' not in self._startup.marks:
+            # 真正的GIF帧已经显示，快照不再需要
+            self._snapshot = None
+            self._startup.mark('first_gif_frame')
+            self._perf_stats.startup = dict(self._startup.marks)
+            self._config_store.update({'last_startup': self._perf_stats.startup})
+        cost_ms = (time.perf_counter() - paint_start) * 1000.0
+        self._pacer.record_paint(cost_ms)
+        self._perf_stats.record_paint(cost_ms)
+        if self._show_hud:
+            self._perf_stats.merged_frames = self._pacer.merged_frames
+            draw_hud(painter, self.rect(), self._perf_stats)
+        painter.end()
+
+    def _scaled_frame(self, frame_rect):
+        """当前帧保持比例居中后的绘制区域、缓存键和已缩放/翻转的贴图"""
+        target = fit_rect(frame_rect.width(), frame_rect.height(), self.width(), self.height())
+        # 优先使用缓存中已缩放/翻转的帧，播放一轮后绘制只剩贴图
+        dpr = self.devicePixelRatioF()
+        transform_mode = self._pacer.transform_mode
+        key = FrameCache.make_key(self._current_gif, self.movie.currentFrameNumber(),
+                                  target.width(), target.height(), self._flipped, dpr, transform_mode)
+        pixmap = self._frame_cache.get(key)
+        if pixmap is None:
+            pixmap = render_frame(self.movie.currentPixmap(), target.width(), target.height(), self._flipped, dpr,
+                                  transform_mode)
+            self._frame_cache.put(key, pixmap)
+        return target, key, pixmap
+
+    def _update_click_mask(self):
+        """点击穿透开启时按当前帧的不透明区域设置窗口遮罩
+
+        遮罩与已缩放的帧缓存在一起，每个（帧、尺寸、翻转）只计算一次；性能面板显示时或没有动画时不设遮罩。
+        """
+        region = None
+        if self._click_through and not self._show_hud and self.movie is not None and self.movie.isValid():
+            frame_rect = self.movie.frameRect()
+            if not frame_rect.isEmpty():
+                target, key, pixmap = self._scaled_frame(frame_rect)
+                mask = self._frame_cache.get_mask(key)
+                if mask is None:
+                    mask = alpha_mask_region(pixmap, dpr=pixmap.devicePixelRatio())
+                    self._frame_cache.put_mask(key, mask)
+                region = mask.translated(target.topLeft())
+                if region.isEmpty():
+                    region = QRegion(target)  # 全透明的帧仍保留整个画面可点击，避免窗口无法操作
+        if region == self._click_mask:
+            return
+        self._click_mask = region
+        if region is None:
+            self.clearMask()
+        else:
+            self.setMask(region)
+
+    def _paint_snapshot(self):
+        """绘制上次退出时保存的画面（GIF加载完成前的占位首帧）"""
+        target = fit_rect(self._snapshot.width(), self._snapshot.height(), self.width(), self.height())
+        pixmap = render_frame(self._snapshot, target.width(), target.height(), self._flipped,
+                              self.devicePixelRatioF(), Qt.FastTransformation)
+        painter = QPainter(self)
+        painter.drawPixmap(target.topLeft(), pixmap)
 
     def resizeEvent(self, event):
         """窗口大小改变事件"""
-        # _update_scaled_size 已弃用，paintEvent 会自动处理缩放
+        # 尺寸变化后旧尺寸的缓存帧不再可用，直接释放（陪伴窗口仍在使用缓存时由 LRU 淘汰）
+        if self._pets is None or not self._pets.windows:
+            self._frame_cache.clear()
+        self._decode_size_timer.start()
+        self._save_config()  # 记录窗口大小（防抖写入）
+        self._update_click_mask()
         super().resizeEvent(event)
 
+    def moveEvent(self, event):
+        """窗口移动事件，记录窗口位置"""
+        self._save_config()  # 防抖写入，拖动过程中不会频繁写盘
+        super().moveEvent(event)
+
     def set_player_size(self, width, height):
         """设置播放器窗口大小"""
         self.resize(width, height)
@@ -440,9 +1243,13 @@ class TransparentGifPlayer(QLabel):
             return
         # 在单文件模式下，不切换文件，只是重新开始播放当前文件
         if self._single_file_mode:
-            self.set_gif(self.gif_list[0])  # 重新播放当前文件
+            self._replay_current_gif()
             return
-        self.gif_index = (self.gif_index + 1) % len(self.gif_list)
+        order = self._current_shuffle_order()
+        if order is not None:
+            self.gif_index = order.next()
+        elif not self._index_is_next:
+            self.gif_index = (self.gif_index + 1) % len(self.gif_list)
         self.set_gif(self.gif_list[self.gif_index])
 
     def prev_gif(self):
@@ -451,11 +1258,40 @@ class TransparentGifPlayer(QLabel):
             return
         # 在单文件模式下，不切换文件，只是重新开始播放当前文件
         if self._single_file_mode:
-            self.set_gif(self.gif_list[0])  # 重新播放当前文件
+            self._replay_current_gif()
             return
-        self.gif_index = (self.gif_index - 1 + len(self.gif_list)) % len(self.gif_list) # 确保负数也能正确循环
+        order = self._current_shuffle_order()
+        previous = order.prev() if order is not None else None
+        if previous is not None:
+            self.gif_index = previous  # 随机播放时沿播放历史后退
+        else:
+            self.gif_index = (self.gif_index - 1 + len(self.gif_list)) % len(self.gif_list) # 确保负数也能正确循环
         self.set_gif(self.gif_list[self.gif_index])
 
+    def _replay_current_gif(self):
+        """单文件模式下从头重新播放：复用当前的动画对象，不重新读取和解码"""
+        if self.movie is None or self._current_gif != self.gif_list[0]:
+            self.set_gif(self.gif_list[0])
+            return
+        self.movie.stop()
+        self.movie.start()
+        if self._playback.paused:
+            self.movie.setPaused(True)  # 窗口不可见时保持暂停
+
+    def _current_shuffle_order(self):
+        """随机播放时返回与当前播放列表匹配的随机顺序，否则返回 None"""
+        if not self._shuffle or self._single_file_mode or len(self.gif_list) < 2:
+            return None
+        from compact_playlist import CompactPlaylist, ShuffleOrder
+        if isinstance(self.gif_list, CompactPlaylist) and self._shuffle_order is not None \
+                and self._shuffle_order.size < len(self.gif_list):
+            # 递归扫描只在末尾追加，新条目直接并入本轮
+            self._shuffle_order.grow(len(self.gif_list))
+        elif self._shuffle_order is None or self._shuffle_order.size != len(self.gif_list):
+            # 播放列表变化后重新洗牌
+            self._shuffle_order = ShuffleOrder(len(self.gif_list))
+        return self._shuffle_order
+
     def contextMenuEvent(self, event):
         """右键菜单事件"""
         menu = QMenu(self)
@@ -479,17 +1315,14 @@ class TransparentGifPlayer(QLabel):
         minimize_action = QAction('最小化到系统托盘', self)
         def minimize_to_tray():
             self.hide()  # 隐藏窗口，彻底从任务栏和 Alt+Tab 消失
+            self._park_movie()  # 隐藏期间不占用已解码的帧，恢复时借助帧索引回到同一帧
             # 最小化时暂停自动切换和计时
             if self._auto_switch:
                 self._timer.stop()
             # Win11等系统托盘可能被隐藏，弹出提示
-            self.tray_icon.showMessage(
-                '一二布布',
-                '已最小化到系统托盘，点击托盘图标可恢复窗口。',
-                QSystemTrayIcon.Information,
-                3000
-            )
+            self._tray_message('已最小化到系统托盘，点击托盘图标可恢复窗口。')
         minimize_action.triggered.connect(minimize_to_tray)
+        minimize_action.setEnabled(self.tray_icon is not None)  # 没有托盘时隐藏后无法从托盘恢复
         menu.addAction(minimize_action)
 
         # 自动切换选项
@@ -532,10 +1365,84 @@ class TransparentGifPlayer(QLabel):
         def toggle_flip():
             self._flipped = not self._flipped
             self._save_config()
+            self._update_click_mask()
             self.update()  # 触发重绘
         flip_action.triggered.connect(toggle_flip)
         menu.addAction(flip_action)
 
+        # 点击穿透选项：透明区域的点击落到下面的窗口上
+        click_through_action = QAction('透明区域点击穿透', self, checkable=True)
+        click_through_action.setChecked(self._click_through)
+        click_through_action.triggered.connect(self._toggle_click_through)
+        menu.addAction(click_through_action)
+
+        # 帧率限制子菜单，标题显示当前模式
+        fps_menu = QMenu(f'帧率限制（{self._pacer.describe()}）', self)
+        fps_options = [
+            ('不限制', 0, False),
+            ('60 FPS', 60, False),
+            ('30 FPS', 30, False),
+            ('20 FPS', 20, False),
+            ('15 FPS', 15, False),
+            ('自适应', 0, True),
+        ]
+        for label, fps, adaptive in fps_options:
+            act = QAction(label, self, checkable=True)
+            act.setChecked(self._adaptive_fps == adaptive and (adaptive or self._max_fps == fps))
+            act.triggered.connect(lambda checked, f=fps, a=adaptive: self._set_fps_mode_and_save(f, a))
+            fps_menu.addAction(act)
+        menu.addMenu(fps_menu)
+
+        # 随机播放选项
+        shuffle_action = QAction('随机播放', self, checkable=True)
+        shuffle_action.setChecked(self._shuffle)
+        def toggle_shuffle():
+            self._shuffle = not self._shuffle
+            self._shuffle_order = None
+            self._save_config()
+        shuffle_action.triggered.connect(toggle_shuffle)
+        menu.addAction(shuffle_action)
+
+        # 包含子文件夹选项：切换后重新扫描当前文件夹
+        recursive_action = QAction('包含子文件夹', self, checkable=True)
+        recursive_action.setChecked(self._recursive)
+        def toggle_recursive():
+            self._recursive = not self._recursive
+            self._save_config()
+            if self._scan_folder and not self._single_file_mode:
+                self._resume_gif = self._current_gif
+                self.set_gif_folder(self._scan_folder, save_config=False)
+        recursive_action.triggered.connect(toggle_recursive)
+        menu.addAction(recursive_action)
+
+        # 监视文件夹变化选项
+        watch_action = QAction('监视文件夹变化', self, checkable=True)
+        watch_action.setChecked(self._watch_folder)
+        def toggle_watch():
+            self._watch_folder = not self._watch_folder
+            if self._watch_folder and self._scan_folder and not self._single_file_mode and not self._recursive:
+                self._folder_watcher.watch(self._scan_folder)
+            else:
+                self._folder_watcher.unwatch()
+            self._save_config()
+        watch_action.triggered.connect(toggle_watch)
+        menu.addAction(watch_action)
+
+        # 多窗口：新开一个显示当前GIF的陪伴窗口
+        new_window_action = QAction('新建窗口', self)
+        new_window_action.triggered.connect(lambda: self._ensure_pets().add_window())
+        menu.addAction(new_window_action)
+
+        # 性能监视面板
+        hud_action = QAction('性能监视 (Ctrl+P)', self, checkable=True)
+        hud_action.setChecked(self._show_hud)
+        hud_action.triggered.connect(self._toggle_hud)
+        menu.addAction(hud_action)
+
+        dump_action = QAction('导出性能统计', self)
+        dump_action.triggered.connect(self._dump_perf_stats)
+        menu.addAction(dump_action)
+
         # 新增：选择文件夹
         select_folder_action = QAction('选择GIF文件夹...', self)
         def select_folder():
@@ -556,6 +1463,22 @@ class TransparentGifPlayer(QLabel):
         select_file_action.triggered.connect(select_file)
         menu.addAction(select_file_action)
 
+        # 选择 ZIP 压缩包：直接播放其中的GIF，不解压
+        select_archive_action = QAction('选择ZIP压缩包...', self)
+        def select_archive():
+            base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+            file_path, _ = QFileDialog.getOpenFileName(self, '选择ZIP压缩包', self._user_gif_folder or base_dir, 'ZIP Archives (*.zip)')
+            if file_path:
+                self.set_gif_folder(os.path.abspath(file_path), save_config=True)
+        select_archive_action.triggered.connect(select_archive)
+        menu.addAction(select_archive_action)
+
+        # 缩略图窗口：浏览当前GIF库并跳到选中的GIF
+        thumbnails_action = QAction('浏览缩略图...', self)
+        thumbnails_action.setEnabled(bool(self.gif_list))
+        thumbnails_action.triggered.connect(self.show_thumbnails)
+        menu.addAction(thumbnails_action)
+
         close_action = QAction('关闭', self)
         close_action.triggered.connect(QApplication.instance().quit)
         menu.addAction(close_action)
@@ -570,6 +1493,38 @@ class TransparentGifPlayer(QLabel):
                 self._timer.start(self._interval)
             self._save_config()
 
+    def _toggle_hud(self):
+        """显示/隐藏性能监视面板"""
+        self._show_hud = not self._show_hud
+        self._save_config()
+        self._update_click_mask()
+        self.update()
+
+    def _toggle_click_through(self):
+        """开启/关闭透明区域点击穿透"""
+        self._click_through = not self._click_through
+        self._save_config()
+        self._update_click_mask()
+
+    def _dump_perf_stats(self):
+        """把滚动性能统计导出到配置文件所在目录"""
+        base_dir = os.path.dirname(os.path.abspath(self._config_path or sys.argv[0]))
+        path = os.path.join(base_dir, time.strftime('perf_stats_%Y%m%d_%H%M%S.json'))
+        try:
+            self._perf_stats.dump(path)
+        except Exception as e:
+            print(f"导出性能统计失败: {e}")
+            return
+        print(f"DEBUG: Performance stats written to {path}")
+        self._tray_message(f'性能统计已导出到：{path}')
+
+    def _set_fps_mode_and_save(self, max_fps, adaptive):
+        """设置帧率上限/自适应模式并保存配置"""
+        self._max_fps = max_fps
+        self._adaptive_fps = adaptive
+        self._pacer.configure(max_fps, adaptive)
+        self._save_config()
+
     def keyPressEvent(self, event):
         """键盘按下事件，用于缩放和切换GIF"""
         if event.modifiers() & Qt.ControlModifier:
@@ -591,7 +1546,11 @@ class TransparentGifPlayer(QLabel):
                 # Ctrl+F 切换左右翻转
                 self._flipped = not self._flipped
                 self._save_config()
+                self._update_click_mask()
                 self.update()  # 触发重绘
+            elif event.key() == Qt.Key_P:
+                # Ctrl+P 切换性能监视面板
+                self._toggle_hud()
         super().keyPressEvent(event)
 
     def scale_player(self, factor):
@@ -634,6 +1593,7 @@ class TransparentGifPlayer(QLabel):
             # 如果窗口被隐藏（例如最小化到托盘），则停止计时器
             elif not self.isVisible() and self._auto_switch and self._timer.isActive():
                 self._timer.stop()
+            self._playback.refresh()
         super().changeEvent(event)
 
 if __name__ == '__main__':
@@ -649,6 +1609,35 @@ if __name__ == '__main__':
         # 非Windows系统可能没有此属性
         pass
 
+    # 命令行参数：GIF文件夹或GIF文件，以及切换/显示命令
+    import argparse
+    parser = argparse.ArgumentParser(description='一二布布 透明GIF播放器')
+    parser.add_argument('path', nargs='?', help='要播放的GIF文件夹、ZIP压缩包或单个GIF文件')
+    parser.add_argument('--next', action='store_true', help='切换到下一个GIF')
+    parser.add_argument('--prev', action='store_true', help='切换到上一个GIF')
+    parser.add_argument('--show', action='store_true', help='显示窗口（从托盘恢复）')
+    args = parser.parse_args()
+    from single_instance import CMD_FOLDER, CMD_FILE, CMD_NEXT, CMD_PREV, CMD_SHOW
+    commands = []
+    if args.path:
+        path = os.path.abspath(args.path)
+        commands.append(f'{CMD_FOLDER if is_library(path) else CMD_FILE} {path}')
+    if args.next:
+        commands.append(CMD_NEXT)
+    if args.prev:
+        commands.append(CMD_PREV)
+    if args.show:
+        commands.append(CMD_SHOW)
+
+    # 单实例：已有实例在运行时把命令转发给它（没有命令时让它显示窗口）后立即退出
+    from single_instance import CommandServer, parse_command, send_commands, server_name
+    replies = send_commands(server_name(), commands or [CMD_SHOW])
+    if replies is not None:
+        for reply in replies:
+            if reply != 'ok':
+                print(reply, file=sys.stderr)
+        sys.exit(0 if all(reply == 'ok' for reply in replies) else 1)
+
     app = QApplication(sys.argv)
     app.setApplicationName('一二布布')
     app.setApplicationDisplayName('一二布布')
@@ -659,5 +1648,10 @@ if __name__ == '__main__':
     config_path = os.path.join(base_dir, 'user_config.json') # 用户配置文件路径
     
     player = TransparentGifPlayer(gif_folder, config_path=config_path)
+    for line in commands:
+        player.handle_command(*parse_command(line))
+    server = CommandServer(server_name(), player.handle_command)
+    server.listen()
+    app.aboutToQuit.connect(server.close)
     player.show()
     sys.exit(app.exec_())
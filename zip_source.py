@@ -0,0 +1,124 @@
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+ARCHIVE_SEPARATOR = '::'  # 压缩包内GIF的虚拟路径："<压缩包路径>::<成员名>"
+ARCHIVE_SUFFIX = '.zip'
+MAX_OPEN_ARCHIVES = 4  # 保持打开（映射）的压缩包数量
+
+
+def is_archive(path):
+    return bool(path) and path.lower().endswith(ARCHIVE_SUFFIX) and os.path.isfile(path)
+
+
+def is_library(path):
+    """可作为GIF库的来源：文件夹或 ZIP 压缩包"""
+    return os.path.isdir(path) or is_archive(path)
+
+
+def member_path(archive, name):
+    return f'{archive}{ARCHIVE_SEPARATOR}{name}'
+
+
+def split_member(path):
+    """把虚拟路径拆成 (压缩包路径, 成员名)，普通文件路径返回 None"""
+    archive, sep, name = path.partition(ARCHIVE_SEPARATOR)
+    if not sep or not archive.lower().endswith(ARCHIVE_SUFFIX):
+        return None
+    return archive, name
+
+
+class _MappedFile:
+    """把 mmap 包装成 zipfile 需要的可定位只读文件对象"""
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+        self.read = mapping.read
+        self.seek = mapping.seek
+        self.tell = mapping.tell
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class GifArchive:
+    """一个保持打开的 ZIP 压缩包：整个文件只读映射，成员列表只来自中央目录
+
+    read() 可在多个线程中调用（zipfile 对共享文件的定位和读取加了锁）。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        st = os.stat(path)
+        self.stamp = (st.st_size, st.st_mtime_ns)
+        import zipfile  # 只有打开压缩包时才需要，不计入冷启动
+        with open(path, 'rb') as f:
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._zip = zipfile.ZipFile(_MappedFile(self._mapping))
+
+    def gif_names(self):
+        """压缩包中的GIF成员名（已排序，跳过目录）"""
+        return sorted(info.filename for info in self._zip.infolist()
+                      if not info.is_dir() and info.filename.lower().endswith('.gif'))
+
+    def contains(self, name):
+        try:
+            self._zip.getinfo(name)
+        except KeyError:
+            return False
+        return True
+
+    def read(self, name):
+        """解压一个成员；压缩包被修改、损坏或已关闭时统一抛出 OSError"""
+        import zipfile
+        import zlib
+        try:
+            return self._zip.read(name)
+        except (KeyError, ValueError, EOFError, RuntimeError, NotImplementedError,
+                zipfile.BadZipFile, zlib.error) as e:
+            raise OSError(f'cannot read {name} from {self.path}: {e}') from e
+
+    def close(self):
+        self._zip.close()
+        self._mapping.close()
+
+
+_archives = OrderedDict()  # 压缩包绝对路径 -> GifArchive，按最近使用排序
+_archives_lock = threading.Lock()
+
+
+def open_archive(path):
+    """取保持打开的压缩包，切换GIF时不重新打开；文件被修改后重新打开"""
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    with _archives_lock:
+        archive = _archives.get(key)
+        if archive is not None and archive.stamp == (st.st_size, st.st_mtime_ns):
+            _archives.move_to_end(key)
+            return archive
+        if archive is not None:
+            del _archives[key]
+            archive.close()
+        archive = GifArchive(key)
+        _archives[key] = archive
+        while len(_archives) > MAX_OPEN_ARCHIVES:
+            _archives.popitem(last=False)[1].close()
+        return archive
+
+
+def close_archive(path):
+    """关闭并解除映射一个保持打开的压缩包（播放列表换到别处时调用），之后再用到时重新打开"""
+    with _archives_lock:
+        archive = _archives.pop(os.path.abspath(path), None)
+    if archive is not None:
+        archive.close()
+
+
+def list_archive(path):
+    """压缩包中全部GIF的虚拟路径（有序）"""
+    archive = open_archive(path)
+    return [member_path(archive.path, name) for name in archive.gif_names()]